@@ -36,6 +36,7 @@ class AzCli(CLI):
         from azure.cli.core.cloud import get_active_cloud
         from azure.cli.core.extensions import register_extensions
         from azure.cli.core._session import ACCOUNT, CONFIG, SESSION
+        from azure.cli.core._read_cache import on_global_arguments, handle_cache_ttl_parameter
 
         import knack.events as events
         from knack.util import ensure_dir
@@ -45,6 +46,7 @@ class AzCli(CLI):
         self.data['command_extension_name'] = None
         self.data['completer_active'] = ARGCOMPLETE_ENV_NAME in os.environ
         self.data['query_active'] = False
+        self.data['read_cache_ttl'] = None
 
         azure_folder = self.config.config_dir
         ensure_dir(azure_folder)
@@ -56,6 +58,8 @@ class AzCli(CLI):
 
         register_extensions(self)
         self.register_event(events.EVENT_INVOKER_POST_CMD_TBL_CREATE, add_id_parameters)
+        self.register_event(events.EVENT_PARSER_GLOBAL_CREATE, on_global_arguments)
+        self.register_event(events.EVENT_INVOKER_POST_PARSE_ARGS, handle_cache_ttl_parameter)
 
         self.progress_controller = None
 
@@ -0,0 +1,253 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+"""
+Opt-in on-disk cache of ARM GET responses for show and list commands.
+
+Responses are stored per (subscription, URL) where the URL carries the api-version. Within the
+TTL a cached response is served without going to the network, afterwards it is revalidated with
+If-None-Match when the service returned an ETag. Any mutating request drops, regardless of whether
+caching is enabled for the current command, the cached entries of the subscription which:
+ - share the resource id hierarchy of the request, e.g. the resource group the resource is in,
+ - are about the same provider resource type at any scope, e.g. the subscription wide listing,
+ - list resources of any type, e.g. /subscriptions/x/resources.
+Template deployments and resource group writes can touch anything, so they drop every cached
+entry of the subscription.
+
+Entries are only served while the index references them. The index is updated under a lock file
+and every file is replaced atomically, so concurrent commands can share the cache.
+"""
+
+import base64
+import hashlib
+import json
+import os
+import time
+
+from knack.log import get_logger
+
+logger = get_logger(__name__)
+
+READ_CACHE_DIR_NAME = 'readcache'
+READ_CACHE_INDEX_FILE_NAME = 'index.json'
+READ_CACHE_LOCK_FILE_NAME = 'index.lock'
+READ_CACHE_CONFIG_KEY = 'read_cache'
+CACHEABLE_VERBS = ('show', 'list')
+
+
+def on_global_arguments(_, **kwargs):
+    arg_group = kwargs.get('arg_group')
+    arg_group.add_argument('--cache-ttl', dest='_cache_ttl', metavar='SECONDS', type=int,
+                           help='Serve show and list commands from a local response cache for up to this many '
+                                'seconds. Use 0 to bypass the cache. Defaults to [core] {}.'.format(
+                                    READ_CACHE_CONFIG_KEY))
+
+
+def handle_cache_ttl_parameter(cli_ctx, **kwargs):
+    args = kwargs['args']
+    cache_ttl = getattr(args, '_cache_ttl', None)
+    if hasattr(args, '_cache_ttl'):
+        del args._cache_ttl
+    cli_ctx.data['read_cache_ttl'] = cache_ttl
+
+
+def get_read_cache_ttl(cli_ctx):
+    """ The TTL in seconds for the current command, or 0 when responses must not be served from the cache. """
+    command = cli_ctx.data.get('command') or ''
+    verb = command.rsplit(' ', 1)[-1]
+    if not any(verb == v or verb.startswith(v + '-') for v in CACHEABLE_VERBS):
+        return 0
+    ttl = cli_ctx.data.get('read_cache_ttl')
+    if ttl is None:
+        try:
+            ttl = cli_ctx.config.getint('core', READ_CACHE_CONFIG_KEY, fallback=0)
+        except ValueError:
+            logger.warning('Ignoring invalid [core] %s value. Expected a number of seconds.', READ_CACHE_CONFIG_KEY)
+            ttl = 0
+    return max(ttl, 0)
+
+
+def _resource_path(url):
+    from six.moves.urllib.parse import urlparse  # pylint: disable=import-error
+    return urlparse(url).path.rstrip('/').lower()
+
+
+def _subscription_scope(path):
+    parts = path.split('/')
+    return '/'.join(parts[:3]) if len(parts) > 2 and parts[1] == 'subscriptions' else None
+
+
+def _resource_types(path):
+    """ The '<namespace>/<type>' of every provider segment of the path. """
+    parts = path.split('/')
+    return set('{}/{}'.format(parts[i + 1], parts[i + 2]) for i, part in enumerate(parts[:-2])
+               if part == 'providers')
+
+
+def _is_related_path(path, other):
+    """ True when one path is the other or lives under it, e.g. a resource and the list it appears in. """
+    return path == other or path.startswith(other + '/') or other.startswith(path + '/')
+
+
+def _is_subscription_wide_write(path):
+    types = _resource_types(path)
+    return not types or 'microsoft.resources/deployments' in types
+
+
+def _is_stale(cached_path, written_path):
+    """ Whether the response cached for cached_path may have changed through a write to written_path. """
+    scope = _subscription_scope(written_path)
+    if scope and _is_subscription_wide_write(written_path):
+        return _is_related_path(cached_path, scope)
+    if _is_related_path(cached_path, written_path):
+        return True
+    if _subscription_scope(cached_path) != scope:
+        return False
+    return cached_path.endswith('/resources') or bool(_resource_types(cached_path) & _resource_types(written_path))
+
+
+class ReadCache(object):
+
+    def __init__(self, cache_dir):
+        self.cache_dir = cache_dir
+        self.index_path = os.path.join(cache_dir, READ_CACHE_INDEX_FILE_NAME)
+        self.lock_path = os.path.join(cache_dir, READ_CACHE_LOCK_FILE_NAME)
+
+    def _entry_path(self, key):
+        return os.path.join(self.cache_dir, key + '.json')
+
+    def _write(self, path, data):
+        from azure.cli.core.util import open_atomic
+        with open_atomic(path) as f:
+            json.dump(data, f)
+
+    def _lock(self):
+        from azure.cli.core.util import file_lock
+        try:
+            os.makedirs(self.cache_dir)
+        except OSError:  # already exists
+            pass
+        return file_lock(self.lock_path)
+
+    def _load_index(self, locked=False):
+        try:
+            with open(self.index_path, 'r') as f:
+                return json.load(f)
+        except (OSError, IOError):
+            return {}
+        except ValueError:
+            if not locked:
+                return {}
+            # entries no index refers to could never be invalidated, drop them with the damaged index
+            logger.debug('Clearing the read cache as its index is damaged')
+            for name in os.listdir(self.cache_dir):
+                if name.endswith('.json'):
+                    os.remove(os.path.join(self.cache_dir, name))
+            return {}
+
+    @staticmethod
+    def make_key(subscription_id, url):
+        return hashlib.sha256('{}|{}'.format(subscription_id, url).encode('utf-8')).hexdigest()
+
+    def get(self, key):
+        if key not in self._load_index():
+            return None
+        try:
+            with open(self._entry_path(key), 'r') as f:
+                return json.load(f)
+        except (OSError, IOError, ValueError):
+            return None
+
+    def put(self, key, response):
+        entry = {
+            'url': response.url,
+            'time': time.time(),
+            'etag': response.headers.get('ETag'),
+            'headers': dict(response.headers),
+            'encoding': response.encoding,
+            'content': base64.b64encode(response.content).decode('ascii')
+        }
+        with self._lock():
+            index = self._load_index(locked=True)
+            self._write(self._entry_path(key), entry)
+            index[key] = _resource_path(response.url)
+            self._write(self.index_path, index)
+        return entry
+
+    def touch(self, key, entry):
+        entry['time'] = time.time()
+        with self._lock():
+            if key in self._load_index(locked=True):
+                self._write(self._entry_path(key), entry)
+
+    def invalidate(self, url):
+        if not os.path.isfile(self.index_path):
+            return
+        path = _resource_path(url)
+        with self._lock():
+            index = self._load_index(locked=True)
+            stale = [k for k, p in index.items() if _is_stale(p, path)]
+            if not stale:
+                return
+            for key in stale:
+                del index[key]
+            # unreferenced entries are never served, so the index goes first
+            self._write(self.index_path, index)
+            for key in stale:
+                try:
+                    os.remove(self._entry_path(key))
+                except OSError:
+                    pass
+        logger.debug('Invalidated %d cached response(s) for a write to %s', len(stale), path)
+
+    @staticmethod
+    def build_response(entry):
+        from requests import Response
+        from requests.structures import CaseInsensitiveDict
+        response = Response()
+        response.status_code = 200
+        response.reason = 'OK'
+        response.url = entry['url']
+        response.headers = CaseInsensitiveDict(entry['headers'])
+        response.encoding = entry['encoding']
+        response._content = base64.b64decode(entry['content'])  # pylint: disable=protected-access
+        return response
+
+
+def configure_read_cache(cli_ctx, client):
+    """ Route the requests of a msrest service client through the read cache. """
+    cache = ReadCache(os.path.join(cli_ctx.config.config_dir, READ_CACHE_DIR_NAME))
+    ttl = get_read_cache_ttl(cli_ctx)
+    subscription_id = getattr(client.config, 'subscription_id', None)
+    service_client = client._client  # pylint: disable=protected-access
+    original_send = service_client.send
+
+    def _send(request, headers=None, content=None, **config):
+        if request.method.upper() != 'GET':
+            cache.invalidate(request.url)
+            return original_send(request, headers, content, **config)
+        if not ttl or config.get('stream'):
+            return original_send(request, headers, content, **config)
+
+        key = cache.make_key(subscription_id, request.url)
+        entry = cache.get(key)
+        if entry and time.time() - entry['time'] < ttl:
+            logger.debug('Serving cached response for %s', request.url)
+            return cache.build_response(entry)
+
+        if entry and entry['etag']:
+            headers = dict(headers or {})
+            headers['If-None-Match'] = entry['etag']
+        response = original_send(request, headers, content, **config)
+        if entry and response.status_code == 304:
+            logger.debug('Revalidated cached response for %s', request.url)
+            cache.touch(key, entry)
+            return cache.build_response(entry)
+        if response.status_code == 200:
+            cache.put(key, response)
+        return response
+
+    service_client.send = _send
+    return client
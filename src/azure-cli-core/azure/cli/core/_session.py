@@ -77,6 +77,25 @@ class Session(collections.MutableMapping):
         return len(self.data)
 
 
+class CacheSession(Session):
+    '''A Session backing a cache, which other commands may read while it is being written.
+
+    Saves replace the file atomically, and a file that can't be parsed is loaded as an empty cache.
+    '''
+
+    def load(self, filename, max_age=0):
+        try:
+            super(CacheSession, self).load(filename, max_age)
+        except ValueError:  # damaged, e.g. by a command interrupted while writing it before saves were atomic
+            self.data = {}
+
+    def save(self):
+        from azure.cli.core.util import open_atomic
+        if self.filename:
+            with open_atomic(self.filename, encoding=self._encoding) as f:
+                json.dump(self.data, f)
+
+
 # ACCOUNT contains subscriptions information
 ACCOUNT = Session()
 
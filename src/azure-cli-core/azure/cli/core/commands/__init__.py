@@ -96,6 +96,16 @@ def _pre_command_table_create(cli_ctx, args):
     return _expand_file_prefixed_files(args)
 
 
+class BatchCommandError(CLIError):
+    """ Raised by a batch handler when the command failed for some of the targeted resources. The results of the
+    others are output before the error is reported. """
+
+    def __init__(self, message, results, failed):
+        super(BatchCommandError, self).__init__(message)
+        self.results = results  # by position in the batch
+        self.failed = failed  # positions in the batch
+
+
 class AzCliCommand(CLICommand):
 
     def __init__(self, loader, name, handler, description=None, table_transformer=None,
@@ -111,6 +121,8 @@ class AzCliCommand(CLICommand):
         self.supports_no_wait = kwargs.get('supports_no_wait', False)
         self.exception_handler = kwargs.get('exception_handler', None)
         self.confirmation = kwargs.get('confirmation', False)
+        # optional handler taking the arguments of all the resources targeted by a single invocation (e.g. --ids)
+        self.batch_handler = kwargs.get('batch_handler', None)
         self.command_kwargs = kwargs
 
     def _resolve_default_value_from_cfg_file(self, arg, overrides):
@@ -193,9 +205,8 @@ class AzCliCommandInvoker(CommandInvoker):
     def execute(self, args):
         from knack.events import (EVENT_INVOKER_PRE_CMD_TBL_CREATE, EVENT_INVOKER_POST_CMD_TBL_CREATE,
                                   EVENT_INVOKER_CMD_TBL_LOADED, EVENT_INVOKER_PRE_PARSE_ARGS,
-                                  EVENT_INVOKER_POST_PARSE_ARGS, EVENT_INVOKER_TRANSFORM_RESULT,
-                                  EVENT_INVOKER_FILTER_RESULT)
-        from knack.util import CommandResultItem, todict
+                                  EVENT_INVOKER_POST_PARSE_ARGS, EVENT_INVOKER_FILTER_RESULT)
+        from knack.util import CommandResultItem
         from azure.cli.core.commands.events import EVENT_INVOKER_PRE_CMD_TBL_TRUNCATE
 
         # TODO: Can't simply be invoked as an event because args are transformed
@@ -274,7 +285,10 @@ class AzCliCommandInvoker(CommandInvoker):
         # TODO: This fundamentally alters the way Knack.invocation works here. Cannot be customized
         # with an event. Would need to be customized via inheritance.
         results = []
-        for expanded_arg in _explode_list_args(parsed_args):
+        expanded_args = list(_explode_list_args(parsed_args))
+        use_batch = len(expanded_args) > 1 and getattr(parsed_args.func, 'batch_handler', None)
+        batch_params = []
+        for expanded_arg in expanded_args:
             cmd = expanded_arg.func
             if hasattr(expanded_arg, 'cmd'):
                 expanded_arg.cmd = cmd
@@ -302,29 +316,33 @@ class AzCliCommandInvoker(CommandInvoker):
             if command_source:
                 self.data['command_extension_name'] = command_source.extension_name
 
+            if use_batch:
+                batch_params.append(params)
+                continue
+
             try:
                 result = cmd(params)
-                if cmd.supports_no_wait and getattr(expanded_arg, 'no_wait', False):
-                    result = None
-                elif cmd.no_wait_param and getattr(expanded_arg, cmd.no_wait_param, False):
-                    result = None
-
-                transform_op = cmd.command_kwargs.get('transform', None)
-                if transform_op:
-                    result = transform_op(result)
-
-                if _is_poller(result):
-                    result = LongRunningOperation(self.cli_ctx, 'Starting {}'.format(cmd.name))(result)
-                elif _is_paged(result):
-                    result = list(result)
-
-                result = todict(result)
-                event_data = {'result': result}
-                self.cli_ctx.raise_event(EVENT_INVOKER_TRANSFORM_RESULT, event_data=event_data)
-                result = event_data['result']
-                results.append(result)
+                results.append(self._process_result(cmd, expanded_arg, result))
+            except Exception as ex:  # pylint: disable=broad-except
+                if cmd.exception_handler:
+                    cmd.exception_handler(ex)
+                    return None
+                else:
+                    six.reraise(*sys.exc_info())
 
+        if batch_params:
+            # the command updates all the targeted resources at once rather than one at a time
+            cmd = parsed_args.func
+            try:
+                batch_results = cmd.batch_handler(batch_params)
+                results = [self._process_result(cmd, expanded_arg, result)
+                           for expanded_arg, result in zip(expanded_args, batch_results)]
             except Exception as ex:  # pylint: disable=broad-except
+                if isinstance(ex, BatchCommandError):
+                    self._output_partial_results(parsed_args, [
+                        self._process_result(cmd, expanded_arg, result)
+                        for i, (expanded_arg, result) in enumerate(zip(expanded_args, ex.results))
+                        if i not in ex.failed])
                 if cmd.exception_handler:
                     cmd.exception_handler(ex)
                     return None
@@ -342,6 +360,44 @@ class AzCliCommandInvoker(CommandInvoker):
             table_transformer=self.commands_loader.command_table[parsed_args.command].table_transformer,
             is_query_active=self.data['query_active'])
 
+    def _output_partial_results(self, parsed_args, results):
+        """ Output the results of the resources a batch succeeded for, the error of the others is reported after. """
+        from knack.events import EVENT_INVOKER_FILTER_RESULT
+        from knack.util import CommandResultItem
+        if not results:
+            return
+        event_data = {'result': results}
+        self.cli_ctx.raise_event(EVENT_INVOKER_FILTER_RESULT, event_data=event_data)
+        output = self.cli_ctx.output
+        output.out(CommandResultItem(
+            event_data['result'],
+            table_transformer=self.commands_loader.command_table[parsed_args.command].table_transformer,
+            is_query_active=self.data['query_active']),
+            formatter=output.get_formatter(self.data['output']), out_file=self.cli_ctx.out_file)
+
+    def _process_result(self, cmd, expanded_arg, result):
+        from knack.events import EVENT_INVOKER_TRANSFORM_RESULT
+        from knack.util import todict
+
+        if cmd.supports_no_wait and getattr(expanded_arg, 'no_wait', False):
+            result = None
+        elif cmd.no_wait_param and getattr(expanded_arg, cmd.no_wait_param, False):
+            result = None
+
+        transform_op = cmd.command_kwargs.get('transform', None)
+        if transform_op:
+            result = transform_op(result)
+
+        if _is_poller(result):
+            result = LongRunningOperation(self.cli_ctx, 'Starting {}'.format(cmd.name))(result)
+        elif _is_paged(result):
+            result = list(result)
+
+        result = todict(result)
+        event_data = {'result': result}
+        self.cli_ctx.raise_event(EVENT_INVOKER_TRANSFORM_RESULT, event_data=event_data)
+        return event_data['result']
+
     def _build_kwargs(self, func, ns):  # pylint: disable=no-self-use
         from azure.cli.core.util import get_arg_list
         arg_list = get_arg_list(func)
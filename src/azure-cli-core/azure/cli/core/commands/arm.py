@@ -5,6 +5,7 @@
 
 import argparse
 from collections import OrderedDict
+from copy import deepcopy
 import json
 import re
 from six import string_types
@@ -23,6 +24,9 @@ from azure.cli.core.profiles import ResourceType
 
 logger = get_logger(__name__)
 
+# maximum number of resources a generic update command updates concurrently when given multiple --ids
+GENERIC_UPDATE_BATCH_CONCURRENCY = 10
+
 
 class ArmTemplateBuilder(object):
 
@@ -303,6 +307,24 @@ def _get_client_factory(_, kwargs):
     return factory
 
 
+def wait_for_pollers(cli_ctx, pollers, message='Running', poller_done_interval_ms=1000.0):
+    """ Wait on several long-running operations at once, reporting progress while any of them is running. """
+    import time
+    if not pollers:
+        return
+    progress_indicator = cli_ctx.get_progress_controller()
+    progress_indicator.begin()
+    try:
+        while not all(poller.done() for poller in pollers):
+            progress_indicator.add(message=message)
+            time.sleep(poller_done_interval_ms / 1000.0)
+    except KeyboardInterrupt:
+        progress_indicator.stop()
+        logger.error('Long-running operation wait cancelled.')
+        raise
+    progress_indicator.end()
+
+
 # pylint: disable=too-many-statements
 def _cli_generic_update_command(context, name, getter_op, setter_op, setter_arg_name='parameters',
                                 child_collection_prop_name=None, child_collection_key='name',
@@ -373,15 +395,20 @@ def _cli_generic_update_command(context, name, getter_op, setter_op, setter_arg_
         arguments['cmd'] = CLICommandArgument('cmd', arg_type=ignore_type)
         return [(k, v) for k, v in arguments.items()]
 
-    def _extract_handler_and_args(args, commmand_kwargs, op):
+    def _extract_handler_and_args(args, commmand_kwargs, op, client_cache=None):
         from azure.cli.core.commands.client_factory import resolve_client_arg_name
         factory = _get_client_factory(name, commmand_kwargs)
         client = None
         if factory:
-            try:
-                client = factory(context.cli_ctx)
-            except TypeError:
-                client = factory(context.cli_ctx, None)
+            if client_cache is not None and factory in client_cache:
+                client = client_cache[factory]
+            else:
+                try:
+                    client = factory(context.cli_ctx)
+                except TypeError:
+                    client = factory(context.cli_ctx, None)
+                if client_cache is not None:
+                    client_cache[factory] = client
 
         client_arg_name = resolve_client_arg_name(op, kwargs)
         op_handler = context.get_op_handler(op)
@@ -392,15 +419,19 @@ def _cli_generic_update_command(context, name, getter_op, setter_op, setter_arg_
             op_args[client_arg_name] = client
         return op_handler, op_args
 
-    def handler(args):  # pylint: disable=too-many-branches,too-many-statements
+    def _prepare_update(args, client_cache=None):  # pylint: disable=too-many-branches
+        """ Get the instance, apply the custom function and the ordered generic updates to it and return the
+        setter with its arguments, ready to be invoked. """
         cmd = args.get('cmd')
-        ordered_arguments = args.pop('ordered_arguments', [])
+        # copy the expressions as add/remove consume them and they are shared between exploded --ids
+        ordered_arguments = [(arg_type, list(arg_values))
+                             for arg_type, arg_values in args.pop('ordered_arguments', [])]
         for item in ['properties_to_add', 'properties_to_set', 'properties_to_remove']:
             if args[item]:
                 raise CLIError("Unexpected '{}' was not empty.".format(item))
             del args[item]
 
-        getter, getterargs = _extract_handler_and_args(args, cmd.command_kwargs, getter_op)
+        getter, getterargs = _extract_handler_and_args(args, cmd.command_kwargs, getter_op, client_cache)
         if child_collection_prop_name:
             parent = getter(**getterargs)
             instance = _get_child(
@@ -415,14 +446,15 @@ def _cli_generic_update_command(context, name, getter_op, setter_op, setter_arg_
 
         # pass instance to the custom_function, if provided
         if custom_function_op:
-            custom_function, custom_func_args = _extract_handler_and_args(args, cmd.command_kwargs, custom_function_op)
+            custom_function, custom_func_args = _extract_handler_and_args(args, cmd.command_kwargs,
+                                                                          custom_function_op, client_cache)
             if child_collection_prop_name:
                 parent = custom_function(instance=instance, parent=parent, **custom_func_args)
             else:
                 instance = custom_function(instance=instance, **custom_func_args)
 
         # apply generic updates after custom updates
-        setter, setterargs = _extract_handler_and_args(args, cmd.command_kwargs, setter_op)
+        setter, setterargs = _extract_handler_and_args(args, cmd.command_kwargs, setter_op, client_cache)
 
         for arg in ordered_arguments:
             arg_type, arg_values = arg
@@ -447,6 +479,7 @@ def _cli_generic_update_command(context, name, getter_op, setter_op, setter_arg_
         setterargs[setter_arg_name] = parent if child_collection_prop_name else instance
 
         # Handle no-wait
+        no_wait_enabled = False
         supports_no_wait = cmd.command_kwargs.get('supports_no_wait', None)
         if supports_no_wait:
             no_wait_enabled = args.get('no_wait', False)
@@ -457,19 +490,11 @@ def _cli_generic_update_command(context, name, getter_op, setter_op, setter_arg_
             no_wait_param = cmd.command_kwargs.get('no_wait_param', None)
             if no_wait_param:
                 setterargs[no_wait_param] = args[no_wait_param]
+                no_wait_enabled = setterargs[no_wait_param]
 
-        result = setter(**setterargs)
-
-        if supports_no_wait and no_wait_enabled:
-            return None
-        else:
-            no_wait_param = cmd.command_kwargs.get('no_wait_param', None)
-            if no_wait_param and setterargs.get(no_wait_param, None):
-                return None
-
-        if _is_poller(result):
-            result = LongRunningOperation(cmd.cli_ctx, 'Starting {}'.format(cmd.name))(result)
+        return setter, setterargs, no_wait_enabled
 
+    def _get_child_result(result, args):
         if child_collection_prop_name:
             result = _get_child(
                 result,
@@ -477,10 +502,83 @@ def _cli_generic_update_command(context, name, getter_op, setter_op, setter_arg_
                 args.get(child_arg_name),
                 child_collection_key
             )
-
         return result
 
-    context._cli_command(name, handler=handler, argument_loader=generic_update_arguments_loader, **kwargs)  # pylint: disable=protected-access
+    def handler(args):
+        cmd = args.get('cmd')
+        setter, setterargs, no_wait_enabled = _prepare_update(args)
+
+        result = setter(**setterargs)
+
+        if no_wait_enabled:
+            return None
+
+        if _is_poller(result):
+            result = LongRunningOperation(cmd.cli_ctx, 'Starting {}'.format(cmd.name))(result)
+
+        return _get_child_result(result, args)
+
+    def batch_handler(args_list):
+        """ Update many resources at once (e.g. multiple --ids). The GET, update and PUT of each resource run in a
+        bounded pool, then all the long-running operations are awaited together. Failures are reported per resource
+        once every update has completed, and the results of the resources that were updated are still output. """
+        from concurrent.futures import ThreadPoolExecutor
+        from azure.cli.core.commands import BatchCommandError
+
+        cmd = args_list[0].get('cmd')
+        id_arg_names = [k for k, v in cmd.arguments.items() if v.type.settings.get('id_part')]
+        labels = ['/'.join(str(args[k]) for k in id_arg_names if args.get(k)) for args in args_list]
+        client_cache = {}
+
+        def _start_update(args):
+            setter, setterargs, no_wait_enabled = _prepare_update(args, client_cache)
+            return setter(**setterargs), no_wait_enabled
+
+        # resolve the clients once up front so the workers share them
+        for op in [getter_op, setter_op] + ([custom_function_op] if custom_function_op else []):
+            _extract_handler_and_args(args_list[0], cmd.command_kwargs, op, client_cache)
+
+        outcomes = [None] * len(args_list)
+        with ThreadPoolExecutor(max_workers=min(GENERIC_UPDATE_BATCH_CONCURRENCY, len(args_list))) as executor:
+            futures = [executor.submit(_start_update, args) for args in args_list]
+            for index, future in enumerate(futures):
+                try:
+                    outcomes[index] = future.result()
+                except Exception as ex:  # pylint: disable=broad-except
+                    outcomes[index] = ex
+
+        pollers = [o[0] for o in outcomes if isinstance(o, tuple) and not o[1] and _is_poller(o[0])]
+        wait_for_pollers(cmd.cli_ctx, pollers, 'Running {} operations'.format(len(pollers)))
+
+        results, failures = [], []
+        for index, (label, args, outcome) in enumerate(zip(labels, args_list, outcomes)):
+            try:
+                if isinstance(outcome, Exception):
+                    raise outcome
+                result, no_wait_enabled = outcome
+                if no_wait_enabled:
+                    results.append(None)
+                    continue
+                if _is_poller(result):
+                    result = result.result()
+                results.append(_get_child_result(result, args))
+                logger.info("Updated '%s'", label)
+            except Exception as ex:  # pylint: disable=broad-except
+                logger.error("Failed to update '%s': %s", label, getattr(ex, 'message', ex))
+                results.append(None)
+                failures.append(index)
+
+        if failures:
+            succeeded = [label for index, label in enumerate(labels) if index not in failures]
+            raise BatchCommandError('{} of {} updates failed: {}. Updated: {}'.format(
+                len(failures), len(args_list), ', '.join(labels[i] for i in failures), ', '.join(succeeded) or 'none'),
+                results, failures)
+        return results
+
+    # the children of a parent are updated with a GET and PUT of the whole parent, updating them concurrently would
+    # lose all but the last change made to each parent
+    context._cli_command(name, handler=handler, argument_loader=generic_update_arguments_loader,  # pylint: disable=protected-access
+                         batch_handler=None if child_collection_prop_name else batch_handler, **kwargs)
 
 
 def _cli_generic_wait_command(context, name, getter_op, **kwargs):
@@ -610,10 +708,16 @@ def _cli_generic_wait_command(context, name, getter_op, **kwargs):
     context._cli_command(name, handler=handler, argument_loader=generic_wait_arguments_loader, **kwargs)  # pylint: disable=protected-access
 
 
+_jmespath_cache = {}
+
+
 def verify_property(instance, condition):
     from jmespath import compile as compile_jmespath
     result = todict(instance)
-    jmes_query = compile_jmespath(condition)
+    # wait loops verify the same condition on every poll, so compile it only once
+    jmes_query = _jmespath_cache.get(condition)
+    if jmes_query is None:
+        jmes_query = _jmespath_cache[condition] = compile_jmespath(condition)
     value = jmes_query.search(result)
     return value
 
@@ -625,27 +729,16 @@ def _split_key_value_pair(expression):
 
     def _find_split():
         """ Find the first = sign to split on (that isn't in [brackets])"""
-        key = []
-        value = []
         brackets = False
-        chars = list(expression)
-        while chars:
-            c = chars.pop(0)
+        for i, c in enumerate(expression):
             if c == '=' and not brackets:
                 # keys done the rest is value
-                value = chars
-                break
+                return expression[:i], expression[i + 1:]
             elif c == '[':
                 brackets = True
-                key += c
             elif c == ']' and brackets:
                 brackets = False
-                key += c
-            else:
-                # normal character
-                key += c
-
-        return ''.join(key), ''.join(value)
+        return expression, ''
 
     equals_count = expression.count('=')
     if equals_count == 1:
@@ -653,9 +746,18 @@ def _split_key_value_pair(expression):
     return _find_split()
 
 
-def set_properties(instance, expression):
-    key, value = _split_key_value_pair(expression)
+# Property expressions are compiled once and reused for every instance they are applied to, e.g. when updating
+# many resources with --ids or when evaluating the same --set for each poll.
+_set_expression_cache = {}
+
+
+def _compile_set_expression(expression):
+    try:
+        return _set_expression_cache[expression]
+    except KeyError:
+        pass
 
+    key, value = _split_key_value_pair(expression)
     try:
         value = shell_safe_json_parse(value)
     except:  # pylint:disable=bare-except
@@ -663,6 +765,16 @@ def set_properties(instance, expression):
 
     # name should be the raw casing as it could refer to a property OR a dictionary key
     name, path = _get_name_path(key)
+    compiled = _set_expression_cache[expression] = (key, value, name, tuple(path))
+    return compiled
+
+
+def set_properties(instance, expression):
+    key, value, name, path = _compile_set_expression(expression)
+    if isinstance(value, (dict, list)):
+        # the parsed value is cached, so every instance gets its own copy
+        value = deepcopy(value)
+
     parent_name = path[-1] if path else 'root'
     root = instance
     instance = _find_property(instance, path)
@@ -671,8 +783,8 @@ def set_properties(instance, expression):
         set_properties(parent, '{}={{}}'.format(parent_name))
         instance = _find_property(root, path)
 
-    match = index_or_filter_regex.match(name)
-    index_value = int(match.group(1)) if match else None
+    part = _get_path_part(name)
+    index_value = int(part.index) if part.is_index else None
     try:
         if index_value is not None:
             instance[index_value] = value
@@ -682,7 +794,7 @@ def set_properties(instance, expression):
             throw_and_show_options(instance, name, key.split('.'))
         else:
             # must be a property name
-            name = make_snake_case(name)
+            name = _resolve_attribute_name(instance, name)
             if not hasattr(instance, name):
                 logger.warning(
                     "Property '%s' not found on %s. Update may be ignored.", name, parent_name)
@@ -748,8 +860,9 @@ def remove_properties(instance, argument_values):
         parent_to_remove_from = _find_property(instance, list_attribute_path[:-1])
         if isinstance(parent_to_remove_from, dict):
             del parent_to_remove_from[list_attribute_path[-1]]
-        elif hasattr(parent_to_remove_from, make_snake_case(list_attribute_path[-1])):
-            setattr(parent_to_remove_from, make_snake_case(list_attribute_path[-1]), None)
+        elif hasattr(parent_to_remove_from, _resolve_attribute_name(parent_to_remove_from, list_attribute_path[-1])):
+            setattr(parent_to_remove_from, _resolve_attribute_name(parent_to_remove_from, list_attribute_path[-1]),
+                    None)
         else:
             raise ValueError
     else:
@@ -779,12 +892,17 @@ def throw_and_show_options(instance, part, path):
 
 snake_regex_1 = re.compile('(.)([A-Z][a-z]+)')
 snake_regex_2 = re.compile('([a-z0-9])([A-Z])')
+_snake_case_cache = {}
 
 
 def make_snake_case(s):
     if isinstance(s, str):
-        s1 = re.sub(snake_regex_1, r'\1_\2', s)
-        return re.sub(snake_regex_2, r'\1_\2', s1).lower()
+        try:
+            return _snake_case_cache[s]
+        except KeyError:
+            s1 = re.sub(snake_regex_1, r'\1_\2', s)
+            result = _snake_case_cache[s] = re.sub(snake_regex_2, r'\1_\2', s1).lower()
+            return result
     return s
 
 
@@ -795,19 +913,48 @@ def make_camel_case(s):
     return s
 
 
+_attribute_name_cache = {}
+
+
+def _resolve_attribute_name(instance, part):
+    """ Resolve a path segment (e.g. 'ipConfigurations' or 'ip_configurations') to the attribute name on the
+    instance. Resolutions are cached per model class. """
+    key = (type(instance), part)
+    try:
+        return _attribute_name_cache[key]
+    except KeyError:
+        pass
+
+    name = make_snake_case(part)
+    attribute_map = getattr(type(instance), '_attribute_map', None)
+    if attribute_map and name not in attribute_map:
+        # fall back to the REST name of the property, for names the snake casing doesn't reproduce
+        name = next((attr for attr, info in attribute_map.items()
+                     if info.get('key', '').split('.')[-1] == part), name)
+    _attribute_name_cache[key] = name
+    return name
+
+
 internal_path_regex = re.compile(r'(\[.*?\])|([^.]+)')
+_internal_path_cache = {}
 
 
 def _get_internal_path(path):
+    try:
+        # callers consume the list, so hand out a copy of the cached result
+        return list(_internal_path_cache[path])
+    except KeyError:
+        pass
     # to handle indexing in the same way as other dot qualifiers,
     # we split paths like foo[0][1] into foo.[0].[1]
-    path = path.replace('.[', '[').replace('[', '.[')
-    path_segment_pairs = internal_path_regex.findall(path)
+    split_path = path.replace('.[', '[').replace('[', '.[')
+    path_segment_pairs = internal_path_regex.findall(split_path)
     final_paths = []
     for regex_result in path_segment_pairs:
         # the regex matches two capture group, one of which will be None
         segment = regex_result[0] or regex_result[1]
         final_paths.append(segment)
+    _internal_path_cache[path] = tuple(final_paths)
     return final_paths
 
 
@@ -816,25 +963,52 @@ def _get_name_path(path):
     return pathlist.pop(), pathlist
 
 
-def _update_instance(instance, part, path):
-    try:
-        index = index_or_filter_regex.match(part)
-        if index and not isinstance(instance, list):
-            throw_and_show_options(instance, part, path)
+class _PathPart(object):  # pylint: disable=too-few-public-methods
+    """ A single segment of a property path, e.g. 'name', '[0]' or '[key=value]'. """
+    __slots__ = ['raw', 'is_index', 'index', 'filter_key', 'filter_value']
 
-        if index and '=' in index.group(1):
-            key, value = index.group(1).split('=', 1)
+    def __init__(self, raw):
+        self.raw = raw
+        self.index = self.filter_key = self.filter_value = None
+        match = index_or_filter_regex.match(raw)
+        self.is_index = bool(match)
+        if match:
+            self.index = match.group(1)
+        if match and '=' in match.group(1):
+            self.filter_key, value = match.group(1).split('=', 1)
             try:
                 value = shell_safe_json_parse(value)
             except:  # pylint: disable=bare-except
                 pass
+            self.filter_value = value
+
+
+_path_part_cache = {}
+
+
+def _get_path_part(raw):
+    try:
+        return _path_part_cache[raw]
+    except KeyError:
+        part = _path_part_cache[raw] = _PathPart(raw)
+        return part
+
+
+def _update_instance(instance, part, path):
+    compiled = _get_path_part(part)
+    try:
+        if compiled.is_index and not isinstance(instance, list):
+            throw_and_show_options(instance, part, path)
+
+        if compiled.filter_key is not None:
+            key, value = compiled.filter_key, compiled.filter_value
             matches = []
             for x in instance:
                 if isinstance(x, dict) and x.get(key, None) == value:
                     matches.append(x)
                 elif not isinstance(x, dict):
-                    key = make_snake_case(key)
-                    if hasattr(x, key) and getattr(x, key, None) == value:
+                    attr_name = _resolve_attribute_name(x, key)
+                    if hasattr(x, attr_name) and getattr(x, attr_name, None) == value:
                         matches.append(x)
 
             if len(matches) == 1:
@@ -845,9 +1019,9 @@ def _update_instance(instance, part, path):
             else:
                 raise CLIError("item with value '{}' doesn\'t exist for key '{}' on {}".format(value, key, path[-2]))
 
-        if index:
+        if compiled.is_index:
             try:
-                index_value = int(index.group(1))
+                index_value = int(compiled.index)
                 return instance[index_value]
             except IndexError:
                 raise CLIError('index {} doesn\'t exist on {}'.format(index_value, path[-2]))
@@ -855,7 +1029,7 @@ def _update_instance(instance, part, path):
         if isinstance(instance, dict):
             return instance[part]
 
-        return getattr(instance, make_snake_case(part))
+        return getattr(instance, _resolve_attribute_name(instance, part))
     except (AttributeError, KeyError):
         throw_and_show_options(instance, part, path)
 
@@ -68,6 +68,7 @@ def get_subscription_service_client(cli_ctx):
 
 
 def configure_common_settings(cli_ctx, client):
+    from azure.cli.core._read_cache import configure_read_cache
     client = _debug.change_ssl_cert_verification(client)
 
     client.config.enable_http_logger = True
@@ -95,6 +96,8 @@ def configure_common_settings(cli_ctx, client):
                               "{}{}".format(cli_ctx.data['command'], command_name_suffix))
     client.config.generate_client_request_id = 'x-ms-client-request-id' not in cli_ctx.data['headers']
 
+    configure_read_cache(cli_ctx, client)
+
 
 def _get_mgmt_service_client(cli_ctx,
                              client_type,
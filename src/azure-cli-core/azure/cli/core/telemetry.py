@@ -227,8 +227,7 @@ def flush():
 
     payload = _session.generate_payload()
     if payload:
-
-        subprocess.Popen([sys.executable, os.path.realpath(telemetry_core.__file__), payload])
+        _spool_payload(payload)
 
     # reset session fields, retaining correlation id and application
     _session.__init__(correlation_id=_session.correlation_id, application=_session.application)
@@ -241,7 +240,7 @@ def conclude():
 
     payload = _session.generate_payload()
     if payload:
-        subprocess.Popen([sys.executable, os.path.realpath(telemetry_core.__file__), payload])
+        _spool_payload(payload)
 
 
 @decorators.suppress_all_exceptions(raise_in_diagnostics=True)
@@ -357,6 +356,13 @@ def _add_event(event_name, properties, instrumentation_key=DEFAULT_INSTRUMENTATI
     })
 
 
+def _spool_payload(payload):
+    # Payloads are spooled to disk and uploaded in batches by a single background process, rather
+    # than starting a new interpreter for every command.
+    if telemetry_core.spool_payload(payload) or telemetry_core.in_diagnostic_mode():
+        subprocess.Popen([sys.executable, os.path.realpath(telemetry_core.__file__)])
+
+
 # definitions
 
 @decorators.call_once
@@ -15,6 +15,8 @@ except ImportError:
 import os
 import sys
 import json
+import time
+from collections import defaultdict
 import six
 
 from applicationinsights import TelemetryClient
@@ -22,9 +24,20 @@ from applicationinsights.exceptions import enable
 from applicationinsights.channel import SynchronousSender, SynchronousQueue, TelemetryChannel
 
 import azure.cli.core.decorators as decorators
+from azure.cli.core.util import file_lock
 
 DIAGNOSTICS_TELEMETRY_ENV_NAME = 'AZURE_CLI_DIAGNOSTICS_TELEMETRY'
 
+SPOOL_FILE_NAME = 'telemetry.spool'
+SPOOL_LOCK_FILE_NAME = 'telemetry.spool.lock'
+UPLOAD_LOCK_FILE_NAME = 'telemetry.upload.lock'
+# the background uploader is only started once the spool holds this many payloads ...
+SPOOL_UPLOAD_THRESHOLD = 20
+# ... or its oldest payload is older than this many seconds
+SPOOL_UPLOAD_INTERVAL = 60 * 60
+# once the spool grows past this size the oldest payloads are dropped
+SPOOL_SIZE_CAP = 5 * 1024 * 1024
+
 
 class LimitedRetrySender(SynchronousSender):
     def __init__(self):
@@ -64,18 +77,128 @@ def in_diagnostic_mode():
     return bool(os.environ.get(DIAGNOSTICS_TELEMETRY_ENV_NAME, False))
 
 
+def _get_spool_dir():
+    from azure.cli.core._environment import get_config_dir
+    return get_config_dir()
+
+
+def _trim_spool(spool_path, incoming_size):
+    """ Keep the spool under SPOOL_SIZE_CAP by dropping the oldest payloads. Caller holds the spool lock. """
+    try:
+        if os.path.getsize(spool_path) + incoming_size <= SPOOL_SIZE_CAP:
+            return
+    except OSError:
+        return
+
+    with open(spool_path, 'r') as f:
+        lines = f.readlines()
+
+    kept, size = [], incoming_size
+    for line in reversed(lines):
+        size += len(line)
+        if size > SPOOL_SIZE_CAP // 2:
+            break
+        kept.append(line)
+
+    with open(spool_path, 'w') as f:
+        f.writelines(reversed(kept))
+
+
+def spool_payload(payload, spool_dir=None):
+    """
+    Append a telemetry payload to the spool file. Returns True when the spool has grown past the
+    upload threshold (by count or age) and the caller should start the background uploader.
+    """
+    spool_dir = spool_dir or _get_spool_dir()
+    if not os.path.isdir(spool_dir):
+        os.makedirs(spool_dir)
+    spool_path = os.path.join(spool_dir, SPOOL_FILE_NAME)
+    now = time.time()
+    line = json.dumps({'time': now, 'payload': payload}) + '\n'
+
+    with file_lock(os.path.join(spool_dir, SPOOL_LOCK_FILE_NAME)):
+        _trim_spool(spool_path, len(line))
+        with open(spool_path, 'a+') as f:
+            f.write(line)
+            f.seek(0)
+            count = 0
+            oldest = now
+            for count, record in enumerate(f, 1):
+                if count == 1:
+                    try:
+                        oldest = json.loads(record)['time']
+                    except (ValueError, KeyError, TypeError):
+                        pass
+
+    return count >= SPOOL_UPLOAD_THRESHOLD or now - oldest >= SPOOL_UPLOAD_INTERVAL
+
+
+def drain_spool(spool_dir=None):
+    """ Remove and return all the payloads currently held in the spool. """
+    spool_dir = spool_dir or _get_spool_dir()
+    spool_path = os.path.join(spool_dir, SPOOL_FILE_NAME)
+    if not os.path.isfile(spool_path):
+        return []
+
+    with file_lock(os.path.join(spool_dir, SPOOL_LOCK_FILE_NAME)):
+        with open(spool_path, 'r+') as f:
+            lines = f.readlines()
+            f.seek(0)
+            f.truncate()
+
+    payloads = []
+    for line in lines:
+        try:
+            payloads.append(json.loads(line)['payload'])
+        except (ValueError, KeyError, TypeError):
+            continue
+    return payloads
+
+
+@decorators.suppress_all_exceptions(raise_in_diagnostics=True)
+def upload_spool(spool_dir=None):
+    """
+    Upload every spooled payload in one batch. Only one uploader runs at a time, others bail out
+    immediately and leave the spool to the running one.
+    """
+    spool_dir = spool_dir or _get_spool_dir()
+    try:
+        with file_lock(os.path.join(spool_dir, UPLOAD_LOCK_FILE_NAME), blocking=False):
+            payloads = drain_spool(spool_dir)
+            if payloads:
+                upload(payloads)
+    except (IOError, OSError):
+        if in_diagnostic_mode():
+            sys.stdout.write('Telemetry upload is already in progress\n')
+
+
+def _merge_payloads(payloads):
+    merged = defaultdict(list)
+    for payload in payloads:
+        if isinstance(payload, six.string_types):
+            try:
+                payload = json.loads(payload.replace("'", '"'))
+            except Exception as err:  # pylint: disable=broad-except
+                if in_diagnostic_mode():
+                    sys.stdout.write('ERROR: {}/n'.format(str(err)))
+                    sys.stdout.write('Raw [{}]/n'.format(payload))
+                continue
+        for instrumentation_key, records in payload.items():
+            merged[instrumentation_key].extend(records)
+    return merged
+
+
 @decorators.suppress_all_exceptions(raise_in_diagnostics=True)
 def upload(data_to_save):
+    """ Upload telemetry. data_to_save is a single payload or a list of payloads, each of which maps
+    an instrumentation key to its records and may be given either as a dict or as a JSON string. """
+    if not isinstance(data_to_save, list):
+        data_to_save = [data_to_save]
+    data_to_save = _merge_payloads(data_to_save)
+
     if in_diagnostic_mode():
         sys.stdout.write('Telemetry upload begins\n')
-        sys.stdout.write('Got data {}\n'.format(json.dumps(json.loads(data_to_save), indent=2)))
-
-    try:
-        data_to_save = json.loads(data_to_save.replace("'", '"'))
-    except Exception as err:  # pylint: disable=broad-except
-        if in_diagnostic_mode():
-            sys.stdout.write('ERROR: {}/n'.format(str(err)))
-            sys.stdout.write('Raw [{}]/n'.format(data_to_save))
+        sys.stdout.write('Got data {}\n'.format(json.dumps(data_to_save, indent=2)))
 
     for instrumentation_key in data_to_save:
         client = TelemetryClient(instrumentation_key=instrumentation_key,
@@ -108,4 +231,7 @@ def upload(data_to_save):
 if __name__ == '__main__':
     # If user doesn't agree to upload telemetry, this scripts won't be executed. The caller should control.
     decorators.is_diagnostics_mode = in_diagnostic_mode
-    upload(sys.argv[1])
+    if len(sys.argv) > 1:
+        upload(sys.argv[1])
+    else:
+        upload_spool()
@@ -3,6 +3,7 @@
 # Licensed under the MIT License. See License.txt in the project root for license information.
 # --------------------------------------------------------------------------------------------
 
+import json
 import logging
 import unittest
 import shlex
@@ -13,6 +14,7 @@ from azure.cli.core import AzCommandsLoader
 from azure.cli.testsdk import TestCli
 
 from knack.util import CLIError
+from six import StringIO
 
 
 class ListTestObject(object):
@@ -300,6 +302,128 @@ class GenericUpdateTest(unittest.TestCase):
         self.assertEqual(my_obj.empty_dict['dict3']['g'], 'h', 'verify object added to empty dict')
         self.assertEqual(len(my_obj.empty_dict['dict3']), 1, 'verify only one object added to empty dict')
 
+    def test_generic_update_compiled_expressions(self):
+        from azure.cli.core.commands.arm import set_properties, add_properties, remove_properties
+
+        first, second = TestObject(), TestObject()
+        for obj in [first, second]:
+            set_properties(obj, 'myDict={"a": {"b": 1}}')
+            set_properties(obj, 'myListOfObjects[myString=myKeyA].myInt=30')
+            add_properties(obj, ['myList', 'c=d'])
+            remove_properties(obj, ['myList', '0'])
+
+        first.my_dict['a']['b'] = 2
+        self.assertEqual(second.my_dict, {'a': {'b': 1}}, 'cached values must not be shared between instances')
+        for obj in [first, second]:
+            self.assertEqual(obj.my_list_of_objects[0].my_int, 30)
+            self.assertEqual(obj.my_list[-1], {'c': 'd'})
+            self.assertEqual(len(obj.my_list), 4)
+
+    def test_generic_update_multiple_ids(self):
+        updated = {}
+
+        class GenericUpdateIdsTestCommandsLoader(AzCommandsLoader):
+
+            def load_command_table(self, args):
+                super(GenericUpdateIdsTestCommandsLoader, self).load_command_table(args)
+
+                from azure.cli.core.commands import CliCommandType
+
+                def my_get_by_name(resource_group_name, name):
+                    return TestObject()
+
+                def my_set_by_name(resource_group_name, name, parameters):
+                    if name == 'bad':
+                        raise CLIError('update rejected')
+                    updated[name] = parameters
+                    return parameters
+
+                test_type = CliCommandType(operations_tmpl='{}#{{}}'.format(__name__))
+                setattr(sys.modules[__name__], my_get_by_name.__name__, my_get_by_name)
+                setattr(sys.modules[__name__], my_set_by_name.__name__, my_set_by_name)
+                with self.command_group('', test_type) as g:
+                    g.generic_update_command('genupdate', getter_name='my_get_by_name', setter_name='my_set_by_name')
+
+                return self.command_table
+
+            def load_arguments(self, command):
+                with self.argument_context('genupdate') as c:
+                    c.argument('resource_group_name', options_list=['--resource-group', '-g'], id_part='resource_group')
+                    c.argument('name', options_list=['--name', '-n'], id_part='name')
+                super(GenericUpdateIdsTestCommandsLoader, self).load_arguments(command)
+
+        cli = TestCli(commands_loader_cls=GenericUpdateIdsTestCommandsLoader)
+        id_template = '/subscriptions/sub/resourceGroups/rg/providers/Microsoft.Test/tests/{}'
+        names = ['res{}'.format(i) for i in range(15)]
+
+        exit_code = cli.invoke(['genupdate', '--set', 'myProp=newValue', '--add', 'emptyList', 'a', '--ids'] +
+                               [id_template.format(n) for n in names])
+        self.assertEqual(exit_code, 0)
+        self.assertEqual(sorted(updated), sorted(names))
+        for obj in updated.values():
+            self.assertEqual(obj.my_prop, 'newValue')
+            self.assertEqual(obj.empty_list, ['a'], 'each resource gets its own copy of the --add values')
+
+        updated.clear()
+        cli.out_file = StringIO()
+        exit_code = cli.invoke(['genupdate', '--set', 'myProp=otherValue', '--ids'] +
+                               [id_template.format(n) for n in ['res1', 'bad', 'res2']])
+        self.assertNotEqual(exit_code, 0)
+        self.assertEqual(sorted(updated), ['res1', 'res2'])
+        # the resources which were updated are still output
+        output = json.loads(cli.out_file.getvalue())
+        self.assertEqual([o['myProp'] for o in output], ['otherValue', 'otherValue'])
+
+    def test_generic_update_multiple_child_ids(self):
+        import copy
+        import time
+        parents = {'lb1': ListTestObject([ObjectTestObject('r1', 4, True), ObjectTestObject('r2', 4, True)])}
+
+        class GenericUpdateChildIdsTestCommandsLoader(AzCommandsLoader):
+
+            def load_command_table(self, args):
+                super(GenericUpdateChildIdsTestCommandsLoader, self).load_command_table(args)
+
+                from azure.cli.core.commands import CliCommandType
+
+                def my_get_parent(resource_group_name, name):
+                    parent = copy.deepcopy(parents[name])
+                    time.sleep(0.1)  # let concurrent updates of the children read the same parent
+                    return parent
+
+                def my_set_parent(resource_group_name, name, parameters):
+                    parents[name] = copy.deepcopy(parameters)
+                    return parameters
+
+                def my_update_child(instance, parent, item_name):
+                    return parent
+
+                test_type = CliCommandType(operations_tmpl='{}#{{}}'.format(__name__))
+                setattr(sys.modules[__name__], my_get_parent.__name__, my_get_parent)
+                setattr(sys.modules[__name__], my_set_parent.__name__, my_set_parent)
+                setattr(sys.modules[__name__], my_update_child.__name__, my_update_child)
+                with self.command_group('', test_type) as g:
+                    g.generic_update_command('genupdate', getter_name='my_get_parent', setter_name='my_set_parent',
+                                             custom_func_name='my_update_child', custom_func_type=test_type,
+                                             child_collection_prop_name='list_value',
+                                             child_collection_key='my_string')
+
+                return self.command_table
+
+            def load_arguments(self, command):
+                with self.argument_context('genupdate') as c:
+                    c.argument('resource_group_name', options_list=['--resource-group', '-g'], id_part='resource_group')
+                    c.argument('name', options_list=['--name', '-n'], id_part='name')
+                    c.argument('item_name', options_list=['--item-name'], id_part='child_name_1')
+                super(GenericUpdateChildIdsTestCommandsLoader, self).load_arguments(command)
+
+        cli = TestCli(commands_loader_cls=GenericUpdateChildIdsTestCommandsLoader)
+        id_template = '/subscriptions/sub/resourceGroups/rg/providers/Microsoft.Test/tests/lb1/children/{}'
+        exit_code = cli.invoke(['genupdate', '--set', 'myInt=10', '--ids'] +
+                               [id_template.format(n) for n in ['r1', 'r2']])
+        self.assertEqual(exit_code, 0)
+        self.assertEqual([c.my_int for c in parents['lb1'].list_value], [10, 10], 'no update of a child is lost')
+
 
 if __name__ == '__main__':
     unittest.main()
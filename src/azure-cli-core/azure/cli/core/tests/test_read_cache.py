@@ -0,0 +1,153 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+import shutil
+import tempfile
+import unittest
+
+import mock
+from requests import Response
+
+from azure.cli.core._read_cache import configure_read_cache, get_read_cache_ttl
+
+VNET_URL = ('https://management.azure.com/subscriptions/sub1/resourceGroups/rg1/providers/'
+            'Microsoft.Network/virtualNetworks/vnet1?api-version=2018-02-01')
+VNET_LIST_URL = ('https://management.azure.com/subscriptions/sub1/resourceGroups/rg1/providers/'
+                 'Microsoft.Network/virtualNetworks?api-version=2018-02-01')
+SUB_VNET_LIST_URL = ('https://management.azure.com/subscriptions/sub1/providers/'
+                     'Microsoft.Network/virtualNetworks?api-version=2018-02-01')
+VM_LIST_URL = ('https://management.azure.com/subscriptions/sub1/providers/'
+               'Microsoft.Compute/virtualMachines?api-version=2017-12-01')
+DEPLOYMENT_URL = ('https://management.azure.com/subscriptions/sub1/resourcegroups/rg1/providers/'
+                  'Microsoft.Resources/deployments/vm_deploy?api-version=2017-05-10')
+
+
+def _response(url, status_code=200, content=b'{"name": "vnet1"}', etag='"1"'):
+    response = Response()
+    response.status_code = status_code
+    response.url = url
+    response.encoding = 'utf-8'
+    response._content = content
+    if etag:
+        response.headers['ETag'] = etag
+    return response
+
+
+class TestReadCache(unittest.TestCase):
+
+    def setUp(self):
+        self.config_dir = tempfile.mkdtemp()
+        self.cli_ctx = mock.MagicMock()
+        self.cli_ctx.config.config_dir = self.config_dir
+        self.cli_ctx.config.getint.return_value = 0
+        self.cli_ctx.data = {'command': 'network vnet show', 'read_cache_ttl': 60}
+
+    def tearDown(self):
+        shutil.rmtree(self.config_dir, ignore_errors=True)
+
+    def _client(self, responses):
+        client = mock.MagicMock()
+        client.config.subscription_id = 'sub1'
+        client._client.send.side_effect = responses
+        send = client._client.send
+        configure_read_cache(self.cli_ctx, client)
+        return client, send
+
+    @staticmethod
+    def _request(url, method='GET'):
+        request = mock.MagicMock()
+        request.url = url
+        request.method = method
+        return request
+
+    def test_read_cache_ttl_only_for_show_and_list(self):
+        self.assertEqual(get_read_cache_ttl(self.cli_ctx), 60)
+        self.cli_ctx.data['command'] = 'vm list-sizes'
+        self.assertEqual(get_read_cache_ttl(self.cli_ctx), 60)
+        self.cli_ctx.data['command'] = 'network vnet update'
+        self.assertEqual(get_read_cache_ttl(self.cli_ctx), 0)
+        self.cli_ctx.data.update({'command': 'group show', 'read_cache_ttl': None})
+        self.cli_ctx.config.getint.return_value = 30
+        self.assertEqual(get_read_cache_ttl(self.cli_ctx), 30)
+
+    def test_read_cache_serves_within_ttl(self):
+        client, send = self._client([_response(VNET_URL)])
+        first = client._client.send(self._request(VNET_URL), {})
+        second = client._client.send(self._request(VNET_URL), {})
+        self.assertEqual(send.call_count, 1)
+        self.assertEqual(first.content, second.content)
+        self.assertEqual(second.headers['etag'], '"1"')
+        self.assertEqual(second.json(), {'name': 'vnet1'})
+
+    def test_read_cache_revalidates_with_etag(self):
+        client, send = self._client([_response(VNET_URL), _response(VNET_URL, status_code=304, content=b'')])
+        client._client.send(self._request(VNET_URL), {})
+        with mock.patch('time.time', return_value=10 ** 10):
+            result = client._client.send(self._request(VNET_URL), {})
+        self.assertEqual(send.call_count, 2)
+        self.assertEqual(send.call_args[0][1], {'If-None-Match': '"1"'})
+        self.assertEqual(result.status_code, 200)
+        self.assertEqual(result.json(), {'name': 'vnet1'})
+
+    def test_read_cache_invalidated_by_mutation(self):
+        client, send = self._client([_response(VNET_URL), _response(VNET_LIST_URL, content=b'[]'),
+                                     _response(VNET_URL, status_code=202),
+                                     _response(VNET_URL), _response(VNET_LIST_URL, content=b'[]')])
+        client._client.send(self._request(VNET_URL), {})
+        client._client.send(self._request(VNET_LIST_URL), {})
+        client._client.send(self._request(VNET_URL, method='DELETE'), {})
+        client._client.send(self._request(VNET_URL), {})
+        client._client.send(self._request(VNET_LIST_URL), {})
+        self.assertEqual(send.call_count, 5)
+
+    def test_read_cache_invalidated_across_scopes(self):
+        client, send = self._client([_response(SUB_VNET_LIST_URL, content=b'[]'), _response(VM_LIST_URL),
+                                     _response(VNET_URL, status_code=202),
+                                     _response(SUB_VNET_LIST_URL, content=b'[]'),
+                                     _response(DEPLOYMENT_URL, status_code=201),
+                                     _response(VM_LIST_URL)])
+        client._client.send(self._request(SUB_VNET_LIST_URL), {})
+        client._client.send(self._request(VM_LIST_URL), {})
+        # a vnet written in a resource group makes the subscription wide vnet list stale, not the VM list
+        client._client.send(self._request(VNET_URL, method='PUT'), {})
+        client._client.send(self._request(SUB_VNET_LIST_URL), {})
+        client._client.send(self._request(VM_LIST_URL), {})
+        self.assertEqual(send.call_count, 4)
+        # a deployment can create anything in the subscription
+        client._client.send(self._request(DEPLOYMENT_URL, method='PUT'), {})
+        client._client.send(self._request(VM_LIST_URL), {})
+        self.assertEqual(send.call_count, 6)
+
+    def test_read_cache_only_serves_indexed_entries(self):
+        import os
+        from azure.cli.core._read_cache import READ_CACHE_DIR_NAME, READ_CACHE_INDEX_FILE_NAME
+        client, send = self._client([_response(VNET_URL), _response(VNET_URL), _response(VNET_URL, status_code=202),
+                                     _response(VNET_URL)])
+        client._client.send(self._request(VNET_URL), {})
+        cache_dir = os.path.join(self.config_dir, READ_CACHE_DIR_NAME)
+        index_path = os.path.join(cache_dir, READ_CACHE_INDEX_FILE_NAME)
+        with open(index_path, 'w') as f:
+            f.write('{}')
+        client._client.send(self._request(VNET_URL), {})
+        self.assertEqual(send.call_count, 2)
+
+        # a damaged index drops the entries along with it
+        with open(index_path, 'w') as f:
+            f.write('{"trunc')
+        client._client.send(self._request(VNET_URL, method='DELETE'), {})
+        self.assertEqual([n for n in os.listdir(cache_dir) if n.endswith('.json')], [])
+        client._client.send(self._request(VNET_URL), {})
+        self.assertEqual(send.call_count, 4)
+
+    def test_read_cache_disabled(self):
+        self.cli_ctx.data['read_cache_ttl'] = 0
+        client, send = self._client([_response(VNET_URL), _response(VNET_URL)])
+        client._client.send(self._request(VNET_URL), {})
+        client._client.send(self._request(VNET_URL), {})
+        self.assertEqual(send.call_count, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -27,3 +27,65 @@ class TestCoreTelemetry(unittest.TestCase):
             self.assertEqual(_error_fn(), 'positive result')
         else:
             self.assertEqual(_error_fn(), fallback_return)
+
+
+class TestTelemetrySpool(unittest.TestCase):
+    def setUp(self):
+        import tempfile
+        self.spool_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        import shutil
+        shutil.rmtree(self.spool_dir, ignore_errors=True)
+
+    @staticmethod
+    def _payload(name):
+        import json
+        return json.dumps({'key': [{'name': name, 'properties': {}}]})
+
+    def test_spool_payload_upload_threshold(self):
+        import azure.cli.core.telemetry_upload as telemetry_upload
+
+        for i in range(telemetry_upload.SPOOL_UPLOAD_THRESHOLD - 1):
+            self.assertFalse(telemetry_upload.spool_payload(self._payload(str(i)), self.spool_dir))
+        self.assertTrue(telemetry_upload.spool_payload(self._payload('last'), self.spool_dir))
+
+        payloads = telemetry_upload.drain_spool(self.spool_dir)
+        self.assertEqual(len(payloads), telemetry_upload.SPOOL_UPLOAD_THRESHOLD)
+        self.assertEqual(payloads[-1], self._payload('last'))
+        self.assertEqual(telemetry_upload.drain_spool(self.spool_dir), [])
+
+    def test_spool_payload_upload_interval(self):
+        import mock
+        import time
+        import azure.cli.core.telemetry_upload as telemetry_upload
+
+        self.assertFalse(telemetry_upload.spool_payload(self._payload('first'), self.spool_dir))
+        later = time.time() + telemetry_upload.SPOOL_UPLOAD_INTERVAL + 1
+        with mock.patch('time.time', return_value=later):
+            self.assertTrue(telemetry_upload.spool_payload(self._payload('second'), self.spool_dir))
+
+    def test_spool_size_cap(self):
+        import mock
+        import azure.cli.core.telemetry_upload as telemetry_upload
+
+        with mock.patch.object(telemetry_upload, 'SPOOL_SIZE_CAP', 1024):
+            for i in range(50):
+                telemetry_upload.spool_payload(self._payload(str(i)), self.spool_dir)
+        payloads = telemetry_upload.drain_spool(self.spool_dir)
+        self.assertLess(len(payloads), 50)
+        self.assertEqual(payloads[-1], self._payload('49'))
+
+    def test_upload_merges_payloads(self):
+        import mock
+        import azure.cli.core.telemetry_upload as telemetry_upload
+
+        for i in range(3):
+            telemetry_upload.spool_payload(self._payload(str(i)), self.spool_dir)
+
+        with mock.patch('azure.cli.core.telemetry_upload.TelemetryClient') as client_type:
+            telemetry_upload.upload_spool(self.spool_dir)
+        self.assertEqual(client_type.call_count, 1)
+        self.assertEqual([c[0][0] for c in client_type.return_value.track_event.call_args_list], ['0', '1', '2'])
+        client_type.return_value.flush.assert_called_once_with()
+        self.assertEqual(telemetry_upload.drain_spool(self.spool_dir), [])
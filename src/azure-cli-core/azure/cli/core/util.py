@@ -4,10 +4,12 @@
 # --------------------------------------------------------------------------------------------
 
 from __future__ import print_function
+import os
 import sys
 import json
 import base64
 import binascii
+from contextlib import contextmanager
 import six
 
 from knack.log import get_logger
@@ -252,3 +254,52 @@ def sdk_no_wait(no_wait, func, *args, **kwargs):
     if no_wait:
         kwargs.update({'raw': True, 'polling': False})
     return func(*args, **kwargs)
+
+
+@contextmanager
+def file_lock(path, blocking=True):
+    """
+    Hold an exclusive lock on the given lock file for the duration of the block. When blocking is
+    False and the lock is held elsewhere, an IOError/OSError is raised immediately.
+    """
+    with open(path, 'a') as lock_file:
+        if os.name == 'nt':
+            import msvcrt
+            lock_file.seek(0)
+            msvcrt.locking(lock_file.fileno(), msvcrt.LK_LOCK if blocking else msvcrt.LK_NBLCK, 1)
+            try:
+                yield
+            finally:
+                lock_file.seek(0)
+                msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+        else:
+            import fcntl
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX if blocking else fcntl.LOCK_EX | fcntl.LOCK_NB)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+
+@contextmanager
+def open_atomic(path, encoding=None):
+    """
+    Open a temporary file next to the given path for writing, which replaces the file at the path
+    once the block completes. Readers see either the previous or the new content, never a partially
+    written file; when the block fails the previous file is left untouched.
+    """
+    import uuid
+    from codecs import open as codecs_open
+    temp_path = '{}.{}.tmp'.format(path, uuid.uuid4().hex)
+    try:
+        with (codecs_open(temp_path, 'w', encoding=encoding) if encoding else open(temp_path, 'w')) as f:
+            yield f
+        if hasattr(os, 'replace'):
+            os.replace(temp_path, path)  # pylint: disable=no-member
+        else:  # Python 2
+            if os.name == 'nt' and os.path.exists(path):
+                os.remove(path)
+            os.rename(temp_path, path)
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
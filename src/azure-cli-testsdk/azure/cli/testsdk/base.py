@@ -19,7 +19,7 @@ from azure_devtools.scenario_tests.const import MOCKED_SUBSCRIPTION_ID, ENV_SKIP
 
 from .patches import (patch_load_cached_subscriptions, patch_main_exception_handler,
                       patch_retrieve_token_for_user, patch_long_run_operation_delay,
-                      patch_progress_controller)
+                      patch_progress_controller, patch_validation_concurrency)
 from .exceptions import CliExecutionError
 from .utilities import find_recording_dir
 
@@ -103,6 +103,7 @@ class ScenarioTest(ReplayableTest, CheckerMixin, unittest.TestCase):
             patch_load_cached_subscriptions,
             patch_retrieve_token_for_user,
             patch_progress_controller,
+            patch_validation_concurrency,
         ]
 
         def _merge_lists(base, patches):
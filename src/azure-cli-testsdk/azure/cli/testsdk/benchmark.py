@@ -0,0 +1,247 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+"""
+Replay recorded scenario tests offline and measure the commands they run.
+
+Every HTTP request is served from the test's cassette and delayed by a simulated network latency, so
+the numbers are deterministic and only depend on the CLI code path. For each command the elapsed time,
+the peak Python allocations and how much the command raised the peak RSS of the process are recorded. The peak RSS
+only ever grows over the life of the process, so commands which run after a larger one show no growth; the process
+peak itself is recorded alongside. Results are written as JSON and can be compared against a previous run to catch
+regressions.
+
+    python -m azure.cli.testsdk.benchmark \\
+        azure.cli.command_modules.resource.tests.latest.test_resource.ResourceGroupScenarioTest \\
+        --latency-ms 50 --repeat 3 --output results.json --baseline previous.json
+"""
+
+from __future__ import print_function
+
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+import unittest
+from collections import OrderedDict
+from contextlib import contextmanager
+
+# The replay patches of ScenarioTest replace time.sleep, keep the real one for the simulated latency.
+_sleep = time.sleep
+
+DEFAULT_LATENCY_MS = 0
+DEFAULT_REPEAT = 1
+DEFAULT_THRESHOLD = 0.2
+
+
+def _peak_rss_kb():
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is reported in bytes on macOS and in kilobytes elsewhere
+    return peak // 1024 if sys.platform == 'darwin' else peak
+
+
+class BenchmarkRecorder(object):
+
+    def __init__(self, latency_ms=DEFAULT_LATENCY_MS, trace_allocations=True):
+        self.latency = latency_ms / 1000.0
+        self.trace_allocations = trace_allocations
+        self.samples = []
+        self.current_test = None
+        self._requests = 0
+
+    def _timed_send(self, original_send):
+        recorder = self
+
+        def _send(adapter, request, *args, **kwargs):
+            recorder._requests += 1
+            if recorder.latency:
+                _sleep(recorder.latency)
+            return original_send(adapter, request, *args, **kwargs)
+        return _send
+
+    def _timed_execute(self, original_execute):
+        recorder = self
+
+        def _execute(cli_ctx, command, expect_failure=False):
+            try:
+                import tracemalloc
+            except ImportError:  # Python 2
+                tracemalloc = None
+            tracing = recorder.trace_allocations and tracemalloc and not tracemalloc.is_tracing()
+            if tracing:
+                tracemalloc.start()
+            recorder._requests = 0
+            rss_before = _peak_rss_kb()
+            start = time.time()
+            try:
+                return original_execute(cli_ctx, command, expect_failure=expect_failure)
+            finally:
+                elapsed = time.time() - start
+                peak_alloc = None
+                if tracing:
+                    peak_alloc = tracemalloc.get_traced_memory()[1]
+                    tracemalloc.stop()
+                rss_after = _peak_rss_kb()
+                recorder.samples.append({
+                    'test': recorder.current_test,
+                    'command': command[3:] if command.startswith('az ') else command,
+                    'seconds': elapsed,
+                    'requests': recorder._requests,
+                    'peak_alloc_bytes': peak_alloc,
+                    'process_peak_rss_kb': rss_after,
+                    'rss_growth_kb': rss_after - rss_before if rss_after is not None else None
+                })
+        return _execute
+
+    @contextmanager
+    def patched(self):
+        import requests.adapters
+        import azure.cli.testsdk.base as base
+
+        original_send = requests.adapters.HTTPAdapter.send
+        original_execute = base.execute
+        requests.adapters.HTTPAdapter.send = self._timed_send(original_send)
+        base.execute = self._timed_execute(original_execute)
+        try:
+            yield self
+        finally:
+            requests.adapters.HTTPAdapter.send = original_send
+            base.execute = original_execute
+
+
+class _BenchmarkResult(unittest.TextTestResult):
+
+    recorder = None
+
+    def startTest(self, test):
+        self.recorder.current_test = test.id()
+        super(_BenchmarkResult, self).startTest(test)
+
+
+def _iter_tests(suite):
+    for test in suite:
+        if isinstance(test, unittest.TestSuite):
+            for t in _iter_tests(test):
+                yield t
+        else:
+            yield test
+
+
+def run_benchmark(test_names, latency_ms=DEFAULT_LATENCY_MS, repeat=DEFAULT_REPEAT, trace_allocations=True,
+                  stream=None):
+    """ Replay the given tests `repeat` times and return the aggregated per-command results. """
+    from azure.cli.testsdk import ScenarioTest
+
+    # never let a benchmark record against a live subscription
+    os.environ['AZURE_TEST_RUN_LIVE'] = 'False'
+
+    suite = unittest.defaultTestLoader.loadTestsFromNames(test_names)
+    for test in _iter_tests(suite):
+        if not isinstance(test, ScenarioTest):
+            raise ValueError('{} is not a recorded scenario test'.format(test.id()))
+
+    recorder = BenchmarkRecorder(latency_ms=latency_ms, trace_allocations=trace_allocations)
+    _BenchmarkResult.recorder = recorder
+    runner = unittest.TextTestRunner(stream=stream or sys.stderr, resultclass=_BenchmarkResult, verbosity=1)
+    failures = []
+    with recorder.patched():
+        for _ in range(repeat):
+            suite = unittest.defaultTestLoader.loadTestsFromNames(test_names)
+            result = runner.run(suite)
+            failures.extend(t.id() for t, _ in result.failures + result.errors)
+
+    return OrderedDict([
+        ('environment', OrderedDict([
+            ('python', platform.python_version()),
+            ('platform', platform.platform()),
+            ('latency_ms', latency_ms),
+            ('repeat', repeat)
+        ])),
+        ('failures', sorted(set(failures))),
+        ('commands', summarize(recorder.samples))
+    ])
+
+
+def summarize(samples):
+    """ Aggregate samples per (test, command), keeping the median time and the highest memory marks. """
+    grouped = OrderedDict()
+    for sample in samples:
+        grouped.setdefault('{} :: {}'.format(sample['test'], sample['command']), []).append(sample)
+
+    summary = OrderedDict()
+    for key, group in grouped.items():
+        times = sorted(s['seconds'] for s in group)
+        allocs = [s['peak_alloc_bytes'] for s in group if s['peak_alloc_bytes'] is not None]
+        rss = [s['process_peak_rss_kb'] for s in group if s['process_peak_rss_kb'] is not None]
+        growth = [s['rss_growth_kb'] for s in group if s['rss_growth_kb'] is not None]
+        summary[key] = OrderedDict([
+            ('runs', len(group)),
+            ('median_seconds', round(times[len(times) // 2], 6)),
+            ('min_seconds', round(times[0], 6)),
+            ('requests', group[-1]['requests']),
+            ('peak_alloc_bytes', max(allocs) if allocs else None),
+            ('rss_growth_kb', max(growth) if growth else None),
+            ('process_peak_rss_kb', max(rss) if rss else None)
+        ])
+    return summary
+
+
+def compare(results, baseline, threshold=DEFAULT_THRESHOLD):
+    """ Return a description for every command that got slower, or allocates more, by more than `threshold`. """
+    regressions = []
+    for key, current in results['commands'].items():
+        previous = baseline.get('commands', {}).get(key)
+        if not previous:
+            continue
+        for metric in ('median_seconds', 'peak_alloc_bytes'):
+            old, new = previous.get(metric), current.get(metric)
+            if old and new and (new - old) / float(old) > threshold:
+                regressions.append('{}: {} {} -> {} (+{:.0%})'.format(key, metric, old, new, (new - old) / float(old)))
+    return regressions
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(prog='python -m azure.cli.testsdk.benchmark',
+                                     description='Replay recorded scenario tests offline and measure each command.')
+    parser.add_argument('tests', nargs='+', help='Dotted names of test modules, classes or methods.')
+    parser.add_argument('--latency-ms', type=float, default=DEFAULT_LATENCY_MS,
+                        help='Simulated network latency added to every replayed request.')
+    parser.add_argument('--repeat', type=int, default=DEFAULT_REPEAT, help='Number of times to run the tests.')
+    parser.add_argument('--no-alloc', dest='trace_allocations', action='store_false',
+                        help='Do not trace Python allocations. Tracing slows down the commands being measured.')
+    parser.add_argument('--output', help='File to write the JSON results to.')
+    parser.add_argument('--baseline', help='Results of a previous run to compare against.')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help='Relative increase that counts as a regression. Default: %(default)s')
+    ns = parser.parse_args(args)
+
+    results = run_benchmark(ns.tests, latency_ms=ns.latency_ms, repeat=max(ns.repeat, 1),
+                            trace_allocations=ns.trace_allocations)
+    serialized = json.dumps(results, indent=2)
+    if ns.output:
+        with open(ns.output, 'w') as f:
+            f.write(serialized)
+    else:
+        print(serialized)
+
+    exit_code = 1 if results['failures'] else 0
+    if ns.baseline:
+        with open(ns.baseline, 'r') as f:
+            regressions = compare(results, json.load(f), ns.threshold)
+        for regression in regressions:
+            print('REGRESSION ' + regression, file=sys.stderr)
+        if regressions:
+            exit_code = 2
+    return exit_code
+
+
+if __name__ == '__main__':
+    sys.exit(main())
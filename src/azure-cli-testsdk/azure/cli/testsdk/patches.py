@@ -35,6 +35,16 @@ def patch_main_exception_handler(unit_test):
     mock_in_unit_test(unit_test, 'azure.cli.core.util.handle_exception', _handle_main_exception)
 
 
+def patch_validation_concurrency(unit_test):
+    # the vm/vmss create validation stages look resources up concurrently, replay their requests in a fixed order
+    import os
+    import mock
+
+    mp = mock.patch.dict(os.environ, {'AZURE_VM_VALIDATION_CONCURRENCY': '1'})
+    mp.start()
+    unit_test.addCleanup(mp.stop)
+
+
 def patch_load_cached_subscriptions(unit_test):
     def _handle_load_cached_subscription(*args, **kwargs):  # pylint: disable=unused-argument
 
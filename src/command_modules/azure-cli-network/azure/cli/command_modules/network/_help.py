@@ -94,6 +94,13 @@ helps['network application-gateway update'] = """
           text: |
             az network application-gateway update -g MyResourceGroup -n MyAppGateway \\
                 --capacity 3 --servers 10.0.0.4 10.0.0.5 10.0.0.6
+        - name: Stage several changes locally and apply them in a single update.
+          text: |
+            az network application-gateway frontend-port create -g MyResourceGroup --gateway-name MyAppGateway \\
+                -n MyFrontendPort --port 8080 --defer
+            az network application-gateway http-listener create -g MyResourceGroup --gateway-name MyAppGateway \\
+                -n MyListener --frontend-port MyFrontendPort --defer
+            az network application-gateway update -g MyResourceGroup -n MyAppGateway --apply
 """
 
 helps['network application-gateway wait'] = """
@@ -1680,6 +1687,9 @@ helps['network dns zone import'] = """
         - name: Import a local zone file into a DNS zone resource.
           text: >
             az network dns zone import -g MyResourceGroup -n MyZone -f /path/to/zone/file
+        - name: Update a DNS zone to match a zone file, writing only the record sets that changed.
+          text: >
+            az network dns zone import -g MyResourceGroup -n MyZone -f /path/to/zone/file --diff --delete-extraneous --concurrency 8
 """
 
 helps['network dns zone list'] = """
@@ -1993,6 +2003,13 @@ helps['network lb update'] = """
     examples:
         - name: Update the tags of a load balancer.
           text: az network lb update -g MyResourceGroup -n MyLb --set tags.CostCenter=MyBusinessGroup
+        - name: Stage several changes locally and apply them in a single update.
+          text: |
+            az network lb probe create -g MyResourceGroup --lb-name MyLb -n MyProbe --protocol http --port 80 \\
+                --path / --defer
+            az network lb rule create -g MyResourceGroup --lb-name MyLb -n MyLbRule --protocol Tcp \\
+                --frontend-port 80 --backend-port 80 --probe-name MyProbe --defer
+            az network lb update -g MyResourceGroup -n MyLb --apply
 """
 # endregion
 
@@ -2688,6 +2705,21 @@ helps['network nsg rule show'] = """
           text: az network nsg rule show -g MyResourceGroup --nsg-name MyNsg -n MyNsgRule
 """
 
+helps['network nsg rule sync'] = """
+    type: command
+    short-summary: Make the rules of a network security group match the rules in a file.
+    long-summary: >
+        The file is compared with the existing rules locally and only the rules that differ are written. By default
+        all the changes are made in a single update of the network security group.
+    examples:
+        - name: Copy the rules of a network security group to another one.
+          text: |
+            az network nsg rule list -g MyResourceGroup --nsg-name MyNsg > rules.json
+            az network nsg rule sync -g MyResourceGroup --nsg-name MyOtherNsg --file rules.json --delete-extraneous
+        - name: Update the rules of a network security group from a YAML file, eight rules at a time.
+          text: az network nsg rule sync -g MyResourceGroup --nsg-name MyNsg --file rules.yaml --concurrency 8
+"""
+
 helps['network nsg rule update'] = """
     type: command
     short-summary: Update a network security group rule.
@@ -89,6 +89,7 @@ def load_arguments(self, _):
         c.argument('application_gateway_name', name_arg_type, help='The name of the application gateway.', completer=get_resource_name_completion_list('Microsoft.Network/applicationGateways'), id_part='name')
         c.argument('sku', arg_group='Gateway', help='The name of the SKU.', arg_type=get_enum_type(ApplicationGatewaySkuName), default=ApplicationGatewaySkuName.standard_medium.value)
         c.ignore('virtual_network_type', 'private_ip_address_allocation')
+        c.argument('defer', action='store_true', help='Save the change locally in the CLI configuration directory instead of sending it to Azure. Deferred changes are applied with the next change made without --defer or with `update --apply`.')
 
     with self.argument_context('network application-gateway', arg_group='Network') as c:
         c.argument('virtual_network_name', virtual_network_name_type)
@@ -124,6 +125,7 @@ def load_arguments(self, _):
         c.argument('sku', default=None)
         c.argument('enable_http2')
         c.argument('capacity', help='The number of instances to use with the application gateway.')
+        c.argument('apply', action='store_true', help='Apply the changes deferred with --defer.')
 
     ag_subresources = [
         {'name': 'auth-cert', 'display': 'authentication certificate', 'ref': 'authentication_certificates'},
@@ -146,6 +148,7 @@ def load_arguments(self, _):
             c.argument('application_gateway_name', options_list=('--gateway-name',), help='The name of the application gateway.')
             c.argument('private_ip_address', arg_group=None)
             c.argument('virtual_network_name', arg_group=None)
+            c.ignore('apply')
 
         with self.argument_context('network application-gateway {} create'.format(item['name'])) as c:
             c.argument('item_name', options_list=('--name', '-n'), help='The name of the {}.'.format(item['display']), completer=None)
@@ -336,6 +339,9 @@ def load_arguments(self, _):
 
     with self.argument_context('network dns zone import') as c:
         c.argument('file_name', options_list=('--file-name', '-f'), type=file_type, completer=FilesCompleter(), help='Path to the DNS zone file to import')
+        c.argument('diff', action='store_true', help='List the existing record sets once and only write the record sets that differ from the zone file. Changed record sets are updated only if they were not modified since they were listed.')
+        c.argument('delete_extraneous', action='store_true', help='With --diff, delete the record sets that are not in the zone file. The SOA and NS record sets of the zone apex are kept.')
+        c.argument('concurrency', type=int, help='Maximum number of record sets to write at the same time.')
 
     with self.argument_context('network dns zone export') as c:
         c.argument('file_name', options_list=('--file-name', '-f'), type=file_type, completer=FilesCompleter(), help='Path to the DNS zone file to save')
@@ -470,9 +476,11 @@ def load_arguments(self, _):
             c.argument('item_name', options_list=('--name', '-n'), help='The name of the {}'.format(item['display']), completer=get_lb_subresource_completion_list(item['ref']), id_part='child_name_1')
             c.argument('resource_name', options_list=('--lb-name',), help='The name of the load balancer.', completer=get_resource_name_completion_list('Microsoft.Network/loadBalancers'))
             c.argument('load_balancer_name', load_balancer_name_type)
+            c.ignore('apply')
 
     with self.argument_context('network lb') as c:
         c.argument('load_balancer_name', load_balancer_name_type, options_list=('--name', '-n'))
+        c.argument('defer', action='store_true', help='Save the change locally in the CLI configuration directory instead of sending it to Azure. Deferred changes are applied with the next change made without --defer or with `update --apply`.')
         c.argument('frontend_port', help='Port number')
         c.argument('frontend_port_range_start', help='Port number')
         c.argument('frontend_port_range_end', help='Port number')
@@ -505,6 +513,9 @@ def load_arguments(self, _):
         c.argument('vnet_address_prefix', help='The CIDR address prefix to use when creating a new VNet.')
         c.ignore('vnet_type', 'subnet_type')
 
+    with self.argument_context('network lb update') as c:
+        c.argument('apply', action='store_true', help='Apply the changes deferred with --defer.')
+
     with self.argument_context('network lb frontend-ip') as c:
         c.argument('zone', zone_type, min_api='2017-06-01')
 
@@ -623,6 +634,11 @@ def load_arguments(self, _):
     with self.argument_context('network nsg rule create') as c:
         c.argument('network_security_group_name', options_list=('--nsg-name',), metavar='NSGNAME', help='Name of the network security group', id_part=None)
 
+    with self.argument_context('network nsg rule sync') as c:
+        c.argument('rules_file', options_list=('--file', '-f'), completer=FilesCompleter(), help='Path to a JSON or YAML file with the list of security rules, in the format of `az network nsg rule list`. Application security groups can be given by name or ID.')
+        c.argument('delete_extraneous', action='store_true', help='Delete the security rules that are not in the file.')
+        c.argument('concurrency', type=int, help='Write each changed security rule separately, this many at a time, instead of updating the whole network security group at once.')
+
     for item in ['create', 'update']:
         with self.argument_context('network nsg rule {}'.format(item)) as c:
             c.argument('priority', help='Rule priority, between 100 (highest priority) and 4096 (lowest priority). Must be unique for each rule in the collection.', type=int)
@@ -3,12 +3,25 @@
 # Licensed under the MIT License. See License.txt in the project root for license information.
 # --------------------------------------------------------------------------------------------
 
+import json
+import os
 import sys
+from knack.log import get_logger
 from knack.util import CLIError
 from azure.cli.core.util import sdk_no_wait
 
 from ._client_factory import network_client_factory
 
+logger = get_logger(__name__)
+
+DEFERRED_DIR_NAME = 'deferred'
+
+# resources whose changes can be saved locally with --defer and applied later in a single PUT, with their model
+DEFERRABLE_RESOURCES = {
+    'application_gateways': 'ApplicationGateway',
+    'load_balancers': 'LoadBalancer'
+}
+
 
 def _get_property(items, name):
     result = next((x for x in items if x.name.lower() == name.lower()), None)
@@ -25,6 +38,62 @@ def _set_param(item, prop, value):
         setattr(item, prop, value)
 
 
+def _get_deferred_path(cmd, resource, resource_group_name, resource_name):
+    from azure.cli.core.commands.client_factory import get_subscription_id
+    return os.path.join(cmd.cli_ctx.config.config_dir, DEFERRED_DIR_NAME, get_subscription_id(cmd.cli_ctx),
+                        resource_group_name.lower(), resource, '{}.json'.format(resource_name.lower()))
+
+
+def has_deferred_changes(cmd, resource, resource_group_name, resource_name):
+    return resource in DEFERRABLE_RESOURCES and \
+        os.path.isfile(_get_deferred_path(cmd, resource, resource_group_name, resource_name))
+
+
+def cached_get(cmd, resource, resource_group_name, resource_name):
+    """ Get a resource, including the changes saved locally with --defer. """
+    if has_deferred_changes(cmd, resource, resource_group_name, resource_name):
+        model = cmd.get_models(DEFERRABLE_RESOURCES[resource])
+        with open(_get_deferred_path(cmd, resource, resource_group_name, resource_name), 'r') as f:
+            return model.deserialize(json.load(f))
+    client = getattr(network_client_factory(cmd.cli_ctx), resource)
+    return client.get(resource_group_name, resource_name)
+
+
+def cached_put(cmd, resource, resource_group_name, resource_name, parameters, no_wait=False, defer=False):
+    """ Save a resource locally with --defer. Otherwise PUT it, which also applies the deferred changes.
+
+    The deferred changes were made to the resource as it was when the first of them was saved: they are only applied
+    if its etag still matches, and are kept until the PUT succeeded so that a failed apply can be retried. """
+    from msrestazure.azure_exceptions import CloudError
+    path = _get_deferred_path(cmd, resource, resource_group_name, resource_name)
+    if defer:
+        if not os.path.isdir(os.path.dirname(path)):
+            os.makedirs(os.path.dirname(path))
+        with open(path, 'w') as f:
+            json.dump(parameters.serialize(keep_readonly=True), f)
+        return parameters
+
+    client = getattr(network_client_factory(cmd.cli_ctx), resource)
+    if not has_deferred_changes(cmd, resource, resource_group_name, resource_name):
+        return sdk_no_wait(no_wait, client.create_or_update, resource_group_name, resource_name, parameters)
+
+    with open(path, 'r') as f:
+        etag = json.load(f).get('etag')
+    if no_wait:
+        logger.warning("Waiting for the deferred changes of '%s' to be applied.", resource_name)
+    try:
+        result = client.create_or_update(resource_group_name, resource_name, parameters,
+                                         custom_headers={'If-Match': etag} if etag else None)
+        result.result()
+    except CloudError as ex:
+        if ex.status_code != 412:
+            raise
+        raise CLIError("'{}' was modified since its changes were deferred, they were not applied. They are kept in "
+                       "'{}', delete the file to discard them.".format(resource_name, path))
+    os.remove(path)
+    return result
+
+
 def list_network_resource_property(resource, prop):
     """ Factory method for creating list functions. """
 
@@ -59,19 +128,23 @@ def get_network_resource_property_entry(resource, prop):
 def delete_network_resource_property_entry(resource, prop):
     """ Factory method for creating delete functions. """
 
-    def delete_func(cmd, resource_group_name, resource_name, item_name, no_wait=False):  # pylint: disable=unused-argument
-        client = getattr(network_client_factory(cmd.cli_ctx), resource)
-        item = client.get(resource_group_name, resource_name)
+    def _delete_entry(cmd, resource_group_name, resource_name, item_name, no_wait=False, defer=False):
+        item = cached_get(cmd, resource, resource_group_name, resource_name)
         keep_items = \
             [x for x in item.__getattribute__(prop) if x.name.lower() != item_name.lower()]
         _set_param(item, prop, keep_items)
-        if no_wait:
-            sdk_no_wait(no_wait, client.create_or_update, resource_group_name, resource_name, item)
-        else:
-            result = sdk_no_wait(no_wait, client.create_or_update, resource_group_name, resource_name, item).result()
-            if next((x for x in getattr(result, prop) if x.name.lower() == item_name.lower()), None):
+        result = cached_put(cmd, resource, resource_group_name, resource_name, item, no_wait=no_wait, defer=defer)
+        if not no_wait and not defer:
+            if next((x for x in getattr(result.result(), prop) if x.name.lower() == item_name.lower()), None):
                 raise CLIError("Failed to delete '{}' on '{}'".format(item_name, resource_name))
 
+    def delete_func(cmd, resource_group_name, resource_name, item_name, no_wait=False):
+        _delete_entry(cmd, resource_group_name, resource_name, item_name, no_wait=no_wait)
+
+    def deferrable_delete_func(cmd, resource_group_name, resource_name, item_name, no_wait=False, defer=False):
+        _delete_entry(cmd, resource_group_name, resource_name, item_name, no_wait=no_wait, defer=defer)
+
     func_name = 'delete_network_resource_property_entry_{}_{}'.format(resource, prop)
-    setattr(sys.modules[__name__], func_name, delete_func)
+    setattr(sys.modules[__name__], func_name,
+            deferrable_delete_func if resource in DEFERRABLE_RESOURCES else delete_func)
     return func_name
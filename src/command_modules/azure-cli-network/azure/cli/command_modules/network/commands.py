@@ -61,6 +61,8 @@ def load_command_table(self, _):
         client_factory=None
     )
 
+    network_custom = CliCommandType(operations_tmpl='azure.cli.command_modules.network.custom#{}')
+
     network_asg_sdk = CliCommandType(
         operations_tmpl='azure.mgmt.network.operations.application_security_groups_operations#ApplicationSecurityGroupsOperations.{}',
         client_factory=cf_application_security_groups
@@ -225,7 +227,9 @@ def load_command_table(self, _):
         g.command('start', 'start')
         g.command('stop', 'stop')
         g.command('show-backend-health', 'backend_health', min_api='2016-09-01')
-        g.generic_update_command('update', supports_no_wait=True, custom_func_name='update_application_gateway')
+        g.generic_update_command('update', supports_no_wait=True, custom_func_name='update_application_gateway',
+                                 getter_name='get_application_gateway', getter_type=network_custom,
+                                 setter_name='set_application_gateway', setter_type=network_custom)
         g.generic_wait_command('wait')
 
     subresource_properties = [
@@ -261,6 +265,8 @@ def load_command_table(self, _):
             g.command('delete', delete_network_resource_property_entry('application_gateways', subresource), supports_no_wait=True)
             g.custom_command('create', 'create_ag_{}'.format(_make_singular(subresource)), supports_no_wait=True, validator=create_validator)
             g.generic_update_command('update', command_type=network_ag_sdk, supports_no_wait=True,
+                                     getter_name='get_application_gateway', getter_type=network_custom,
+                                     setter_name='set_application_gateway', setter_type=network_custom,
                                      custom_func_name='update_ag_{}'.format(_make_singular(subresource)),
                                      child_collection_prop_name=subresource, validator=create_validator)
 
@@ -272,6 +278,8 @@ def load_command_table(self, _):
         g.custom_command('create', 'create_ag_{}'.format(_make_singular(subresource)), supports_no_wait=True, doc_string_source='ApplicationGatewayRedirectConfiguration')
         g.generic_update_command('update', command_type=network_ag_sdk,
                                  client_factory=cf_application_gateways, supports_no_wait=True,
+                                 getter_name='get_application_gateway', getter_type=network_custom,
+                                 setter_name='set_application_gateway', setter_type=network_custom,
                                  custom_func_name='update_ag_{}'.format(_make_singular(subresource)),
                                  child_collection_prop_name=subresource, doc_string_source='ApplicationGatewayRedirectConfiguration')
 
@@ -388,7 +396,8 @@ def load_command_table(self, _):
         g.custom_command('create', 'create_load_balancer', transform=DeploymentOutputLongRunningOperation(self.cli_ctx), supports_no_wait=True, table_transformer=deployment_validate_table_format, validator=process_lb_create_namespace)
         g.command('delete', 'delete')
         g.custom_command('list', 'list_lbs')
-        g.generic_update_command('update')
+        g.generic_update_command('update', getter_name='get_load_balancer', getter_type=network_custom,
+                                 setter_name='set_load_balancer', setter_type=network_custom)
 
     property_map = {
         'frontend_ip_configurations': 'frontend-ip',
@@ -407,17 +416,23 @@ def load_command_table(self, _):
     with self.command_group('network lb frontend-ip', network_lb_sdk) as g:
         g.custom_command('create', 'create_lb_frontend_ip_configuration', validator=process_lb_frontend_ip_namespace)
         g.generic_update_command('update', child_collection_prop_name='frontend_ip_configurations',
+                                 getter_name='get_load_balancer', getter_type=network_custom,
+                                 setter_name='set_load_balancer', setter_type=network_custom,
                                  custom_func_name='set_lb_frontend_ip_configuration',
                                  validator=process_lb_frontend_ip_namespace)
 
     with self.command_group('network lb inbound-nat-rule', network_lb_sdk) as g:
         g.custom_command('create', 'create_lb_inbound_nat_rule')
         g.generic_update_command('update', child_collection_prop_name='inbound_nat_rules',
+                                 getter_name='get_load_balancer', getter_type=network_custom,
+                                 setter_name='set_load_balancer', setter_type=network_custom,
                                  custom_func_name='set_lb_inbound_nat_rule')
 
     with self.command_group('network lb inbound-nat-pool', network_lb_sdk) as g:
         g.custom_command('create', 'create_lb_inbound_nat_pool')
         g.generic_update_command('update', child_collection_prop_name='inbound_nat_pools',
+                                 getter_name='get_load_balancer', getter_type=network_custom,
+                                 setter_name='set_load_balancer', setter_type=network_custom,
                                  custom_func_name='set_lb_inbound_nat_pool')
 
     with self.command_group('network lb address-pool', network_lb_sdk) as g:
@@ -426,11 +441,15 @@ def load_command_table(self, _):
     with self.command_group('network lb rule', network_lb_sdk) as g:
         g.custom_command('create', 'create_lb_rule')
         g.generic_update_command('update', child_collection_prop_name='load_balancing_rules',
+                                 getter_name='get_load_balancer', getter_type=network_custom,
+                                 setter_name='set_load_balancer', setter_type=network_custom,
                                  custom_func_name='set_lb_rule')
 
     with self.command_group('network lb probe', network_lb_sdk) as g:
         g.custom_command('create', 'create_lb_probe')
         g.generic_update_command('update', child_collection_prop_name='probes',
+                                 getter_name='get_load_balancer', getter_type=network_custom,
+                                 setter_name='set_load_balancer', setter_type=network_custom,
                                  custom_func_name='set_lb_probe')
 
     # endregion
@@ -491,6 +510,7 @@ def load_command_table(self, _):
         g.command('show', 'get', exception_handler=empty_on_404, table_transformer=transform_nsg_rule_table_output)
         g.command('list', 'list', table_transformer=lambda x: [transform_nsg_rule_table_output(i) for i in x])
         g.custom_command('create', 'create_nsg_rule_2017_06_01', min_api='2017-06-01')
+        g.custom_command('sync', 'sync_nsg_rules', min_api='2017-06-01')
         g.generic_update_command('update', setter_arg_name='security_rule_parameters', min_api='2017-06-01',
                                  custom_func_name='update_nsg_rule_2017_06_01', doc_string_source='SecurityRule')
         g.custom_command('create', 'create_nsg_rule_2017_03_01', max_api='2017-03-01')
@@ -19,14 +19,15 @@ from azure.cli.core.commands.client_factory import get_subscription_id, get_mgmt
 
 from azure.cli.core.util import CLIError, sdk_no_wait
 from azure.cli.command_modules.network._client_factory import network_client_factory
-from azure.cli.command_modules.network._util import _get_property, _set_param
+from azure.cli.command_modules.network._util import (_get_property, _set_param, cached_get, cached_put,
+                                                     has_deferred_changes)
 
 from azure.mgmt.dns import DnsManagementClient
 from azure.mgmt.dns.models import (RecordSet, AaaaRecord, ARecord, CaaRecord, CnameRecord, MxRecord,
                                    NsRecord, PtrRecord, SoaRecord, SrvRecord, TxtRecord, Zone)
 
 from azure.cli.command_modules.network.zone_file.parse_zone_file import parse_zone_file
-from azure.cli.command_modules.network.zone_file.make_zone_file import make_zone_file
+from azure.cli.command_modules.network.zone_file.make_zone_file import write_zone_file
 from azure.cli.core.profiles import ResourceType
 
 logger = get_logger(__name__)
@@ -229,14 +230,25 @@ def update_application_gateway(instance, sku=None, capacity=None, tags=None, ena
     return instance
 
 
+def get_application_gateway(cmd, resource_group_name, application_gateway_name, apply=False):
+    if apply and not has_deferred_changes(cmd, 'application_gateways', resource_group_name, application_gateway_name):
+        raise CLIError("Application gateway '{}' has no deferred changes.".format(application_gateway_name))
+    return cached_get(cmd, 'application_gateways', resource_group_name, application_gateway_name)
+
+
+def set_application_gateway(cmd, resource_group_name, application_gateway_name, parameters, no_wait=False,
+                            defer=False):
+    return cached_put(cmd, 'application_gateways', resource_group_name, application_gateway_name, parameters,
+                      no_wait, defer)
+
+
 def create_ag_authentication_certificate(cmd, resource_group_name, application_gateway_name, item_name,
-                                         cert_data, no_wait=False):
+                                         cert_data, no_wait=False, defer=False):
     AuthCert = cmd.get_models('ApplicationGatewayAuthenticationCertificate')
-    ncf = network_client_factory(cmd.cli_ctx).application_gateways
-    ag = ncf.get(resource_group_name, application_gateway_name)
+    ag = cached_get(cmd, 'application_gateways', resource_group_name, application_gateway_name)
     new_cert = AuthCert(data=cert_data, name=item_name)
     _upsert(ag, 'authentication_certificates', new_cert, 'name')
-    return sdk_no_wait(no_wait, ncf.create_or_update, resource_group_name, application_gateway_name, ag)
+    return cached_put(cmd, 'application_gateways', resource_group_name, application_gateway_name, ag, no_wait, defer)
 
 
 def update_ag_authentication_certificate(instance, parent, item_name, cert_data):
@@ -245,14 +257,12 @@ def update_ag_authentication_certificate(instance, parent, item_name, cert_data)
 
 
 def create_ag_backend_address_pool(cmd, resource_group_name, application_gateway_name, item_name,
-                                   servers=None, no_wait=False):
+                                   servers=None, no_wait=False, defer=False):
     ApplicationGatewayBackendAddressPool = cmd.get_models('ApplicationGatewayBackendAddressPool')
-    ncf = network_client_factory(cmd.cli_ctx)
-    ag = ncf.application_gateways.get(resource_group_name, application_gateway_name)
+    ag = cached_get(cmd, 'application_gateways', resource_group_name, application_gateway_name)
     new_pool = ApplicationGatewayBackendAddressPool(name=item_name, backend_addresses=servers)
     _upsert(ag, 'backend_address_pools', new_pool, 'name')
-    return sdk_no_wait(no_wait, ncf.application_gateways.create_or_update,
-                       resource_group_name, application_gateway_name, ag)
+    return cached_put(cmd, 'application_gateways', resource_group_name, application_gateway_name, ag, no_wait, defer)
 
 
 def update_ag_backend_address_pool(instance, parent, item_name, servers=None):
@@ -264,11 +274,10 @@ def update_ag_backend_address_pool(instance, parent, item_name, servers=None):
 def create_ag_frontend_ip_configuration(cmd, resource_group_name, application_gateway_name, item_name,
                                         public_ip_address=None, subnet=None,
                                         virtual_network_name=None, private_ip_address=None,
-                                        private_ip_address_allocation=None, no_wait=False):
+                                        private_ip_address_allocation=None, no_wait=False, defer=False):
     ApplicationGatewayFrontendIPConfiguration, SubResource = cmd.get_models(
         'ApplicationGatewayFrontendIPConfiguration', 'SubResource')
-    ncf = network_client_factory(cmd.cli_ctx)
-    ag = ncf.application_gateways.get(resource_group_name, application_gateway_name)
+    ag = cached_get(cmd, 'application_gateways', resource_group_name, application_gateway_name)
     if public_ip_address:
         new_config = ApplicationGatewayFrontendIPConfiguration(
             name=item_name,
@@ -280,8 +289,7 @@ def create_ag_frontend_ip_configuration(cmd, resource_group_name, application_ga
             private_ip_allocation_method='Static' if private_ip_address else 'Dynamic',
             subnet=SubResource(id=subnet))
     _upsert(ag, 'frontend_ip_configurations', new_config, 'name')
-    return sdk_no_wait(no_wait, ncf.application_gateways.create_or_update,
-                       resource_group_name, application_gateway_name, ag)
+    return cached_put(cmd, 'application_gateways', resource_group_name, application_gateway_name, ag, no_wait, defer)
 
 
 def update_ag_frontend_ip_configuration(cmd, instance, parent, item_name, public_ip_address=None,
@@ -299,14 +307,12 @@ def update_ag_frontend_ip_configuration(cmd, instance, parent, item_name, public
 
 
 def create_ag_frontend_port(cmd, resource_group_name, application_gateway_name, item_name, port,
-                            no_wait=False):
+                            no_wait=False, defer=False):
     ApplicationGatewayFrontendPort = cmd.get_models('ApplicationGatewayFrontendPort')
-    ncf = network_client_factory(cmd.cli_ctx)
-    ag = ncf.application_gateways.get(resource_group_name, application_gateway_name)
+    ag = cached_get(cmd, 'application_gateways', resource_group_name, application_gateway_name)
     new_port = ApplicationGatewayFrontendPort(name=item_name, port=port)
     _upsert(ag, 'frontend_ports', new_port, 'name')
-    return sdk_no_wait(no_wait, ncf.application_gateways.create_or_update,
-                       resource_group_name, application_gateway_name, ag)
+    return cached_put(cmd, 'application_gateways', resource_group_name, application_gateway_name, ag, no_wait, defer)
 
 
 def update_ag_frontend_port(instance, parent, item_name, port=None):
@@ -317,10 +323,9 @@ def update_ag_frontend_port(instance, parent, item_name, port=None):
 
 def create_ag_http_listener(cmd, resource_group_name, application_gateway_name, item_name,
                             frontend_port, frontend_ip=None, host_name=None, ssl_cert=None,
-                            no_wait=False):
+                            no_wait=False, defer=False):
     ApplicationGatewayHttpListener, SubResource = cmd.get_models('ApplicationGatewayHttpListener', 'SubResource')
-    ncf = network_client_factory(cmd.cli_ctx)
-    ag = ncf.application_gateways.get(resource_group_name, application_gateway_name)
+    ag = cached_get(cmd, 'application_gateways', resource_group_name, application_gateway_name)
     if not frontend_ip:
         frontend_ip = _get_default_id(ag, 'frontend_ip_configurations', '--frontend-ip')
     new_listener = ApplicationGatewayHttpListener(
@@ -332,8 +337,7 @@ def create_ag_http_listener(cmd, resource_group_name, application_gateway_name,
         protocol='https' if ssl_cert else 'http',
         ssl_certificate=SubResource(id=ssl_cert) if ssl_cert else None)
     _upsert(ag, 'http_listeners', new_listener, 'name')
-    return sdk_no_wait(no_wait, ncf.application_gateways.create_or_update,
-                       resource_group_name, application_gateway_name, ag)
+    return cached_put(cmd, 'application_gateways', resource_group_name, application_gateway_name, ag, no_wait, defer)
 
 
 def update_ag_http_listener(cmd, instance, parent, item_name, frontend_ip=None, frontend_port=None,
@@ -358,14 +362,13 @@ def update_ag_http_listener(cmd, instance, parent, item_name, frontend_ip=None,
 
 def create_ag_backend_http_settings_collection(cmd, resource_group_name, application_gateway_name, item_name, port,
                                                probe=None, protocol='http', cookie_based_affinity=None, timeout=None,
-                                               no_wait=False, connection_draining_timeout=0,
+                                               no_wait=False, defer=False, connection_draining_timeout=0,
                                                host_name=None, host_name_from_backend_pool=None,
                                                affinity_cookie_name=None, enable_probe=None, path=None,
                                                auth_certs=None):
     ApplicationGatewayBackendHttpSettings, ApplicationGatewayConnectionDraining, SubResource = cmd.get_models(
         'ApplicationGatewayBackendHttpSettings', 'ApplicationGatewayConnectionDraining', 'SubResource')
-    ncf = network_client_factory(cmd.cli_ctx)
-    ag = ncf.application_gateways.get(resource_group_name, application_gateway_name)
+    ag = cached_get(cmd, 'application_gateways', resource_group_name, application_gateway_name)
     new_settings = ApplicationGatewayBackendHttpSettings(
         port=port,
         protocol=protocol,
@@ -386,8 +389,7 @@ def create_ag_backend_http_settings_collection(cmd, resource_group_name, applica
         new_settings.probe_enabled = enable_probe
         new_settings.path = path
     _upsert(ag, 'backend_http_settings_collection', new_settings, 'name')
-    return sdk_no_wait(no_wait, ncf.application_gateways.create_or_update,
-                       resource_group_name, application_gateway_name, ag)
+    return cached_put(cmd, 'application_gateways', resource_group_name, application_gateway_name, ag, no_wait, defer)
 
 
 def update_ag_backend_http_settings_collection(cmd, instance, parent, item_name, port=None, probe=None, protocol=None,
@@ -429,11 +431,10 @@ def update_ag_backend_http_settings_collection(cmd, instance, parent, item_name,
 
 def create_ag_redirect_configuration(cmd, resource_group_name, application_gateway_name, item_name, redirect_type,
                                      target_listener=None, target_url=None, include_path=None,
-                                     include_query_string=None, no_wait=False):
+                                     include_query_string=None, no_wait=False, defer=False):
     ApplicationGatewayRedirectConfiguration, SubResource = cmd.get_models(
         'ApplicationGatewayRedirectConfiguration', 'SubResource')
-    ncf = network_client_factory(cmd.cli_ctx).application_gateways
-    ag = ncf.get(resource_group_name, application_gateway_name)
+    ag = cached_get(cmd, 'application_gateways', resource_group_name, application_gateway_name)
     new_config = ApplicationGatewayRedirectConfiguration(
         name=item_name,
         redirect_type=redirect_type,
@@ -442,7 +443,7 @@ def create_ag_redirect_configuration(cmd, resource_group_name, application_gatew
         include_path=include_path,
         include_query_string=include_query_string)
     _upsert(ag, 'redirect_configurations', new_config, 'name')
-    return sdk_no_wait(no_wait, ncf.create_or_update, resource_group_name, application_gateway_name, ag)
+    return cached_put(cmd, 'application_gateways', resource_group_name, application_gateway_name, ag, no_wait, defer)
 
 
 def update_ag_redirect_configuration(cmd, instance, parent, item_name, redirect_type=None,
@@ -466,11 +467,10 @@ def update_ag_redirect_configuration(cmd, instance, parent, item_name, redirect_
 
 def create_ag_probe(cmd, resource_group_name, application_gateway_name, item_name, protocol, host,
                     path, interval=30, timeout=120, threshold=8, no_wait=False, host_name_from_http_settings=None,
-                    min_servers=None, match_body=None, match_status_codes=None):
+                    min_servers=None, match_body=None, match_status_codes=None, defer=False):
     ApplicationGatewayProbe, ProbeMatchCriteria = cmd.get_models(
         'ApplicationGatewayProbe', 'ApplicationGatewayProbeHealthResponseMatch')
-    ncf = network_client_factory(cmd.cli_ctx)
-    ag = ncf.application_gateways.get(resource_group_name, application_gateway_name)
+    ag = cached_get(cmd, 'application_gateways', resource_group_name, application_gateway_name)
     new_probe = ApplicationGatewayProbe(
         name=item_name,
         protocol=protocol,
@@ -485,8 +485,7 @@ def create_ag_probe(cmd, resource_group_name, application_gateway_name, item_nam
         new_probe.match = ProbeMatchCriteria(body=match_body, status_codes=match_status_codes)
 
     _upsert(ag, 'probes', new_probe, 'name')
-    return sdk_no_wait(no_wait, ncf.application_gateways.create_or_update,
-                       resource_group_name, application_gateway_name, ag)
+    return cached_put(cmd, 'application_gateways', resource_group_name, application_gateway_name, ag, no_wait, defer)
 
 
 def update_ag_probe(cmd, instance, parent, item_name, protocol=None, host=None, path=None,
@@ -521,11 +520,10 @@ def update_ag_probe(cmd, instance, parent, item_name, protocol=None, host=None,
 
 def create_ag_request_routing_rule(cmd, resource_group_name, application_gateway_name, item_name,
                                    address_pool=None, http_settings=None, http_listener=None, redirect_config=None,
-                                   url_path_map=None, rule_type='Basic', no_wait=False):
+                                   url_path_map=None, rule_type='Basic', no_wait=False, defer=False):
     ApplicationGatewayRequestRoutingRule, SubResource = cmd.get_models(
         'ApplicationGatewayRequestRoutingRule', 'SubResource')
-    ncf = network_client_factory(cmd.cli_ctx)
-    ag = ncf.application_gateways.get(resource_group_name, application_gateway_name)
+    ag = cached_get(cmd, 'application_gateways', resource_group_name, application_gateway_name)
     if not address_pool and not redirect_config:
         address_pool = _get_default_id(ag, 'backend_address_pools', '--address-pool')
     if not http_settings and not redirect_config:
@@ -542,8 +540,7 @@ def create_ag_request_routing_rule(cmd, resource_group_name, application_gateway
     if cmd.supported_api_version(min_api='2017-06-01'):
         new_rule.redirect_configuration = SubResource(id=redirect_config) if redirect_config else None
     _upsert(ag, 'request_routing_rules', new_rule, 'name')
-    return sdk_no_wait(no_wait, ncf.application_gateways.create_or_update,
-                       resource_group_name, application_gateway_name, ag)
+    return cached_put(cmd, 'application_gateways', resource_group_name, application_gateway_name, ag, no_wait, defer)
 
 
 def update_ag_request_routing_rule(cmd, instance, parent, item_name, address_pool=None,
@@ -566,15 +563,13 @@ def update_ag_request_routing_rule(cmd, instance, parent, item_name, address_poo
 
 
 def create_ag_ssl_certificate(cmd, resource_group_name, application_gateway_name, item_name, cert_data,
-                              cert_password, no_wait=False):
+                              cert_password, no_wait=False, defer=False):
     ApplicationGatewaySslCertificate = cmd.get_models('ApplicationGatewaySslCertificate')
-    ncf = network_client_factory(cmd.cli_ctx)
-    ag = ncf.application_gateways.get(resource_group_name, application_gateway_name)
+    ag = cached_get(cmd, 'application_gateways', resource_group_name, application_gateway_name)
     new_cert = ApplicationGatewaySslCertificate(
         name=item_name, data=cert_data, password=cert_password)
     _upsert(ag, 'ssl_certificates', new_cert, 'name')
-    return sdk_no_wait(no_wait, ncf.application_gateways.create_or_update,
-                       resource_group_name, application_gateway_name, ag)
+    return cached_put(cmd, 'application_gateways', resource_group_name, application_gateway_name, ag, no_wait, defer)
 
 
 def update_ag_ssl_certificate(instance, parent, item_name, cert_data=None, cert_password=None):
@@ -586,22 +581,20 @@ def update_ag_ssl_certificate(instance, parent, item_name, cert_data=None, cert_
 
 
 def set_ag_ssl_policy_2017_03_01(cmd, resource_group_name, application_gateway_name, disabled_ssl_protocols=None,
-                                 clear=False, no_wait=False):
+                                 clear=False, no_wait=False, defer=False):
     ApplicationGatewaySslPolicy = cmd.get_models('ApplicationGatewaySslPolicy')
-    ncf = network_client_factory(cmd.cli_ctx).application_gateways
-    ag = ncf.get(resource_group_name, application_gateway_name)
+    ag = cached_get(cmd, 'application_gateways', resource_group_name, application_gateway_name)
     ag.ssl_policy = None if clear else ApplicationGatewaySslPolicy(
         disabled_ssl_protocols=disabled_ssl_protocols)
-    return sdk_no_wait(no_wait, ncf.create_or_update, resource_group_name, application_gateway_name, ag)
+    return cached_put(cmd, 'application_gateways', resource_group_name, application_gateway_name, ag, no_wait, defer)
 
 
 def set_ag_ssl_policy_2017_06_01(cmd, resource_group_name, application_gateway_name, policy_name=None, policy_type=None,
                                  disabled_ssl_protocols=None, cipher_suites=None, min_protocol_version=None,
-                                 no_wait=False):
+                                 no_wait=False, defer=False):
     ApplicationGatewaySslPolicy, ApplicationGatewaySslPolicyType = cmd.get_models(
         'ApplicationGatewaySslPolicy', 'ApplicationGatewaySslPolicyType')
-    ncf = network_client_factory(cmd.cli_ctx).application_gateways
-    ag = ncf.get(resource_group_name, application_gateway_name)
+    ag = cached_get(cmd, 'application_gateways', resource_group_name, application_gateway_name)
     policy_type = None
     if policy_name:
         policy_type = ApplicationGatewaySslPolicyType.predefined.value
@@ -613,7 +606,7 @@ def set_ag_ssl_policy_2017_06_01(cmd, resource_group_name, application_gateway_n
         disabled_ssl_protocols=disabled_ssl_protocols,
         cipher_suites=cipher_suites,
         min_protocol_version=min_protocol_version)
-    return sdk_no_wait(no_wait, ncf.create_or_update, resource_group_name, application_gateway_name, ag)
+    return cached_put(cmd, 'application_gateways', resource_group_name, application_gateway_name, ag, no_wait, defer)
 
 
 def show_ag_ssl_policy(cmd, resource_group_name, application_gateway_name):
@@ -624,11 +617,10 @@ def show_ag_ssl_policy(cmd, resource_group_name, application_gateway_name):
 def create_ag_url_path_map(cmd, resource_group_name, application_gateway_name, item_name, paths,
                            address_pool=None, http_settings=None, redirect_config=None,
                            default_address_pool=None, default_http_settings=None, default_redirect_config=None,
-                           no_wait=False, rule_name='default'):
+                           no_wait=False, defer=False, rule_name='default'):
     ApplicationGatewayUrlPathMap, ApplicationGatewayPathRule, SubResource = cmd.get_models(
         'ApplicationGatewayUrlPathMap', 'ApplicationGatewayPathRule', 'SubResource')
-    ncf = network_client_factory(cmd.cli_ctx)
-    ag = ncf.application_gateways.get(resource_group_name, application_gateway_name)
+    ag = cached_get(cmd, 'application_gateways', resource_group_name, application_gateway_name)
 
     new_rule = ApplicationGatewayPathRule(
         name=rule_name,
@@ -658,8 +650,7 @@ def create_ag_url_path_map(cmd, resource_group_name, application_gateway_name, i
 
     new_map.path_rules.append(new_rule)
     _upsert(ag, 'url_path_maps', new_map, 'name')
-    return sdk_no_wait(no_wait, ncf.application_gateways.create_or_update,
-                       resource_group_name, application_gateway_name, ag)
+    return cached_put(cmd, 'application_gateways', resource_group_name, application_gateway_name, ag, no_wait, defer)
 
 
 def update_ag_url_path_map(cmd, instance, parent, item_name, default_address_pool=None,
@@ -684,10 +675,9 @@ def update_ag_url_path_map(cmd, instance, parent, item_name, default_address_poo
 
 def create_ag_url_path_map_rule(cmd, resource_group_name, application_gateway_name, url_path_map_name,
                                 item_name, paths, address_pool=None, http_settings=None, redirect_config=None,
-                                no_wait=False):
+                                no_wait=False, defer=False):
     ApplicationGatewayPathRule, SubResource = cmd.get_models('ApplicationGatewayPathRule', 'SubResource')
-    ncf = network_client_factory(cmd.cli_ctx)
-    ag = ncf.application_gateways.get(resource_group_name, application_gateway_name)
+    ag = cached_get(cmd, 'application_gateways', resource_group_name, application_gateway_name)
     url_map = next((x for x in ag.url_path_maps if x.name == url_path_map_name), None)
     if not url_map:
         raise CLIError('URL path map "{}" not found.'.format(url_path_map_name))
@@ -705,46 +695,42 @@ def create_ag_url_path_map_rule(cmd, resource_group_name, application_gateway_na
             if url_map.default_redirect_configuration else None
         new_rule.redirect_configuration = SubResource(id=redirect_config) if redirect_config else default_redirect
     _upsert(url_map, 'path_rules', new_rule, 'name')
-    return sdk_no_wait(no_wait, ncf.application_gateways.create_or_update,
-                       resource_group_name, application_gateway_name, ag)
+    return cached_put(cmd, 'application_gateways', resource_group_name, application_gateway_name, ag, no_wait, defer)
 
 
 def delete_ag_url_path_map_rule(cmd, resource_group_name, application_gateway_name, url_path_map_name,
-                                item_name, no_wait=False):
-    ncf = network_client_factory(cmd.cli_ctx)
-    ag = ncf.application_gateways.get(resource_group_name, application_gateway_name)
+                                item_name, no_wait=False, defer=False):
+    ag = cached_get(cmd, 'application_gateways', resource_group_name, application_gateway_name)
     url_map = next((x for x in ag.url_path_maps if x.name == url_path_map_name), None)
     if not url_map:
         raise CLIError('URL path map "{}" not found.'.format(url_path_map_name))
     url_map.path_rules = \
         [x for x in url_map.path_rules if x.name.lower() != item_name.lower()]
-    return sdk_no_wait(no_wait, ncf.application_gateways.create_or_update,
-                       resource_group_name, application_gateway_name, ag)
+    return cached_put(cmd, 'application_gateways', resource_group_name, application_gateway_name, ag, no_wait, defer)
 
 
 def set_ag_waf_config_2016_09_01(cmd, resource_group_name, application_gateway_name, enabled,
                                  firewall_mode=None,
-                                 no_wait=False):
+                                 no_wait=False, defer=False):
     ApplicationGatewayWebApplicationFirewallConfiguration = cmd.get_models(
         'ApplicationGatewayWebApplicationFirewallConfiguration')
-    ncf = network_client_factory(cmd.cli_ctx).application_gateways
-    ag = ncf.get(resource_group_name, application_gateway_name)
+    ag = cached_get(cmd, 'application_gateways', resource_group_name, application_gateway_name)
     ag.web_application_firewall_configuration = \
         ApplicationGatewayWebApplicationFirewallConfiguration(
             enabled=(enabled == 'true'), firewall_mode=firewall_mode)
 
-    return sdk_no_wait(no_wait, ncf.create_or_update, resource_group_name, application_gateway_name, ag)
+    return cached_put(cmd, 'application_gateways', resource_group_name, application_gateway_name, ag, no_wait, defer)
 
 
 def set_ag_waf_config_2017_03_01(cmd, resource_group_name, application_gateway_name, enabled,
                                  firewall_mode=None,
                                  rule_set_type='OWASP', rule_set_version=None,
                                  disabled_rule_groups=None,
-                                 disabled_rules=None, no_wait=False):
+                                 disabled_rules=None, no_wait=False, defer=False):
     ApplicationGatewayWebApplicationFirewallConfiguration = cmd.get_models(
         'ApplicationGatewayWebApplicationFirewallConfiguration')
     ncf = network_client_factory(cmd.cli_ctx).application_gateways
-    ag = ncf.get(resource_group_name, application_gateway_name)
+    ag = cached_get(cmd, 'application_gateways', resource_group_name, application_gateway_name)
     ag.web_application_firewall_configuration = \
         ApplicationGatewayWebApplicationFirewallConfiguration(
             enabled=(enabled == 'true'), firewall_mode=firewall_mode, rule_set_type=rule_set_type,
@@ -777,7 +763,7 @@ def set_ag_waf_config_2017_03_01(cmd, resource_group_name, application_gateway_n
                     disabled_groups.append(disabled_group)
         ag.web_application_firewall_configuration.disabled_rule_groups = disabled_groups
 
-    return sdk_no_wait(no_wait, ncf.create_or_update, resource_group_name, application_gateway_name, ag)
+    return cached_put(cmd, 'application_gateways', resource_group_name, application_gateway_name, ag, no_wait, defer)
 
 
 def show_ag_waf_config(cmd, resource_group_name, application_gateway_name):
@@ -972,22 +958,52 @@ def _type_to_property_name(key):
     return type_dict[key.lower()]
 
 
+class _ZoneFileWriter(object):  # pylint: disable=too-few-public-methods
+    """ Write the exported zone file to stdout and, if given, to a file. """
+
+    def __init__(self, *files):
+        self.files = files
+
+    def write(self, text):
+        for f in self.files:
+            f.write(text)
+
+
 def export_zone(cmd, resource_group_name, zone_name, file_name=None):
     from time import localtime, strftime
+    import sys
 
     client = get_mgmt_service_client(cmd.cli_ctx, DnsManagementClient)
     record_sets = client.record_sets.list_by_dns_zone(resource_group_name, zone_name)
 
-    zone_obj = OrderedDict({
+    header = {
         '$origin': zone_name.rstrip('.') + '.',
         'resource-group': resource_group_name,
         'zone-name': zone_name.rstrip('.'),
         'datetime': strftime('%a, %d %b %Y %X %z', localtime())
-    })
+    }
 
+    # records are written as the pages arrive, only the record sets before the SOA record are kept in memory
+    zone_file = None
+    try:
+        if file_name:
+            zone_file = open(file_name, 'w')
+            write_zone_file(_ZoneFileWriter(sys.stdout, zone_file), header, _iter_exported_record_sets(record_sets))
+        else:
+            write_zone_file(sys.stdout, header, _iter_exported_record_sets(record_sets))
+    except IOError:
+        if not file_name:
+            raise
+        raise CLIError('Unable to export to file: {}'.format(file_name))
+    finally:
+        if zone_file:
+            zone_file.close()
+    print('')
+
+
+def _iter_exported_record_sets(record_sets):
     for record_set in record_sets:
         record_type = record_set.type.rsplit('/', 1)[1].lower()
-        record_set_name = record_set.name
         record_data = getattr(record_set, _type_to_property_name(record_type), None)
 
         # ignore empty record sets
@@ -997,16 +1013,11 @@ def export_zone(cmd, resource_group_name, zone_name, file_name=None):
         if not isinstance(record_data, list):
             record_data = [record_data]
 
-        if record_set_name not in zone_obj:
-            zone_obj[record_set_name] = OrderedDict()
-
+        records = []
         for record in record_data:
 
             record_obj = {'ttl': record_set.ttl}
 
-            if record_type not in zone_obj[record_set_name]:
-                zone_obj[record_set_name][record_type] = []
-
             if record_type == 'aaaa':
                 record_obj.update({'ip': record.ipv6_address})
             elif record_type == 'a':
@@ -1029,23 +1040,15 @@ def export_zone(cmd, resource_group_name, zone_name, file_name=None):
                     'retry': record.retry_time, 'expire': record.expire_time,
                     'minimum': record.minimum_ttl
                 })
-                zone_obj['$ttl'] = record.minimum_ttl
             elif record_type == 'srv':
                 record_obj.update({'priority': record.priority, 'weight': record.weight,
                                    'port': record.port, 'target': record.target})
             elif record_type == 'txt':
                 record_obj.update({'txt': ''.join(record.value)})
 
-            zone_obj[record_set_name][record_type].append(record_obj)
+            records.append(record_obj)
 
-    zone_file_content = make_zone_file(zone_obj)
-    print(zone_file_content)
-    if file_name:
-        try:
-            with open(file_name, 'w') as f:
-                f.write(zone_file_content)
-        except IOError:
-            raise CLIError('Unable to export to file: {}'.format(file_name))
+        yield record_set.name, {record_type: records}
 
 
 # pylint: disable=too-many-return-statements, inconsistent-return-statements
@@ -1080,10 +1083,13 @@ def _build_record(data):
                        .format(record_type, data['name'], ke))
 
 
-# pylint: disable=too-many-statements
-def import_zone(cmd, resource_group_name, zone_name, file_name):
+# pylint: disable=too-many-statements, too-many-locals, too-many-branches
+def import_zone(cmd, resource_group_name, zone_name, file_name, diff=False, delete_extraneous=False, concurrency=1):
     from azure.cli.core.util import read_file_content
     import sys
+    if delete_extraneous and not diff:
+        raise CLIError('usage error: --delete-extraneous requires --diff')
+
     file_text = read_file_content(file_name)
     zone_obj = parse_zone_file(file_text, zone_name)
 
@@ -1121,50 +1127,133 @@ def import_zone(cmd, resource_group_name, zone_name, file_name):
                 _add_record(record_set, record, record_set_type,
                             is_list=record_set_type.lower() not in ['soa', 'cname'])
 
-    total_records = 0
+    planned = OrderedDict()
     for key, rs in record_sets.items():
         rs_name, rs_type = key.lower().rsplit('.', 1)
-        rs_name = rs_name[:-(len(origin) + 1)] if rs_name != origin else '@'
-        try:
-            record_count = len(getattr(rs, _type_to_property_name(rs_type)))
-        except TypeError:
-            record_count = 1
-        total_records += record_count
+        rs_name = '@' if rs_name == origin else rs_name
+        if rs_name.endswith(origin):
+            rs_name = rs_name[:-(len(origin) + 1)]
+        planned[(rs_name, rs_type)] = rs
+
+    total_records = sum(_count_records(rs, rs_type) for (_, rs_type), rs in planned.items())
     cum_records = 0
 
     client = get_mgmt_service_client(cmd.cli_ctx, DnsManagementClient)
     print('== BEGINNING ZONE IMPORT: {} ==\n'.format(zone_name), file=sys.stderr)
-    client.zones.create_or_update(resource_group_name, zone_name, Zone('global'))
-    for key, rs in record_sets.items():
+    existing = None
+    if diff:
+        # list the zone once, only the record sets that differ from it are written
+        try:
+            client.zones.get(resource_group_name, zone_name)
+        except CloudError as ex:
+            if ex.status_code != 404:
+                raise
+            client.zones.create_or_update(resource_group_name, zone_name, Zone('global'))
+        existing = dict(((rs.name.lower(), rs.type.rsplit('/', 1)[1].lower()), rs)
+                        for rs in client.record_sets.list_by_dns_zone(resource_group_name, zone_name))
+    else:
+        client.zones.create_or_update(resource_group_name, zone_name, Zone('global'))
 
-        rs_name, rs_type = key.lower().rsplit('.', 1)
-        rs_name = '@' if rs_name == origin else rs_name
-        if rs_name.endswith(origin):
-            rs_name = rs_name[:-(len(origin) + 1)]
+    def _get_root_record_set(rs_type):
+        if existing is not None:
+            return existing[('@', rs_type)]
+        return client.record_sets.get(resource_group_name, zone_name, '@', rs_type.upper())
 
-        try:
-            record_count = len(getattr(rs, _type_to_property_name(rs_type)))
-        except TypeError:
-            record_count = 1
+    summary = Counter()
+    operations = []
+    for (rs_name, rs_type), rs in planned.items():
         if rs_name == '@' and rs_type == 'soa':
-            root_soa = client.record_sets.get(resource_group_name, zone_name, '@', 'SOA')
+            root_soa = _get_root_record_set('soa')
             rs.soa_record.host = root_soa.soa_record.host
-            rs_name = '@'
         elif rs_name == '@' and rs_type == 'ns':
-            root_ns = client.record_sets.get(resource_group_name, zone_name, '@', 'NS')
-            root_ns.ttl = rs.ttl
-            rs = root_ns
-            rs_type = rs.type.rsplit('/', 1)[1]
+            # the name servers of the zone are assigned by Azure, only the TTL is imported
+            root_ns = _get_root_record_set('ns')
+            rs = RecordSet(ttl=rs.ttl, ns_records=root_ns.ns_records, metadata=root_ns.metadata)
+
+        current = existing.get((rs_name, rs_type)) if existing is not None else None
+        if existing is None:
+            operations.append(('import', rs_name, rs_type, rs, None))
+        elif current is None:
+            operations.append(('create', rs_name, rs_type, rs, None))
+        elif _normalize_record_set(current, rs_type) == _normalize_record_set(rs, rs_type):
+            summary['unchanged'] += 1
+        else:
+            rs.metadata = current.metadata
+            operations.append(('update', rs_name, rs_type, rs, current.etag))
+
+    if delete_extraneous:
+        for (rs_name, rs_type), current in existing.items():
+            if (rs_name, rs_type) not in planned and not (rs_name == '@' and rs_type in ['soa', 'ns']):
+                operations.append(('delete', rs_name, rs_type, current, current.etag))
+
+    def _write(operation):
+        action, rs_name, rs_type, rs, etag = operation
         try:
-            client.record_sets.create_or_update(
-                resource_group_name, zone_name, rs_name, rs_type, rs)
-            cum_records += record_count
-            print("({}/{}) Imported {} records of type '{}' and name '{}'"
-                  .format(cum_records, total_records, record_count, rs_type, rs_name), file=sys.stderr)
+            if action == 'delete':
+                client.record_sets.delete(resource_group_name, zone_name, rs_name, rs_type, if_match=etag)
+            else:
+                client.record_sets.create_or_update(resource_group_name, zone_name, rs_name, rs_type, rs,
+                                                    if_match=etag, if_none_match='*' if action == 'create' else None)
+            return None
         except CloudError as ex:
-            logger.error(ex)
-    print("\n== {}/{} RECORDS IMPORTED SUCCESSFULLY: '{}' =="
-          .format(cum_records, total_records, zone_name), file=sys.stderr)
+            return ex
+
+    for operation, error in zip(operations, _map_bounded(_write, operations, concurrency)):
+        action, rs_name, rs_type, rs, _ = operation
+        if error:
+            logger.error(error)
+            continue
+        summary[{'import': 'imported', 'create': 'created', 'update': 'updated', 'delete': 'deleted'}[action]] += 1
+        if action == 'delete':
+            print("Deleted record set of type '{}' and name '{}'".format(rs_type, rs_name), file=sys.stderr)
+            continue
+        record_count = _count_records(rs, rs_type)
+        cum_records += record_count
+        print("({}/{}) Imported {} records of type '{}' and name '{}'"
+              .format(cum_records, total_records, record_count, rs_type, rs_name), file=sys.stderr)
+
+    if diff:
+        print('\n== {} CREATED, {} UPDATED, {} UNCHANGED, {} DELETED RECORD SETS: \'{}\' =='.format(
+            summary['created'], summary['updated'], summary['unchanged'], summary['deleted'], zone_name),
+            file=sys.stderr)
+    else:
+        print("\n== {}/{} RECORDS IMPORTED SUCCESSFULLY: '{}' =="
+              .format(cum_records, total_records, zone_name), file=sys.stderr)
+
+
+def _count_records(record_set, record_type):
+    try:
+        return len(getattr(record_set, _type_to_property_name(record_type)))
+    except TypeError:
+        return 1
+
+
+def _normalize_record_set(record_set, record_type):
+    """ The TTL and records of a record set in a comparable form, ignoring the order of the records and the case and
+    trailing dot of host names. """
+    host_attributes = ['cname', 'exchange', 'nsdname', 'ptrdname', 'target', 'host', 'email']
+    records = getattr(record_set, _type_to_property_name(record_type), None) or []
+    if not isinstance(records, list):
+        records = [records]
+    normalized = []
+    for record in records:
+        values = []
+        for attribute in sorted(record._attribute_map):  # pylint: disable=protected-access
+            value = getattr(record, attribute)
+            if attribute in host_attributes and value:
+                value = value.lower().rstrip('.')
+            values.append((attribute, value))
+        normalized.append(repr(values))
+    return record_set.ttl, sorted(normalized)
+
+
+def _map_bounded(func, items, concurrency):
+    """ Apply func to the items on up to `concurrency` threads, returning the results in the order of the items. """
+    if concurrency <= 1 or len(items) <= 1:
+        return [func(item) for item in items]
+    from concurrent.futures import ThreadPoolExecutor
+    with ThreadPoolExecutor(max_workers=min(concurrency, len(items))) as executor:
+        return list(executor.map(func, items))
 
 
 def add_dns_aaaa_record(cmd, resource_group_name, zone_name, record_set_name, ipv6_address):
@@ -1659,12 +1748,27 @@ def create_load_balancer(cmd, load_balancer_name, resource_group_name, location=
     return sdk_no_wait(no_wait, client.create_or_update, resource_group_name, deployment_name, properties)
 
 
+def get_load_balancer(cmd, resource_group_name, load_balancer_name, apply=False):
+    if apply and not has_deferred_changes(cmd, 'load_balancers', resource_group_name, load_balancer_name):
+        raise CLIError("Load balancer '{}' has no deferred changes.".format(load_balancer_name))
+    return cached_get(cmd, 'load_balancers', resource_group_name, load_balancer_name)
+
+
+def set_load_balancer(cmd, resource_group_name, load_balancer_name, parameters, defer=False):
+    return cached_put(cmd, 'load_balancers', resource_group_name, load_balancer_name, parameters, defer=defer)
+
+
+def _put_lb(cmd, resource_group_name, load_balancer_name, lb, defer=False):
+    """ PUT the load balancer and wait for the result, or only save it locally with --defer. """
+    result = cached_put(cmd, 'load_balancers', resource_group_name, load_balancer_name, lb, defer=defer)
+    return result if defer else result.result()
+
+
 def create_lb_inbound_nat_rule(
         cmd, resource_group_name, load_balancer_name, item_name, protocol, frontend_port,
-        backend_port, frontend_ip_name=None, floating_ip="false", idle_timeout=None):
+        backend_port, frontend_ip_name=None, floating_ip="false", idle_timeout=None, defer=False):
     InboundNatRule = cmd.get_models('InboundNatRule')
-    ncf = network_client_factory(cmd.cli_ctx)
-    lb = ncf.load_balancers.get(resource_group_name, load_balancer_name)
+    lb = cached_get(cmd, 'load_balancers', resource_group_name, load_balancer_name)
     if not frontend_ip_name:
         frontend_ip_name = _get_default_name(lb, 'frontend_ip_configurations', '--frontend-ip-name')
     frontend_ip = _get_property(lb.frontend_ip_configurations, frontend_ip_name)  # pylint: disable=no-member
@@ -1675,8 +1779,8 @@ def create_lb_inbound_nat_rule(
         enable_floating_ip=floating_ip == 'true',
         idle_timeout_in_minutes=idle_timeout)
     _upsert(lb, 'inbound_nat_rules', new_rule, 'name')
-    poller = ncf.load_balancers.create_or_update(resource_group_name, load_balancer_name, lb)
-    return _get_property(poller.result().inbound_nat_rules, item_name)
+    lb = _put_lb(cmd, resource_group_name, load_balancer_name, lb, defer)
+    return _get_property(lb.inbound_nat_rules, item_name)
 
 
 def set_lb_inbound_nat_rule(
@@ -1699,10 +1803,9 @@ def set_lb_inbound_nat_rule(
 
 def create_lb_inbound_nat_pool(
         cmd, resource_group_name, load_balancer_name, item_name, protocol, frontend_port_range_start,
-        frontend_port_range_end, backend_port, frontend_ip_name=None):
+        frontend_port_range_end, backend_port, frontend_ip_name=None, defer=False):
     InboundNatPool = cmd.get_models('InboundNatPool')
-    ncf = network_client_factory(cmd.cli_ctx)
-    lb = ncf.load_balancers.get(resource_group_name, load_balancer_name)
+    lb = cached_get(cmd, 'load_balancers', resource_group_name, load_balancer_name)
     if not frontend_ip_name:
         frontend_ip_name = _get_default_name(lb, 'frontend_ip_configurations', '--frontend-ip-name')
     frontend_ip = _get_property(lb.frontend_ip_configurations, frontend_ip_name) \
@@ -1715,8 +1818,8 @@ def create_lb_inbound_nat_pool(
         frontend_port_range_end=frontend_port_range_end,
         backend_port=backend_port)
     _upsert(lb, 'inbound_nat_pools', new_pool, 'name')
-    poller = ncf.load_balancers.create_or_update(resource_group_name, load_balancer_name, lb)
-    return _get_property(poller.result().inbound_nat_pools, item_name)
+    lb = _put_lb(cmd, resource_group_name, load_balancer_name, lb, defer)
+    return _get_property(lb.inbound_nat_pools, item_name)
 
 
 def set_lb_inbound_nat_pool(
@@ -1740,11 +1843,10 @@ def set_lb_inbound_nat_pool(
 def create_lb_frontend_ip_configuration(
         cmd, resource_group_name, load_balancer_name, item_name, public_ip_address=None,
         subnet=None, virtual_network_name=None, private_ip_address=None,
-        private_ip_address_allocation='dynamic', zone=None):
+        private_ip_address_allocation='dynamic', zone=None, defer=False):
     FrontendIPConfiguration, PublicIPAddress, Subnet = cmd.get_models(
         'FrontendIPConfiguration', 'PublicIPAddress', 'Subnet')
-    ncf = network_client_factory(cmd.cli_ctx)
-    lb = ncf.load_balancers.get(resource_group_name, load_balancer_name)
+    lb = cached_get(cmd, 'load_balancers', resource_group_name, load_balancer_name)
     new_config = FrontendIPConfiguration(
         name=item_name,
         private_ip_address=private_ip_address,
@@ -1756,8 +1858,8 @@ def create_lb_frontend_ip_configuration(
         new_config.zones = zone
 
     _upsert(lb, 'frontend_ip_configurations', new_config, 'name')
-    poller = ncf.load_balancers.create_or_update(resource_group_name, load_balancer_name, lb)
-    return _get_property(poller.result().frontend_ip_configurations, item_name)
+    lb = _put_lb(cmd, resource_group_name, load_balancer_name, lb, defer)
+    return _get_property(lb.frontend_ip_configurations, item_name)
 
 
 def set_lb_frontend_ip_configuration(
@@ -1785,27 +1887,25 @@ def set_lb_frontend_ip_configuration(
     return parent
 
 
-def create_lb_backend_address_pool(cmd, resource_group_name, load_balancer_name, item_name):
+def create_lb_backend_address_pool(cmd, resource_group_name, load_balancer_name, item_name, defer=False):
     BackendAddressPool = cmd.get_models('BackendAddressPool')
-    ncf = network_client_factory(cmd.cli_ctx)
-    lb = ncf.load_balancers.get(resource_group_name, load_balancer_name)
+    lb = cached_get(cmd, 'load_balancers', resource_group_name, load_balancer_name)
     new_pool = BackendAddressPool(name=item_name)
     _upsert(lb, 'backend_address_pools', new_pool, 'name')
-    poller = ncf.load_balancers.create_or_update(resource_group_name, load_balancer_name, lb)
-    return _get_property(poller.result().backend_address_pools, item_name)
+    lb = _put_lb(cmd, resource_group_name, load_balancer_name, lb, defer)
+    return _get_property(lb.backend_address_pools, item_name)
 
 
 def create_lb_probe(cmd, resource_group_name, load_balancer_name, item_name, protocol, port,
-                    path=None, interval=None, threshold=None):
+                    path=None, interval=None, threshold=None, defer=False):
     Probe = cmd.get_models('Probe')
-    ncf = network_client_factory(cmd.cli_ctx)
-    lb = ncf.load_balancers.get(resource_group_name, load_balancer_name)
+    lb = cached_get(cmd, 'load_balancers', resource_group_name, load_balancer_name)
     new_probe = Probe(
         protocol=protocol, port=port, interval_in_seconds=interval, number_of_probes=threshold,
         request_path=path, name=item_name)
     _upsert(lb, 'probes', new_probe, 'name')
-    poller = ncf.load_balancers.create_or_update(resource_group_name, load_balancer_name, lb)
-    return _get_property(poller.result().probes, item_name)
+    lb = _put_lb(cmd, resource_group_name, load_balancer_name, lb, defer)
+    return _get_property(lb.probes, item_name)
 
 
 def set_lb_probe(instance, parent, item_name, protocol=None, port=None,
@@ -1823,10 +1923,9 @@ def create_lb_rule(
         cmd, resource_group_name, load_balancer_name, item_name,
         protocol, frontend_port, backend_port, frontend_ip_name=None,
         backend_address_pool_name=None, probe_name=None, load_distribution='default',
-        floating_ip='false', idle_timeout=None):
+        floating_ip='false', idle_timeout=None, defer=False):
     LoadBalancingRule = cmd.get_models('LoadBalancingRule')
-    ncf = network_client_factory(cmd.cli_ctx)
-    lb = ncf.load_balancers.get(resource_group_name, load_balancer_name)
+    lb = cached_get(cmd, 'load_balancers', resource_group_name, load_balancer_name)
     if not frontend_ip_name:
         frontend_ip_name = _get_default_name(lb, 'frontend_ip_configurations', '--frontend-ip-name')
     if not backend_address_pool_name:
@@ -1845,8 +1944,8 @@ def create_lb_rule(
         enable_floating_ip=floating_ip == 'true',
         idle_timeout_in_minutes=idle_timeout)
     _upsert(lb, 'load_balancing_rules', new_rule, 'name')
-    poller = ncf.load_balancers.create_or_update(resource_group_name, load_balancer_name, lb)
-    return _get_property(poller.result().load_balancing_rules, item_name)
+    lb = _put_lb(cmd, resource_group_name, load_balancer_name, lb, defer)
+    return _get_property(lb.load_balancing_rules, item_name)
 
 
 def set_lb_rule(
@@ -2323,6 +2422,154 @@ def update_nsg_rule_2017_03_01(instance, protocol=None, source_address_prefix=No
         if destination_port_range is not None else instance.destination_port_range
     instance.priority = priority if priority is not None else instance.priority
     return instance
+
+
+def _load_nsg_rules(cmd, resource_group_name, rules_file):
+    """ Read the security rules of a JSON or YAML file, in the format of `az network nsg rule list`. Application
+    security groups can be given by name or ID. """
+    import json
+    import os
+    import yaml
+    from azure.cli.core.util import read_file_content
+
+    content = read_file_content(rules_file)
+    try:
+        if os.path.splitext(rules_file)[1].lower() in ['.yaml', '.yml']:
+            values = yaml.safe_load(content)
+        else:
+            values = json.loads(content)
+    except ValueError as ex:
+        raise CLIError("Failed to parse '{}': {}".format(rules_file, ex))
+    if isinstance(values, dict):
+        values = values.get('securityRules', values.get('security_rules'))
+    if not isinstance(values, list):
+        raise CLIError("usage error: '{}' must contain a list of security rules".format(rules_file))
+
+    SecurityRule = cmd.get_models('SecurityRule')
+    subscription_id = get_subscription_id(cmd.cli_ctx)
+    rules = []
+    for value in values:
+        for key in value:
+            if key.lower().replace('_', '') in ['sourceapplicationsecuritygroups',
+                                                'destinationapplicationsecuritygroups']:
+                value[key] = [x if isinstance(x, dict) else {'id': x if is_valid_resource_id(x) else resource_id(
+                    subscription=subscription_id, resource_group=resource_group_name,
+                    namespace='Microsoft.Network', type='applicationSecurityGroups', name=x)} for x in value[key] or []]
+        rule = SecurityRule.from_dict(value)
+        if not rule.name or rule.priority is None or not rule.direction:
+            raise CLIError("usage error: every security rule needs a name, a priority and a direction")
+        # the rules may come from another NSG
+        rule.id = None
+        rule.etag = None
+        # workaround for issue https://github.com/Azure/azure-rest-api-specs/issues/1591
+        rule.source_address_prefix = rule.source_address_prefix or ''
+        rule.destination_address_prefix = rule.destination_address_prefix or ''
+        rules.append(rule)
+    return rules
+
+
+def _normalize_nsg_rule(rule):
+    """ The settings of a security rule in a comparable form, ignoring the case and order of the ports, prefixes and
+    application security groups, and whether their singular or plural property is used. """
+    def _merge(singular, plural):
+        values = set(str(x).replace(' ', '').lower() for x in (plural or []) + [singular] if x not in [None, ''])
+        # a single port range such as 80-80
+        return tuple(sorted(x.split('-')[0] if x.count('-') == 1 and len(set(x.split('-'))) == 1 else x
+                            for x in values))
+
+    def _asg_ids(asgs):
+        return tuple(sorted(asg.id.lower() for asg in asgs or []))
+
+    return (int(rule.priority), rule.direction.lower(), (rule.access or '').lower(), (rule.protocol or '').lower(),
+            rule.description or '',
+            _merge(rule.source_address_prefix, rule.source_address_prefixes),
+            _merge(rule.source_port_range, rule.source_port_ranges),
+            _merge(rule.destination_address_prefix, rule.destination_address_prefixes),
+            _merge(rule.destination_port_range, rule.destination_port_ranges),
+            _asg_ids(getattr(rule, 'source_application_security_groups', None)),
+            _asg_ids(getattr(rule, 'destination_application_security_groups', None)))
+
+
+def sync_nsg_rules(cmd, resource_group_name, network_security_group_name, rules_file, delete_extraneous=False,
+                   concurrency=None):
+    rules = _load_nsg_rules(cmd, resource_group_name, rules_file)
+    ncf = network_client_factory(cmd.cli_ctx)
+    nsg = ncf.network_security_groups.get(resource_group_name, network_security_group_name)
+    current = dict((rule.name.lower(), rule) for rule in nsg.security_rules or [])
+
+    desired = OrderedDict()
+    priorities = {}
+    for rule in rules:
+        name = rule.name.lower()
+        priority = (rule.direction.lower(), int(rule.priority))
+        if name in desired:
+            raise CLIError("Security rule '{}' is defined more than once.".format(rule.name))
+        if priority in priorities:
+            raise CLIError("Security rules '{}' and '{}' have the same priority.".format(priorities[priority],
+                                                                                         rule.name))
+        desired[name] = rule
+        priorities[priority] = rule.name
+
+    summary = OrderedDict((action, []) for action in ['created', 'updated', 'deleted', 'unchanged'])
+    operations = []
+    for name, rule in desired.items():
+        if name not in current:
+            operations.append(('created', rule))
+        elif _normalize_nsg_rule(current[name]) == _normalize_nsg_rule(rule):
+            summary['unchanged'].append(current[name].name)
+        else:
+            operations.append(('updated', rule))
+    kept = []
+    for name, rule in current.items():
+        if name in desired:
+            continue
+        if delete_extraneous:
+            operations.append(('deleted', rule))
+            continue
+        priority = (rule.direction.lower(), int(rule.priority))
+        if priority in priorities:
+            raise CLIError("Security rule '{}' has the same priority as '{}'. Use --delete-extraneous to delete the "
+                           "security rules that are not in '{}'.".format(rule.name, priorities[priority], rules_file))
+        kept.append(rule)
+
+    if not operations:
+        return summary
+
+    if not concurrency:
+        nsg.security_rules = list(desired.values()) + kept
+        ncf.network_security_groups.create_or_update(resource_group_name, network_security_group_name, nsg).result()
+        for action, rule in operations:
+            summary[action].append(rule.name)
+        return summary
+
+    def _write(operation):
+        action, rule = operation
+        try:
+            if action == 'deleted':
+                ncf.security_rules.delete(resource_group_name, network_security_group_name, rule.name).result()
+            else:
+                ncf.security_rules.create_or_update(resource_group_name, network_security_group_name, rule.name,
+                                                    rule).result()
+            return None
+        except CloudError as ex:
+            return ex
+
+    # free the priorities of the deleted rules before they are reused
+    deletes = [x for x in operations if x[0] == 'deleted']
+    writes = [x for x in operations if x[0] != 'deleted']
+    applied, failed = [], []
+    for batch in [deletes, writes]:
+        for (action, rule), error in zip(batch, _map_bounded(_write, batch, concurrency)):
+            if error:
+                logger.error("Failed to sync security rule '%s': %s", rule.name, error)
+                failed.append('{} ({})'.format(rule.name, action))
+                continue
+            summary[action].append(rule.name)
+            applied.append('{} ({})'.format(rule.name, action))
+    if failed:
+        raise CLIError('{} of {} security rules failed to sync: {}. Synced: {}'.format(
+            len(failed), len(operations), ', '.join(failed), ', '.join(applied) or 'none'))
+    return summary
 # endregion
 
 
@@ -560,6 +560,25 @@ class DnsParseZoneFiles(unittest.TestCase):
             (172800, 'ns4-03.azure-dns.info.'),
         ])
 
+    def test_zone_file_lines(self):
+        zn = 'zone8.com.'
+        lines = [
+            '$TTL 1h\n',
+            '@ IN SOA ns1.zone8.com. hostmaster ( 2 ; serial\n',
+            '      1h 15m 2w 5m )\n',
+            '\n',
+            '  NS ns1\n',
+            'mx 300 IN A 10.0.0.1 ; named like a record type\n',
+            '\tIN 300 A 10.0.0.2\n',
+            'txt TXT ( "in" "(a ; b)"\n',
+            '  c )\n',
+        ]
+        zone = parse_zone_file(iter(lines), zn)
+        self._check_soa(zone, zn, 3600, 2, 3600, 900, 1209600, 300)
+        self._check_ns(zone, zn, [(3600, 'ns1.' + zn)])
+        self._check_a(zone, 'mx.' + zn, [(300, '10.0.0.1'), (300, '10.0.0.2')])
+        self._check_txt(zone, 'txt.' + zn, [(3600, None, 'in(a ; b)c')])
+
     def test_zone_import_errors(self):
         from knack.util import CLIError
         for f in ['fail1', 'fail2', 'fail3', 'fail4', 'fail5']:
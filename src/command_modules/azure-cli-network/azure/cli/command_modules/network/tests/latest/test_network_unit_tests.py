@@ -77,5 +77,289 @@ class TestNetworkUnitTests(unittest.TestCase):
         self.assertEqual(result[1].value, 'noodle')
 
 
+class TestDnsZoneImport(unittest.TestCase):
+
+    ZONE_FILE = '\n'.join([
+        '$ORIGIN zone.com.',
+        '$TTL 3600',
+        '@ IN SOA ns1-01.azure-dns.com. admin.zone.com. ( 1 3600 300 2419200 300 )',
+        '@ IN NS ns1-01.azure-dns.com.',
+        'www 3600 IN A 10.0.0.1',
+        'mail 3600 IN A 10.0.0.3',
+        'new 3600 IN A 10.0.0.4',
+        'host 3600 IN CNAME www.zone.com.'
+    ])
+
+    @staticmethod
+    def _record_set(name, record_type, etag, **kwargs):
+        from azure.mgmt.dns.models import RecordSet
+        record_set = RecordSet(ttl=3600, **kwargs)
+        record_set.name = name
+        record_set.type = 'Microsoft.Network/dnszones/' + record_type
+        record_set.etag = etag
+        return record_set
+
+    @mock.patch('azure.cli.command_modules.network.custom.get_mgmt_service_client', autospec=True)
+    def test_network_dns_zone_import_diff(self, client_factory):
+        import os
+        import tempfile
+        from azure.mgmt.dns.models import ARecord, CnameRecord, NsRecord, SoaRecord
+        from azure.cli.command_modules.network.custom import import_zone
+
+        client = client_factory.return_value
+        client.record_sets.list_by_dns_zone.return_value = [
+            self._record_set('@', 'SOA', 'e0', soa_record=SoaRecord(
+                host='ns1-01.azure-dns.com.', email='admin.zone.com.', serial_number=1, refresh_time=3600,
+                retry_time=300, expire_time=2419200, minimum_ttl=300)),
+            self._record_set('@', 'NS', 'e1', ns_records=[NsRecord(nsdname='ns1-01.azure-dns.com.')]),
+            self._record_set('www', 'A', 'e2', arecords=[ARecord(ipv4_address='10.0.0.1')]),
+            self._record_set('mail', 'A', 'e3', arecords=[ARecord(ipv4_address='10.0.0.2')],
+                             metadata={'owner': 'mail'}),
+            self._record_set('old', 'A', 'e4', arecords=[ARecord(ipv4_address='10.0.0.5')]),
+            self._record_set('host', 'CNAME', 'e5', cname_record=CnameRecord(cname='WWW.zone.com'))
+        ]
+
+        handle, path = tempfile.mkstemp()
+        with os.fdopen(handle, 'w') as f:
+            f.write(self.ZONE_FILE)
+        try:
+            import_zone(mock.MagicMock(), 'rg', 'zone.com', path, diff=True, delete_extraneous=True, concurrency=4)
+        finally:
+            os.remove(path)
+
+        client.zones.create_or_update.assert_not_called()
+        writes = dict((c[0][2], c) for c in client.record_sets.create_or_update.call_args_list)
+        self.assertEqual(sorted(writes), ['mail', 'new'])
+        self.assertEqual(writes['mail'][1], {'if_match': 'e3', 'if_none_match': None})
+        self.assertEqual(writes['mail'][0][4].metadata, {'owner': 'mail'})
+        self.assertEqual(writes['new'][1], {'if_match': None, 'if_none_match': '*'})
+        client.record_sets.delete.assert_called_once_with('rg', 'zone.com', 'old', 'a', if_match='e4')
+
+    def test_network_dns_zone_import_delete_requires_diff(self):
+        from azure.cli.command_modules.network.custom import import_zone
+        with self.assertRaises(CLIError):
+            import_zone(mock.MagicMock(), 'rg', 'zone.com', 'zone.txt', delete_extraneous=True)
+
+    @mock.patch('azure.cli.command_modules.network.custom.get_mgmt_service_client', autospec=True)
+    def test_network_dns_zone_export_stream(self, client_factory):
+        import os
+        import tempfile
+        from azure.mgmt.dns.models import ARecord, NsRecord, SoaRecord, TxtRecord
+        from azure.cli.command_modules.network.custom import export_zone
+        from azure.cli.command_modules.network.zone_file import parse_zone_file
+
+        record_sets = [
+            self._record_set('@', 'NS', 'e1', ns_records=[NsRecord(nsdname='ns1-01.azure-dns.com.')]),
+            self._record_set('@', 'SOA', 'e0', soa_record=SoaRecord(
+                host='ns1-01.azure-dns.com.', email='admin.zone.com.', serial_number=1, refresh_time=3600,
+                retry_time=300, expire_time=2419200, minimum_ttl=300)),
+            self._record_set('empty', 'A', 'e2', arecords=[]),
+            self._record_set('www', 'A', 'e3', arecords=[ARecord(ipv4_address='10.0.0.1'),
+                                                         ARecord(ipv4_address='10.0.0.2')]),
+            self._record_set('www', 'TXT', 'e4', txt_records=[TxtRecord(value=['a', 'b'])])
+        ]
+        client_factory.return_value.record_sets.list_by_dns_zone.return_value = iter(record_sets)
+
+        handle, path = tempfile.mkstemp()
+        os.close(handle)
+        try:
+            with mock.patch('sys.stdout'):
+                export_zone(mock.MagicMock(), 'rg', 'zone.com', path)
+            with open(path) as f:
+                text = f.read()
+        finally:
+            os.remove(path)
+
+        self.assertIn('$TTL 300\n', text)
+        self.assertEqual(text.count('\nwww '), 1)
+        zone = parse_zone_file(text, 'zone.com')
+        self.assertEqual(list(zone), ['zone.com.', 'www.zone.com.'])
+        self.assertEqual(zone['zone.com.']['soa']['minimum'], 300)
+        self.assertEqual([r['ip'] for r in zone['www.zone.com.']['a']], ['10.0.0.1', '10.0.0.2'])
+        self.assertEqual(zone['www.zone.com.']['txt'][0]['txt'], ['ab'])
+
+
+@mock.patch('azure.cli.core.commands.client_factory.get_subscription_id', lambda _: 'sub')
+@mock.patch('azure.cli.command_modules.network._util.network_client_factory', autospec=True)
+class TestNetworkDeferredChanges(unittest.TestCase):
+
+    def setUp(self):
+        import tempfile
+        from azure.mgmt.network.models import LoadBalancer
+        self.config_dir = tempfile.mkdtemp()
+        self.cmd = mock.MagicMock()
+        self.cmd.cli_ctx.config.config_dir = self.config_dir
+        self.cmd.get_models.return_value = LoadBalancer
+        self.lb = LoadBalancer(location='westus', probes=[], etag='W/"1"')
+        self.lb.name = 'lb1'
+
+    def tearDown(self):
+        import shutil
+        shutil.rmtree(self.config_dir, ignore_errors=True)
+
+    def test_network_deferred_changes_applied_in_one_put(self, client_factory):
+        from azure.mgmt.network.models import Probe
+        from azure.cli.command_modules.network._util import cached_get, cached_put, has_deferred_changes
+
+        client = client_factory.return_value.load_balancers
+        client.get.return_value = self.lb
+
+        for name in ['probe1', 'probe2']:
+            lb = cached_get(self.cmd, 'load_balancers', 'RG', 'lb1')
+            lb.probes.append(Probe(protocol='Tcp', port=80, name=name))
+            cached_put(self.cmd, 'load_balancers', 'RG', 'lb1', lb, defer=True)
+
+        client.get.assert_called_once_with('RG', 'lb1')
+        client.create_or_update.assert_not_called()
+        self.assertTrue(has_deferred_changes(self.cmd, 'load_balancers', 'rg', 'LB1'))
+
+        lb = cached_get(self.cmd, 'load_balancers', 'rg', 'lb1')
+        self.assertEqual(lb.location, 'westus')
+        self.assertEqual([p.name for p in lb.probes], ['probe1', 'probe2'])
+
+        cached_put(self.cmd, 'load_balancers', 'rg', 'lb1', lb)
+        client.create_or_update.assert_called_once_with('rg', 'lb1', lb, custom_headers={'If-Match': 'W/"1"'})
+        client.create_or_update.return_value.result.assert_called_once_with()
+        self.assertFalse(has_deferred_changes(self.cmd, 'load_balancers', 'rg', 'lb1'))
+
+    def test_network_deferred_changes_kept_when_apply_fails(self, client_factory):
+        from msrestazure.azure_exceptions import CloudError
+        from azure.cli.command_modules.network._util import cached_put, has_deferred_changes
+
+        client = client_factory.return_value.load_balancers
+        cached_put(self.cmd, 'load_balancers', 'rg', 'lb1', self.lb, defer=True)
+
+        modified = CloudError.__new__(CloudError)
+        modified.status_code = 412
+        client.create_or_update.return_value.result.side_effect = modified
+        with self.assertRaisesRegexp(CLIError, 'was modified since its changes were deferred'):
+            cached_put(self.cmd, 'load_balancers', 'rg', 'lb1', self.lb)
+        self.assertTrue(has_deferred_changes(self.cmd, 'load_balancers', 'rg', 'lb1'))
+
+        client.create_or_update.return_value.result.side_effect = CLIError('operation failed')
+        with self.assertRaisesRegexp(CLIError, 'operation failed'):
+            cached_put(self.cmd, 'load_balancers', 'rg', 'lb1', self.lb)
+        self.assertTrue(has_deferred_changes(self.cmd, 'load_balancers', 'rg', 'lb1'))
+
+    def test_network_deferred_apply_requires_changes(self, client_factory):
+        from azure.cli.command_modules.network.custom import get_load_balancer
+        with self.assertRaises(CLIError):
+            get_load_balancer(self.cmd, 'rg', 'lb1', apply=True)
+        client_factory.return_value.load_balancers.get.assert_not_called()
+
+
+@mock.patch('azure.cli.command_modules.network.custom.get_subscription_id', lambda _: 'sub')
+@mock.patch('azure.cli.command_modules.network.custom.network_client_factory', autospec=True)
+class TestNetworkNsgRuleSync(unittest.TestCase):
+
+    RULES = '\n'.join([
+        '- name: web',
+        '  priority: 100',
+        '  direction: Inbound',
+        '  access: Allow',
+        '  protocol: Tcp',
+        '  sourceAddressPrefix: "*"',
+        '  destinationPortRanges: [443, 80]',
+        '  sourcePortRange: "*"',
+        '- name: app',
+        '  priority: 200',
+        '  direction: Inbound',
+        '  access: Allow',
+        '  protocol: Tcp',
+        '  destination_application_security_groups: [appAsg]',
+        '  sourceAddressPrefixes: [10.0.0.0/24]',
+        '  destinationPortRange: 8080-8080',
+        '- name: ssh',
+        '  priority: 300',
+        '  direction: Inbound',
+        '  access: Allow',
+        '  protocol: Tcp',
+        '  destinationPortRange: "22"'
+    ])
+
+    def setUp(self):
+        import os
+        import tempfile
+        from azure.mgmt.network.models import SecurityRule
+        handle, self.path = tempfile.mkstemp(suffix='.yaml')
+        with os.fdopen(handle, 'w') as f:
+            f.write(self.RULES)
+        self.cmd = mock.MagicMock()
+        self.cmd.get_models.return_value = SecurityRule
+
+    def tearDown(self):
+        import os
+        os.remove(self.path)
+
+    def _nsg(self):
+        from azure.mgmt.network.models import (ApplicationSecurityGroup, NetworkSecurityGroup,
+                                               SecurityRule)
+        asg_id = '/subscriptions/sub/resourceGroups/RG/providers/Microsoft.Network/applicationSecurityGroups/appAsg'
+        return NetworkSecurityGroup(location='westus', security_rules=[
+            SecurityRule(name='Web', priority=100, direction='Inbound', access='Allow', protocol='Tcp',
+                         source_address_prefix='*', source_port_range='*', destination_address_prefix='',
+                         destination_port_ranges=['80', '443']),
+            SecurityRule(name='app', priority=200, direction='Inbound', access='Allow', protocol='Tcp',
+                         source_address_prefix='10.0.0.0/24', destination_port_range='8080',
+                         destination_application_security_groups=[ApplicationSecurityGroup(id=asg_id)]),
+            SecurityRule(name='old', priority=400, direction='Inbound', access='Deny', protocol='*')
+        ])
+
+    def test_network_nsg_rule_sync_single_update(self, client_factory):
+        from azure.cli.command_modules.network.custom import sync_nsg_rules
+        client = client_factory.return_value
+        client.network_security_groups.get.return_value = self._nsg()
+
+        result = sync_nsg_rules(self.cmd, 'rg', 'nsg1', self.path)
+
+        self.assertEqual(result, {'created': ['ssh'], 'updated': [], 'deleted': [], 'unchanged': ['Web', 'app']})
+        nsg = client.network_security_groups.create_or_update.call_args[0][2]
+        self.assertEqual([r.name for r in nsg.security_rules], ['web', 'app', 'ssh', 'old'])
+        client.security_rules.create_or_update.assert_not_called()
+
+        client.network_security_groups.create_or_update.reset_mock()
+        client.network_security_groups.get.return_value = nsg
+        result = sync_nsg_rules(self.cmd, 'rg', 'nsg1', self.path)
+        self.assertEqual(result['unchanged'], ['web', 'app', 'ssh'])
+        client.network_security_groups.create_or_update.assert_not_called()
+
+    def test_network_nsg_rule_sync_concurrent_rules(self, client_factory):
+        from azure.cli.command_modules.network.custom import sync_nsg_rules
+        client = client_factory.return_value
+        nsg = self._nsg()
+        nsg.security_rules[1].priority = 250
+        client.network_security_groups.get.return_value = nsg
+
+        result = sync_nsg_rules(self.cmd, 'rg', 'nsg1', self.path, delete_extraneous=True, concurrency=4)
+
+        self.assertEqual(result, {'created': ['ssh'], 'updated': ['app'], 'deleted': ['old'], 'unchanged': ['Web']})
+        client.security_rules.delete.assert_called_once_with('rg', 'nsg1', 'old')
+        self.assertEqual(sorted(c[0][2] for c in client.security_rules.create_or_update.call_args_list),
+                         ['app', 'ssh'])
+        client.network_security_groups.create_or_update.assert_not_called()
+
+    def test_network_nsg_rule_sync_concurrent_failures(self, client_factory):
+        from msrestazure.azure_exceptions import CloudError
+        from azure.cli.command_modules.network.custom import sync_nsg_rules
+        client = client_factory.return_value
+        client.network_security_groups.get.return_value = self._nsg()
+        rejected = CloudError.__new__(CloudError)
+        rejected.error, rejected.message = None, 'rejected'
+        client.security_rules.delete.return_value.result.side_effect = rejected
+
+        with self.assertRaisesRegexp(CLIError, r"1 of 2 security rules failed to sync: old \(deleted\). "
+                                               r"Synced: ssh \(created\)$"):
+            sync_nsg_rules(self.cmd, 'rg', 'nsg1', self.path, delete_extraneous=True, concurrency=4)
+        client.security_rules.create_or_update.assert_called_once()
+
+    def test_network_nsg_rule_sync_priority_conflict(self, client_factory):
+        from azure.cli.command_modules.network.custom import sync_nsg_rules
+        nsg = self._nsg()
+        nsg.security_rules[2].priority = 300
+        client_factory.return_value.network_security_groups.get.return_value = nsg
+        with self.assertRaisesRegexp(CLIError, "'old' has the same priority as 'ssh'"):
+            sync_nsg_rules(self.cmd, 'rg', 'nsg1', self.path)
+
+
 if __name__ == '__main__':
     unittest.main()
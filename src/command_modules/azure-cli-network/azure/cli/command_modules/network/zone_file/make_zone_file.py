@@ -26,6 +26,17 @@
 # pylint: skip-file
 from __future__ import print_function
 
+from collections import OrderedDict
+
+HEADER = """
+; Exported zone file from Azure DNS\n\
+;      Zone name: {zone_name}\n\
+;      Resource Group Name: {resource_group}\n\
+;      Date and time (UTC): {datetime}\n\n\
+$TTL {ttl}\n\
+$ORIGIN {origin}\n\
+    """
+
 
 def make_zone_file(json_obj):
     """
@@ -49,57 +60,101 @@ def make_zone_file(json_obj):
         "uri":     [ uri records ]
     }
     """
-    import azure.cli.command_modules.network.zone_file.record_processors as record_processors
     from six import StringIO
 
     zone_file = StringIO()
 
-    HEADER = """
-; Exported zone file from Azure DNS\n\
-;      Zone name: {zone_name}\n\
-;      Resource Group Name: {resource_group}\n\
-;      Date and time (UTC): {datetime}\n\n\
-$TTL {ttl}\n\
-$ORIGIN {origin}\n\
+    header = dict((key, json_obj.pop(key)) for key in ['zone-name', 'resource-group', 'datetime', '$ttl', '$origin'])
+    # any other string values are handled by the header
+    record_sets = ((name, record_set) for name, record_set in json_obj.items() if not isinstance(record_set, str))
+    write_zone_file(zone_file, header, record_sets)
+
+    result = zone_file.getvalue()
+    zone_file.close()
+
+    return result
+
+
+def write_zone_file(zone_file, header, record_sets):
     """
-    zone_name = json_obj.pop('zone-name')
-    print(HEADER.format(
-        zone_name=zone_name,
-        resource_group=json_obj.pop('resource-group'),
-        datetime=json_obj.pop('datetime'),
-        ttl=json_obj.pop('$ttl'),
-        origin=json_obj.pop('$origin')
-    ), file=zone_file)
+    Write the DNS zonefile to @zone_file as the record sets arrive.
 
-    for record_set_name in json_obj.keys():
+    @header holds the 'zone-name', 'resource-group', 'datetime' and '$origin' of make_zone_file.
+    @record_sets is an iterable of (name, {record type: [records]}) pairs. Consecutive pairs with the
+    same name are written as one group. When @header has no '$ttl', the minimum TTL of the SOA record
+    is used and the record sets are buffered until the SOA record is found.
+    """
+    zone_name = header['zone-name']
+    ttl = header.get('$ttl')
+    pending = []
 
-        record_set = json_obj[record_set_name]
-        if record_set_name.endswith(zone_name):
-            record_set_name = record_set_name[:-(len(zone_name) + 1)]
-        if isinstance(record_set, str):
-            # These are handled above so we can skip them
+    for record_set_name, record_set in _group_record_sets(record_sets):
+        if pending is None:
+            _write_record_set(zone_file, record_set_name, record_set, zone_name)
             continue
 
-        first_line = True
-        record_set_keys = list(record_set.keys())
-        if 'soa' in record_set_keys:
-            record_set_keys.remove('soa')
-            record_set_keys = ['soa'] + record_set_keys
+        pending.append((record_set_name, record_set))
+        if ttl is None and 'soa' in record_set:
+            ttl = record_set['soa'][0]['minimum']
+        if ttl is not None:
+            _write_header(zone_file, header, ttl, pending)
+            pending = None
 
-        for record_type in record_set_keys:
+    if pending is not None:
+        # no SOA record, fall back to the default TTL
+        _write_header(zone_file, header, 3600 if ttl is None else ttl, pending)
 
-            record = record_set[record_type]
-            if not isinstance(record, list):
-                record = [record]
 
-            for entry in record:
-                method = 'process_{}'.format(record_type.strip('$'))
-                getattr(record_processors, method)(zone_file, entry, record_set_name, first_line)
-                first_line = False
+def _group_record_sets(record_sets):
+    """
+    Merge consecutive record sets with the same name into a single {record type: [records]} dict
+    """
+    name = None
+    group = None
+    for record_set_name, record_set in record_sets:
+        if group is not None and record_set_name != name:
+            yield name, group
+            group = None
+        if group is None:
+            name = record_set_name
+            group = OrderedDict()
+        for record_type, records in record_set.items():
+            group.setdefault(record_type, []).extend(records if isinstance(records, list) else [records])
+    if group is not None:
+        yield name, group
+
+
+def _write_header(zone_file, header, ttl, record_sets):
+    """
+    Write the header followed by the record sets buffered until the TTL was known
+    """
+    print(HEADER.format(
+        zone_name=header['zone-name'],
+        resource_group=header['resource-group'],
+        datetime=header['datetime'],
+        ttl=ttl,
+        origin=header['$origin']
+    ), file=zone_file)
+    for record_set_name, record_set in record_sets:
+        _write_record_set(zone_file, record_set_name, record_set, header['zone-name'])
 
-            print('', file=zone_file)
 
-    result = zone_file.getvalue()
-    zone_file.close()
+def _write_record_set(zone_file, record_set_name, record_set, zone_name):
+    import azure.cli.command_modules.network.zone_file.record_processors as record_processors
 
-    return result
+    if record_set_name.endswith(zone_name):
+        record_set_name = record_set_name[:-(len(zone_name) + 1)]
+
+    first_line = True
+    record_set_keys = list(record_set.keys())
+    if 'soa' in record_set_keys:
+        record_set_keys.remove('soa')
+        record_set_keys = ['soa'] + record_set_keys
+
+    for record_type in record_set_keys:
+        for entry in record_set[record_type]:
+            method = 'process_{}'.format(record_type.strip('$'))
+            getattr(record_processors, method)(zone_file, entry, record_set_name, first_line)
+            first_line = False
+
+        print('', file=zone_file)
@@ -35,22 +35,18 @@ Known limitations:
     'TXT', 'SRV', 'SPF', 'URI', 'CAA'
 """
 
-import copy
-import datetime
-import time
-import argparse
 from collections import OrderedDict
 import re
 
+from six import string_types
+
 from knack.log import get_logger
 from knack.util import CLIError
 
 from azure.cli.command_modules.network.zone_file.configs import SUPPORTED_RECORDS
-from azure.cli.command_modules.network.zone_file.exceptions import InvalidLineException
 
 logger = get_logger(__name__)
 
-semicolon_regex = re.compile(r'(?:"[^"]*")*[^\\](;.*)')
 date_regex_dict = {
     'w': {'regex': re.compile(r'(\d*w)'), 'scale': 86400 * 7},
     'd': {'regex': re.compile(r'(\d*d)'), 'scale': 86400},
@@ -59,159 +55,63 @@ date_regex_dict = {
     's': {'regex': re.compile(r'(\d*s)'), 'scale': 1}
 }
 
-
-class ZonefileLineParser(argparse.ArgumentParser):
-    def error(self, message):
-        """
-        Silent error message
-        """
-        raise InvalidLineException(message)
-
-
-class IncorrectParserException(Exception):
-    pass
+line_regex = re.compile(r'[^\n]+')
+whitespace_regex = re.compile(r'\s*')
+# an unquoted run followed by an optional quoted string, which ends the token. Escaped characters are kept as is.
+token_regex = re.compile(r'((?:[^\s"\\]|\\.)*)(?:"((?:[^"\\]|\\.)*)("?))?', re.DOTALL)
+
+DIRECTIVES = ['$ORIGIN', '$TTL']
+
+# fields following the record type, as (name, conversion). A list field takes all remaining tokens.
+RECORD_FIELDS = {
+    'SOA': [('host', str), ('email', str), ('serial', int), ('refresh', str), ('retry', str), ('expire', str),
+            ('minimum', str)],
+    'NS': [('host', str)],
+    'A': [('ip', str)],
+    'AAAA': [('ip', str)],
+    'CAA': [('flags', int), ('tag', str), ('value', str)],
+    'CNAME': [('alias', str)],
+    'MX': [('preference', str), ('host', str)],
+    'PTR': [('host', str)],
+    'TXT': [('txt', list)],
+    'SRV': [('priority', int), ('weight', int), ('port', int), ('target', str)],
+    'SPF': [('txt', list)],
+    'URI': [('priority', int), ('weight', int), ('target', str)]
+}
 
 
-def _make_record_parser(parsers, rec_type, arg_defs):
+def _iter_lines(text):
     """
-    Make a parser for a given type of DNS record
+    Iterate over the non-empty lines of a string, or over any iterable of lines such as an open file
     """
-    parser = ZonefileLineParser(rec_type)
-    parser.add_argument('name', type=str)
-
-    for arg in arg_defs:
-        nargs = arg[2] if len(arg) > 2 else 1
-        parser.add_argument(arg[0], type=arg[1], nargs=nargs)
-
-    parsers.append(parser)
+    if isinstance(text, string_types):
+        return (match.group(0) for match in line_regex.finditer(text))
+    return text
 
 
-def _make_parser():
-    """
-    Make an array of parsers that can process different DNS record types
-    """
-    parsers = []
-
-    # parse $ORIGIN
-    origin = ZonefileLineParser('$ORIGIN')
-    origin.add_argument('DELIM', type=str)
-    origin.add_argument('value', type=str)
-    parsers.append(origin)
-
-    # parse $TTL
-    ttl = ZonefileLineParser('$TTL')
-    ttl.add_argument('DELIM', type=str)
-    ttl.add_argument('value', type=str)
-    parsers.append(ttl)
-
-    # parse each RR
-    _make_record_parser(parsers, 'SOA', [
-        ('ttl', str), ('DELIM', str),
-        ('host', str), ('email', str), ('serial', int), ('refresh', str),
-        ('retry', str), ('expire', str), ('minimum', str)
-    ])
-    _make_record_parser(parsers, 'SOA', [
-        ('DELIM', str), ('host', str), ('email', str), ('serial', int), ('refresh', str),
-        ('retry', str), ('expire', str), ('minimum', str)
-    ])
-    _make_record_parser(parsers, 'SOA', [
-        ('DELIM', str), ('host', str), ('email', str), ('serial', int), ('refresh', str),
-        ('retry', str), ('expire', str)
-    ])
-    _make_record_parser(parsers, 'NS', [('ttl', str, '?'), ('DELIM', str), ('host', str)])
-    _make_record_parser(parsers, 'A', [('ttl', str, '?'), ('DELIM', str), ('ip', str)])
-    _make_record_parser(parsers, 'AAAA', [('ttl', str, '?'), ('DELIM', str), ('ip', str)])
-    _make_record_parser(parsers, 'CAA', [('ttl', str, '?'), ('DELIM', str), ('flags', int), ('tag', str), ('value', str)])
-    _make_record_parser(parsers, 'CNAME', [('ttl', str, '?'), ('DELIM', str), ('alias', str)])
-    _make_record_parser(parsers, 'MX', [('ttl', str, '?'), ('DELIM', str), ('preference', str), ('host', str)])
-    _make_record_parser(parsers, 'TXT', [('ttl', str), ('DELIM', str), ('txt', str, '+')])
-    _make_record_parser(parsers, 'TXT', [('DELIM', str), ('txt', str, '+')])
-    _make_record_parser(parsers, 'PTR', [('ttl', str, '?'), ('DELIM', str), ('host', str)])
-    _make_record_parser(parsers, 'SRV', [('ttl', str, '?'), ('DELIM', str), ('priority', int), ('weight', int), ('port', int), ('target', str)])
-    _make_record_parser(parsers, 'SPF', [('ttl', str, '?'), ('DELIM', str), ('txt', str)])
-    _make_record_parser(parsers, 'URI', [('ttl', str, '?'), ('DELIM', str), ('priority', int), ('weight', int), ('target', str)])
-
-    return parsers
-
-
-def _tokenize_line(line, quote_strings=False, infer_name=True):
+def _tokenize_line(line):
     """
-    Tokenize a line:
-    * split tokens on whitespace
-    * treat quoted strings as a single token
+    Split a line into (value, starts_quoted, ends_quoted) tuples.
+    Quotes are removed from the value, escaped characters are kept.
     """
-    ret = []
-    escape = False
-    quote = False
-    tokbuf = ""
-    firstchar = True
-    ll = list(line)
-    while len(ll) > 0:
-        c = ll.pop(0)
-        if c.isspace():
-            if firstchar:
-                # used by the _add_record_names method
-                tokbuf += '$NAME' if infer_name else ' '
-
-            if not quote and not escape:
-                # end of token
-                if len(tokbuf) > 0:
-                    ret.append(tokbuf)
-                tokbuf = ''
-
-            elif escape:
-                # escaped space (can be inside or outside of quote)
-                tokbuf += '\\' + c
-                escape = False
-
-            elif quote:
-                # in quotes
-                tokbuf += c
-
-            else:
-                tokbuf = ''
-        elif c == '\\':
-            if escape:
-                # escape of an escape is valid part of the line sequence
-                tokbuf += '\\\\'
-                escape = False
-            else:
-                escape = True
-        elif c == '"':
-            if not escape:
-                if quote:
-                    # end of quote
-                    if quote_strings:
-                        tokbuf += '"'
-                    ret.append(tokbuf)
-                    tokbuf = ''
-                    quote = False
-                else:
-                    # beginning of quote
-                    if quote_strings:
-                        tokbuf += '"'
-                    quote = True
-            else:
-                # append the escaped quote
-                tokbuf += '\\"'
-                escape = False
+    tokens = []
+    pos = 0
+    end = len(line)
+    while True:
+        pos = whitespace_regex.match(line, pos).end()
+        if pos == end:
+            return tokens
+        match = token_regex.match(line, pos)
+        if match.end() == pos:
+            # a trailing backslash escapes nothing
+            pos += 1
+            continue
+        unquoted, quoted, closing_quote = match.groups()
+        if quoted is None:
+            tokens.append((unquoted, False, False))
         else:
-            # normal character
-            if escape:
-                # append escape character
-                tokbuf += '\\'
-
-            tokbuf += c
-            escape = False
-        firstchar = False
-
-    if len(tokbuf.strip(' \r\n\t')):
-        ret.append(tokbuf)
-
-    if len(ret) == 1 and ret[0] == '$NAME':
-        return []
-    else:
-        return ret
+            tokens.append((unquoted + quoted, not unquoted, bool(closing_quote)))
+        pos = match.end()
 
 
 def _find_comment_index(line):
@@ -248,180 +148,87 @@ def _find_comment_index(line):
     return -1
 
 
-def _serialize(tokens):
-    """
-    Serialize tokens:
-    * quote whitespace-containing tokens
-    """
-    ret = []
-    for tok in tokens:
-        if " " in tok:
-            tok = '"%s"' % tok
-
-        ret.append(tok)
-
-    return " ".join(ret)
-
-
-def _remove_comments(text):
+def _iter_record_tokens(lines):
     """
-    Remove comments from a zonefile
+    Yield the tokens of each record in a single pass:
+    * remove comments
+    * join the lines of records grouped with parenthesis
+    * a first token of None means the record name is inherited from the previous record
     """
-    ret = []
-    lines = text.split("\n")
+    tokens = []
+    grouping = False
     for line in lines:
-        if not line:
-            continue
-
         index = _find_comment_index(line)
         if index != -1:
             line = line[:index]
-        if line:
-            ret.append(line)
-
-    return "\n".join(ret)
-
-
-def _flatten(text):
-    """
-    Flatten the text:
-    * make sure each record is on one line.
-    * remove parenthesis
-    * remove Windows line endings
-    """
-    lines = text.split('\n')
-    SENTINEL = '%%%'
-
-    # tokens: sequence of non-whitespace separated by '' where a newline was
-    tokens = []
-    for line in (x for x in lines if len(x) > 0):
-        line = line.replace('\t', ' ')
-        tokens += _tokenize_line(line, quote_strings=True, infer_name=False)
-        tokens.append(SENTINEL)
-
-    # find (...) and turn it into a single line ("capture" it)
-    capturing = False
-    captured = []
-
-    flattened = []
-    while len(tokens) > 0:
-        tok = tokens.pop(0)
-
-        if tok == '$NAME':
-            tok = ' '
-
-        if not capturing and tok == SENTINEL:
-            # normal end-of-line
-            if len(captured) > 0:
-                flattened.append(" ".join(captured))
-                captured = []
+        if not line:
             continue
 
-        if tok.startswith("("):
-            # begin grouping
-            tok = tok.lstrip("(")
-            capturing = True
-
-        if capturing and tok.endswith(")"):
-            # end grouping.  next end-of-line will turn this sequence into a flat line
-            tok = tok.rstrip(")")
-            capturing = False
-
-        if tok != SENTINEL:
-            captured.append(tok)
-
-    return "\n".join(flattened)
-
-
-def _remove_class(text):
-    """
-    Remove the CLASS from each DNS record, if present.
-    The only class that gets used today (for all intents
-    and purposes) is 'IN'.
-    """
-    # see RFC 1035 for list of classes
-    lines = text.split("\n")
-    ret = []
-    for line in lines:
-        original_tokens = _tokenize_line(line)
-        tokens = []
-        for token in original_tokens:
-            if token.upper() != 'IN':
-                tokens.append(token)
-        ret.append(_serialize(tokens))
-    return "\n".join(ret)
-
-
-def _add_record_names(text):
+        line = line.replace('\t', ' ')
+        if not tokens and not grouping and line[0].isspace():
+            tokens.append(None)
+
+        for value, starts_quoted, ends_quoted in _tokenize_line(line):
+            if not starts_quoted and value.startswith('('):
+                # begin grouping
+                value = value.lstrip('(')
+                grouping = True
+            if grouping and not ends_quoted and value.endswith(')'):
+                # end grouping, the record ends with this line
+                value = value.rstrip(')')
+                grouping = False
+            if value:
+                tokens.append(value)
+
+        if not grouping:
+            if any(token is not None for token in tokens):
+                yield tokens
+            tokens = []
+
+    if tokens and any(token is not None for token in tokens):
+        yield tokens
+
+
+def _parse_record(tokens):
     """
-    Go through each line of the text and ensure that
-    a name is defined.  Use previous record name if there is none.
+    Parse the tokens of a record or directive into a dict, using the fields defined for its type
     """
-    global SUPPORTED_RECORDS
-
-    lines = text.split("\n")
-    ret = []
-    previous_record_name = None
-
-    for line in lines:
-        tokens = _tokenize_line(line)
-        if not tokens:
-            continue
-
-        record_name = tokens[0]
-        if record_name == '$NAME':
-            tokens = [previous_record_name] + tokens[1:]
-        elif not record_name.startswith('$'):
-            previous_record_name = record_name
-
-        ret.append(_serialize(tokens))
-
-    return "\n".join(ret)
-
-
-def _parse_record(parser, record_token):
-    global SUPPORTED_RECORDS
-
-    # match parser to record type
-    record_type = None
-    for i in range(3):
-        try:
-            if record_token[i] in SUPPORTED_RECORDS:
-                record_type = record_token[i]
+    name = tokens[0]
+    if name is None:
+        raise CLIError('Unable to determine record name: {}'.format(' '.join(tokens[1:])))
+
+    if name.upper() in DIRECTIVES:
+        if len(tokens) != 2:
+            raise CLIError('Unable to parse: {}'.format(' '.join(tokens)))
+        return {'DELIM': name, 'value': tokens[1], 'type': name.upper()}
+
+    # the type may be preceded by the TTL and the class, in any order
+    record = {'name': name}
+    index = 1
+    while index < min(len(tokens), 3) and tokens[index].upper() not in RECORD_FIELDS:
+        if tokens[index].upper() != 'IN':
+            if 'ttl' in record:
                 break
-        except KeyError:
-            break
-
-    if not record_type:
-        from knack.util import CLIError
-        raise CLIError('Unable to determine record type: {}'.format(' '.join(record_token)))
-
-    # move the record type to the front of the token list so it will conform to argparse
-    if record_type != parser.prog:
-        raise IncorrectParserException
+            record['ttl'] = tokens[index]
+        index += 1
+    if index == len(tokens) or tokens[index].upper() not in RECORD_FIELDS:
+        raise CLIError('Unable to determine record type: {}'.format(' '.join(tokens)))
 
-    try:
-        rr, unmatched = parser.parse_known_args(record_token)
-        assert len(unmatched) == 0, "Unmatched fields: %s" % unmatched
-    except (SystemExit, AssertionError, InvalidLineException):
-        # invalid argument
-        raise InvalidLineException(' '.join(record_token))
-
-    record = rr.__dict__
+    record_type = tokens[index].upper()
+    record['DELIM'] = tokens[index]
     record['type'] = record_type
 
-    # remove emtpy fields
-    for field in list(record.keys()):
-        if record[field] is None:
-            del record[field]
-
-    for key in record:
-        try:
-            if len(record[key]) == 1:
-                record[key] = record[key][0]
-        except TypeError:
-            continue
-
+    fields = RECORD_FIELDS[record_type]
+    values = tokens[index + 1:]
+    if fields[-1][1] is list and len(values) >= len(fields):
+        values = values[:len(fields) - 1] + [values[len(fields) - 1:]]
+    if len(values) != len(fields):
+        raise CLIError('Unable to parse: {}'.format(' '.join(tokens)))
+    try:
+        for (field, convert), value in zip(fields, values):
+            record[field] = convert(value)
+    except ValueError:
+        raise CLIError('Unable to parse: {}'.format(' '.join(tokens)))
     return record
 
 
@@ -474,16 +281,6 @@ def _post_process_ttl(zone):
                     record['ttl'] = ttl
 
 
-def _pre_process_txt_records(text):
-    """ This looks only for the cases of multiple text records not surrounded by quotes.
-    This must be done after flattening but before any tokenization occurs, as this strips out
-    the quotes. """
-    lines = text.split('\n')
-    for line in lines:
-        pass
-    return text
-
-
 def _post_process_txt_record(record, current_ttl):
     if not isinstance(record['txt'], list):
         record['txt'] = [record['txt']]
@@ -518,37 +315,27 @@ def _post_check_names(zone):
 
 def parse_zone_file(text, zone_name, ignore_invalid=False):
     """
-    Parse a zonefile into a dict
+    Parse a zonefile into a dict. The zone file can be given as a string or as an iterable of lines,
+    which is read in a single pass.
     """
-    parsers = _make_parser()
-
-    text = _remove_comments(text)
-    text = _flatten(text)
-    text = _remove_class(text)
-    text = _pre_process_txt_records(text)
-    text = _add_record_names(text)
-
     zone_obj = OrderedDict()
-    record_lines = text.split("\n")
     current_origin = zone_name.rstrip('.') + '.'
     current_ttl = 3600
     soa_processed = False
+    previous_record_name = None
 
-    for record_line in record_lines:
-        parse_match = False
-        record = None
-        for parser in parsers:
-            record_tokens = _tokenize_line(record_line)
-            try:
-                record = _parse_record(parser, record_tokens)
-                if record['DELIM'].lower() != record['type'].lower():
-                    raise IncorrectParserException
-                parse_match = True
-                break
-            except (InvalidLineException, IncorrectParserException):
+    for record_tokens in _iter_record_tokens(_iter_lines(text)):
+        if record_tokens[0] is None:
+            record_tokens[0] = previous_record_name
+        elif not record_tokens[0].startswith('$'):
+            previous_record_name = record_tokens[0]
+
+        try:
+            record = _parse_record(record_tokens)
+        except CLIError:
+            if ignore_invalid:
                 continue
-        if not parse_match and not ignore_invalid:
-            raise CLIError('Unable to parse: {}'.format(record_line))
+            raise
 
         record_type = record['type'].lower()
         if record_type.lower() == '$origin':
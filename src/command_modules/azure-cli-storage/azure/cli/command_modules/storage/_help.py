@@ -27,6 +27,28 @@ helps['storage entity insert'] = """
           short-summary: The server timeout, expressed in seconds.
 """
 
+helps['storage entity import'] = """
+    type: command
+    short-summary: Insert the entities of a JSON lines file into a table.
+    long-summary: Entities are sent in batch transactions of up to 100 entities that share a PartitionKey. A batch fails
+                  as a whole, e.g. when one of its entities already exists and --if-exists is fail.
+    examples:
+        - name: Copy a table to another account.
+          text: |
+            az storage entity export -t mytable -f mytable.jsonl --account-name source
+            az storage entity import -t mytable -f mytable.jsonl --account-name destination --concurrency 8
+"""
+
+helps['storage entity export'] = """
+    type: command
+    short-summary: Write the entities of a table to a JSON lines file.
+    long-summary: Each line holds one entity in the JSON format of the Table service, so the file can be imported with
+                  `az storage entity import`.
+    examples:
+        - name: Export a table by scanning four partition ranges in parallel.
+          text: az storage entity export -t mytable -f mytable.jsonl --partition-boundaries g n t --concurrency 4
+"""
+
 helps['storage blob upload'] = """
     type: command
     short-summary: Upload a file to a storage blob.
@@ -59,6 +59,16 @@ def load_arguments(self, _):  # pylint: disable=too-many-locals, too-many-statem
                                     action='store_true', validator=add_progress_callback)
     socket_timeout_type = CLIArgumentType(help='The socket timeout(secs), used by the service to regulate data flow.',
                                           type=int)
+    concurrency_type = CLIArgumentType(help='Maximum number of files or blobs to transfer at the same time. Transfers '
+                                            'that fail with a transient error are retried individually.', type=int)
+    copy_wait_type = CLIArgumentType(action='store_true',
+                                     help='Wait for the server-side copies to finish and report their throughput. '
+                                          'Failed copies are restarted, the command fails if some still do not '
+                                          'succeed.')
+    copy_resume_type = CLIArgumentType(action='store_true',
+                                       help='Skip the destinations whose last copy from the same source succeeded or '
+                                            'is still pending, so that an interrupted or partly failed batch can be '
+                                            'run again.')
 
     sas_help = 'The permissions the SAS grants. Allowed values: {}. Do not use if a stored access policy is ' \
                'referenced with --id that specifies this value. Can be combined.'
@@ -251,6 +261,9 @@ def load_arguments(self, _):  # pylint: disable=too-many-locals, too-many-statem
         c.argument('blob_type', options_list=('--type', '-t'), validator=validate_blob_type,
                    arg_type=get_enum_type(get_blob_types()))
         c.argument('validate_content', action='store_true', min_api='2016-05-31')
+        c.argument('resumable', action='store_true',
+                   help='Upload the blob in chunks that are recorded in a journal file next to the source file. When '
+                        'the upload is interrupted, running the command again only uploads the missing chunks.')
         c.extra('no_progress', progress_type)
         c.extra('socket_timeout', socket_timeout_type)
         # TODO: Remove once #807 is complete. Smart Create Generation requires this parameter.
@@ -272,6 +285,13 @@ def load_arguments(self, _):  # pylint: disable=too-many-locals, too-many-statem
         c.argument('destination', options_list=('--destination', '-d'))
         c.argument('max_connections', type=int,
                    help='Maximum number of parallel connections to use when the blob size exceeds 64MB.')
+        c.argument('concurrency', concurrency_type)
+        c.argument('sync', action='store_true', arg_group='Sync',
+                   help='Only upload the files that do not exist in the container, or differ from the blob in size, '
+                        'or were modified after the blob and do not match its Content-MD5.')
+        c.argument('delete_extraneous', action='store_true', arg_group='Sync',
+                   help='With --sync, delete the blobs under the destination path that match the pattern but have '
+                        'no local file.')
         c.argument('maxsize_condition', arg_group='Content Control')
         c.argument('validate_content', action='store_true', min_api='2016-05-31', arg_group='Content Control')
         c.argument('blob_type', options_list=('--type', '-t'), arg_type=get_enum_type(get_blob_types()))
@@ -297,6 +317,9 @@ def load_arguments(self, _):  # pylint: disable=too-many-locals, too-many-statem
         c.extra('socket_timeout', socket_timeout_type)
         c.argument('max_connections', type=int,
                    help='Maximum number of parallel connections to use when the blob size exceeds 64MB.')
+        c.argument('concurrency', concurrency_type,
+                   help='Maximum number of blobs to download at the same time. Progress is only reported when blobs '
+                        'are downloaded one at a time.')
 
     with self.argument_context('storage blob delete') as c:
         from .sdkutil import get_delete_blob_snapshot_type_names
@@ -346,6 +369,11 @@ def load_arguments(self, _):  # pylint: disable=too-many-locals, too-many-statem
         c.argument('source_share')
         c.argument('prefix', validator=process_blob_copy_batch_namespace)
 
+    with self.argument_context('storage blob copy start-batch') as c:
+        c.argument('concurrency', concurrency_type, help='Maximum number of copies to start at the same time.')
+        c.argument('wait', copy_wait_type)
+        c.argument('resume', copy_resume_type)
+
     with self.argument_context('storage blob incremental-copy start') as c:
         from azure.cli.command_modules.storage._validators import process_blob_source_uri
 
@@ -564,6 +592,9 @@ def load_arguments(self, _):  # pylint: disable=too-many-locals, too-many-statem
         c.argument('max_connections', arg_group='Download Control', type=int)
         c.argument('validate_content', action='store_true', min_api='2016-05-31')
         c.register_content_settings_argument(t_file_content_settings, update=False, arg_group='Content Settings')
+        c.argument('concurrency', concurrency_type,
+                   help='Maximum number of directories to create and files to upload at the same time. All '
+                        'directories are created before the first file is uploaded.')
         c.extra('no_progress', progress_type)
 
     with self.argument_context('storage file download-batch') as c:
@@ -572,11 +603,16 @@ def load_arguments(self, _):  # pylint: disable=too-many-locals, too-many-statem
         c.argument('destination', options_list=('--destination', '-d'))
         c.argument('max_connections', arg_group='Download Control', type=int)
         c.argument('validate_content', action='store_true', min_api='2016-05-31')
+        c.argument('concurrency', concurrency_type,
+                   help='Maximum number of directories to list and files to download at the same time. Progress is '
+                        'only reported when files are downloaded one at a time.')
         c.extra('no_progress', progress_type)
 
     with self.argument_context('storage file delete-batch') as c:
         from ._validators import process_file_batch_source_parameters
         c.argument('source', options_list=('--source', '-s'), validator=process_file_batch_source_parameters)
+        c.argument('concurrency', concurrency_type,
+                   help='Maximum number of directories to list and files to delete at the same time.')
 
     with self.argument_context('storage file copy start') as c:
         from azure.cli.command_modules.storage._validators import validate_source_uri
@@ -593,6 +629,11 @@ def load_arguments(self, _):  # pylint: disable=too-many-locals, too-many-statem
         c.argument('source_container')
         c.argument('source_share')
 
+    with self.argument_context('storage file copy start-batch') as c:
+        c.argument('concurrency', concurrency_type, help='Maximum number of copies to start at the same time.')
+        c.argument('wait', copy_wait_type)
+        c.argument('resume', copy_resume_type)
+
     with self.argument_context('storage cors list') as c:
         c.extra('services', validator=get_char_options_validator('bfqt', 'services'), default='bqft',
                 options_list='--services', required=False)
@@ -700,3 +741,20 @@ def load_arguments(self, _):  # pylint: disable=too-many-locals, too-many-statem
                    arg_type=get_enum_type(['none', 'minimal', 'full']),
                    help='Specifies how much metadata to include in the response payload.')
         c.argument('marker', validator=validate_marker, nargs='+')
+
+    with self.argument_context('storage entity import') as c:
+        c.argument('file_path', options_list=('--file', '-f'), type=file_type, completer=FilesCompleter(),
+                   help='JSON lines file with one entity per line, in the JSON format of the Table service.')
+        c.argument('if_exists', arg_type=get_enum_type(['fail', 'merge', 'replace']))
+        c.argument('concurrency', concurrency_type,
+                   help='Maximum number of batch transactions to send at the same time.')
+
+    with self.argument_context('storage entity export') as c:
+        c.argument('file_path', options_list=('--file', '-f'), type=file_type, completer=FilesCompleter(),
+                   help='JSON lines file to write the entities to, one per line.')
+        c.argument('filter', help='OData filter expression the exported entities must satisfy.')
+        c.argument('partition_boundaries', nargs='+',
+                   help='Space-separated partition keys that split the table into ranges which are exported in '
+                        'parallel. The order of the entities of different ranges in the file is not preserved.')
+        c.argument('concurrency', concurrency_type,
+                   help='Maximum number of partition ranges to export at the same time.')
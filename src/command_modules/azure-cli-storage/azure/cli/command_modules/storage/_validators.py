@@ -20,27 +20,109 @@ storage_account_key_options = {'primary': 'key1', 'secondary': 'key2'}
 # Utilities
 
 
-# pylint: disable=inconsistent-return-statements
+STORAGE_ACCOUNT_CACHE_FILE = 'storageAccounts.json'
+STORAGE_KEY_CACHE_FILE = 'storageKeys.json'
+
+
+def _get_account_id_cache(cli_ctx):
+    import os
+    from azure.cli.core._session import CacheSession
+    cache = CacheSession()
+    cache.load(os.path.join(cli_ctx.config.config_dir, STORAGE_ACCOUNT_CACHE_FILE))
+    return cache
+
+
+def _find_storage_account_id(cli_ctx, account_name):
+    rcf = get_mgmt_service_client(cli_ctx, ResourceType.MGMT_RESOURCE_RESOURCES)
+    query = "name eq '{}' and resourceType eq 'Microsoft.Storage/storageAccounts'".format(account_name)
+    acc = next(iter(rcf.resources.list(filter=query)), None)
+    if not acc:
+        raise ValueError("Storage account '{}' not found.".format(account_name))
+    return acc.id
+
+
+def _load_cached_account_key(cli_ctx, cache_key, ttl):
+    import json
+    import os
+    import time
+    try:
+        with open(os.path.join(cli_ctx.config.config_dir, STORAGE_KEY_CACHE_FILE), 'r') as f:
+            entry = json.load(f).get(cache_key)
+    except (OSError, IOError, ValueError):
+        return None
+    if entry and time.time() - entry['time'] < ttl:
+        return entry['key']
+    return None
+
+
+def _save_cached_account_key(cli_ctx, cache_key, key, ttl):
+    import json
+    import os
+    import time
+    path = os.path.join(cli_ctx.config.config_dir, STORAGE_KEY_CACHE_FILE)
+    try:
+        with open(path, 'r') as f:
+            cached = json.load(f)
+    except (OSError, IOError, ValueError):
+        cached = {}
+    now = time.time()
+    cached = {k: v for k, v in cached.items() if now - v['time'] < ttl}
+    cached[cache_key] = {'key': key, 'time': now}
+    # the keys grant full access to the accounts, only the current user may read the file
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(fd, 'w') as f:
+        json.dump(cached, f)
+
+
 def _query_account_key(cli_ctx, account_name):
-    """Query the storage account key. This is used when the customer doesn't offer account key but name."""
-    scf = get_mgmt_service_client(cli_ctx, ResourceType.MGMT_STORAGE)
-    acc = next((x for x in scf.storage_accounts.list() if x.name == account_name), None)
-    if acc:
-        from msrestazure.tools import parse_resource_id
-        rg = parse_resource_id(acc.id)['resource_group']
+    """Query the storage account key. This is used when the customer doesn't offer account key but name.
 
-        t_storage_account_keys, t_storage_account_list_keys_results = get_sdk(
-            cli_ctx,
-            ResourceType.MGMT_STORAGE,
-            'models.storage_account_keys#StorageAccountKeys',
-            'models.storage_account_list_keys_result#StorageAccountListKeysResult')
+    The resource id of the account is looked up with a filtered resources query and cached per subscription, the key
+    itself is only cached when [storage] key_cache_ttl is set to a number of seconds."""
+    from msrestazure.azure_exceptions import CloudError
+    from msrestazure.tools import parse_resource_id
 
+    scf = get_mgmt_service_client(cli_ctx, ResourceType.MGMT_STORAGE)
+    cache_key = '{}/{}'.format(scf.config.subscription_id, account_name).lower()
+    key_ttl = cli_ctx.config.getint('storage', 'key_cache_ttl', fallback=0)
+    if key_ttl > 0:
+        key = _load_cached_account_key(cli_ctx, cache_key, key_ttl)
+        if key:
+            return key
+
+    account_ids = _get_account_id_cache(cli_ctx)
+    account_id = account_ids.get(cache_key)
+    from_cache = bool(account_id)
+    if not from_cache:
+        account_id = account_ids[cache_key] = _find_storage_account_id(cli_ctx, account_name)
+
+    t_storage_account_keys, t_storage_account_list_keys_results = get_sdk(
+        cli_ctx,
+        ResourceType.MGMT_STORAGE,
+        'models.storage_account_keys#StorageAccountKeys',
+        'models.storage_account_list_keys_result#StorageAccountListKeysResult')
+
+    def _list_keys(resource_id):
+        keys = scf.storage_accounts.list_keys(parse_resource_id(resource_id)['resource_group'], account_name)
         if t_storage_account_keys:
-            return scf.storage_accounts.list_keys(rg, account_name).key1
+            return keys.key1
         elif t_storage_account_list_keys_results:
-            return scf.storage_accounts.list_keys(rg, account_name).keys[0].value  # pylint: disable=no-member
-    else:
-        raise ValueError("Storage account '{}' not found.".format(account_name))
+            return keys.keys[0].value  # pylint: disable=no-member
+        return None
+
+    try:
+        key = _list_keys(account_id)
+    except CloudError as ex:
+        if ex.status_code != 404 or not from_cache:
+            raise
+        # the cached account was deleted or moved to another resource group
+        del account_ids[cache_key]
+        account_id = account_ids[cache_key] = _find_storage_account_id(cli_ctx, account_name)
+        key = _list_keys(account_id)
+
+    if key and key_ttl > 0:
+        _save_cached_account_key(cli_ctx, cache_key, key, key_ttl)
+    return key
 
 
 # region PARAMETER VALIDATORS
@@ -350,3 +350,5 @@ def load_command_table(self, _):  # pylint: disable=too-many-locals, too-many-st
         g.storage_command('show', 'get_entity', table_transformer=transform_entity_show,
                           exception_handler=g.get_handler_suppress_404())
         g.storage_custom_command('insert', 'insert_table_entity')
+        g.storage_custom_command('import', 'import_table_entities')
+        g.storage_custom_command('export', 'export_table_entities')
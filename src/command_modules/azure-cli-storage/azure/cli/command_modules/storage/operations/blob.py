@@ -14,9 +14,14 @@ from azure.cli.command_modules.storage.util import (create_blob_service_from_sto
                                                     create_short_lived_container_sas,
                                                     filter_none, collect_blobs, collect_files,
                                                     mkdir_p, guess_content_type, normalize_blob_file_path,
-                                                    check_precondition_success)
+                                                    check_precondition_success, retry_transient_failure,
+                                                    parallel_map, AggregatedProgress, merge_sorted,
+                                                    is_same_copy_source, wait_for_copies, get_blob_copy_source,
+                                                    get_file_copy_source, raise_if_copies_failed)
 from azure.cli.command_modules.storage.url_quote_util import encode_for_url, make_encoded_file_url_and_params
 
+RESUMABLE_JOURNAL_SUFFIX = '.azupload'
+
 
 def set_blob_tier(client, container_name, blob_name, tier, blob_type='block', timeout=None):
     if blob_type == 'block':
@@ -47,11 +52,10 @@ def set_delete_policy(client, enable=None, days_retained=None):
 
 def storage_blob_copy_batch(cmd, client, source_client, destination_container=None,
                             destination_path=None, source_container=None, source_share=None,
-                            source_sas=None, pattern=None, dryrun=False):
+                            source_sas=None, pattern=None, dryrun=False, concurrency=1, wait=False, resume=False):
     """Copy a group of blob or files to a blob container."""
-    logger = None
+    logger = get_logger(__name__)
     if dryrun:
-        logger = get_logger(__name__)
         logger.warning('copy files or blobs to blob container')
         logger.warning('    account %s', client.account_name)
         logger.warning('  container %s', destination_container)
@@ -70,17 +74,8 @@ def storage_blob_copy_batch(cmd, client, source_client, destination_container=No
             source_sas = create_short_lived_container_sas(cmd, source_client.account_name, source_client.account_key,
                                                           source_container)
 
-        # pylint: disable=inconsistent-return-statements
-        def action_blob_copy(blob_name):
-            if dryrun:
-                logger.warning('  - copy blob %s', blob_name)
-            else:
-                return _copy_blob_to_blob_container(client, source_client, destination_container, destination_path,
-                                                    source_container, source_sas, blob_name)
-
-        return list(filter_none(action_blob_copy(blob) for blob in collect_blobs(source_client,
-                                                                                 source_container,
-                                                                                 pattern)))
+        sources = (get_blob_copy_source(source_client, source_container, source_sas, blob) for blob in
+                   collect_blobs(source_client, source_container, pattern))
 
     elif source_share:
         # copy blob from file share
@@ -92,51 +87,98 @@ def storage_blob_copy_batch(cmd, client, source_client, destination_container=No
             source_sas = create_short_lived_share_sas(cmd, source_client.account_name, source_client.account_key,
                                                       source_share)
 
-        # pylint: disable=inconsistent-return-statements
-        def action_file_copy(file_info):
-            dir_name, file_name = file_info
-            if dryrun:
-                logger.warning('  - copy file %s', os.path.join(dir_name, file_name))
-            else:
-                return _copy_file_to_blob_container(client, source_client, destination_container, destination_path,
-                                                    source_share, source_sas, dir_name, file_name)
-
-        return list(filter_none(action_file_copy(file) for file in collect_files(cmd,
-                                                                                 source_client,
-                                                                                 source_share,
-                                                                                 pattern)))
+        sources = (get_file_copy_source(source_client, source_share, source_sas, *file) for file in
+                   collect_files(cmd, source_client, source_share, pattern))
     else:
         raise ValueError('Fail to find source. Neither blob container or file share is specified')
 
+    if dryrun:
+        for source_name, _ in sources:
+            logger.warning('  - copy %s %s', 'blob' if source_container else 'file', source_name)
+        return []
+
+    # all copied blobs are under this prefix, one listing of it tells the copy state of every destination
+    destination_prefix = normalize_blob_file_path(destination_path, '') + '/' if destination_path else None
+    existing_copies = _get_blob_copy_states(cmd, client, destination_container, destination_prefix) if resume else {}
+    copy_blob = retry_transient_failure(client.copy_blob)
+
+    def _copy_action(source):
+        from azure.common import AzureException
+        source_name, source_url = source
+        blob_name = normalize_blob_file_path(destination_path, source_name)
+        copy = existing_copies.get(blob_name)
+        if copy and copy.status in ('success', 'pending') and is_same_copy_source(copy, source_url):
+            logger.info('Skipping %s, its copy is %s', blob_name, copy.status)
+            return blob_name, source_url, copy
+        try:
+            return blob_name, source_url, copy_blob(destination_container, blob_name, source_url)
+        except AzureException as ex:
+            from knack.util import CLIError
+            error_template = 'Failed to copy {} to container {}. {}'
+            raise CLIError(error_template.format(source_name, destination_container, ex))
+
+    results = []
+    pending = {}
+    for blob_name, source_url, copy in parallel_map(_copy_action, sources, concurrency):
+        results.append(client.make_blob_url(destination_container, blob_name))
+        if wait and copy.status == 'pending':
+            pending[blob_name] = (copy, source_url)
+
+    if pending:
+        failed = wait_for_copies(
+            dict((blob_name, copy) for blob_name, (copy, _) in pending.items()),
+            lambda blob_names: _get_blob_copy_states(cmd, client, destination_container, destination_prefix,
+                                                     blob_names),
+            lambda blob_name: copy_blob(destination_container, blob_name, pending[blob_name][1]))
+        raise_if_copies_failed(failed, len(results))
+    return results
+
+
+def _get_blob_copy_states(cmd, blob_service, container, prefix, blob_names=None):
+    """ The copy properties of the given blobs, or of all the blobs under the prefix, from a single listing. """
+    t_include = cmd.get_models('blob.models#Include')
+    blob_names = set(blob_names) if blob_names is not None else None
+    return dict((blob.name, blob.properties.copy) for blob in
+                blob_service.list_blobs(container, prefix=prefix, include=t_include(copy=True))
+                if blob_names is None or blob.name in blob_names)
+
 
 # pylint: disable=unused-argument
 def storage_blob_download_batch(client, source, destination, source_container_name, pattern=None, dryrun=False,
-                                progress_callback=None, max_connections=2):
+                                progress_callback=None, max_connections=2, concurrency=1):
+    created_folders = set()
 
-    def _download_blob(blob_service, container, destination_folder, normalized_blob_name, blob_name):
+    @retry_transient_failure
+    def _download_blob(blob_info):
         # TODO: try catch IO exception
-        destination_path = os.path.join(destination_folder, normalized_blob_name)
+        normalized_blob_name, blob_name = blob_info
+        destination_path = os.path.join(destination, normalized_blob_name)
         destination_folder = os.path.dirname(destination_path)
-        if not os.path.exists(destination_folder):
+        if destination_folder not in created_folders:
             mkdir_p(destination_folder)
+            created_folders.add(destination_folder)
 
-        blob = blob_service.get_blob_to_path(container, blob_name, destination_path, max_connections=max_connections,
-                                             progress_callback=progress_callback)
+        # the progress of concurrent downloads cannot be combined as the total size is not known while listing
+        blob = client.get_blob_to_path(source_container_name, blob_name, destination_path,
+                                       max_connections=max_connections,
+                                       progress_callback=progress_callback if concurrency <= 1 else None)
         return blob.name
 
-    source_blobs = collect_blobs(client, source_container_name, pattern)
-    blobs_to_download = {}
-    for blob_name in source_blobs:
-        # remove starting path seperator and normalize
-        normalized_blob_name = normalize_blob_file_path(None, blob_name)
-        if normalized_blob_name in blobs_to_download:
-            from knack.util import CLIError
-            raise CLIError('Multiple blobs with download path: `{}`. As a solution, use the `--pattern` parameter '
-                           'to select for a subset of blobs to download OR utilize the `storage blob download` '
-                           'command instead to download individual blobs.'.format(normalized_blob_name))
-        blobs_to_download[normalized_blob_name] = blob_name
+    def _blobs_to_download():
+        download_paths = set()
+        for blob_name in collect_blobs(client, source_container_name, pattern):
+            # remove starting path seperator and normalize
+            normalized_blob_name = normalize_blob_file_path(None, blob_name)
+            if normalized_blob_name in download_paths:
+                from knack.util import CLIError
+                raise CLIError('Multiple blobs with download path: `{}`. As a solution, use the `--pattern` parameter '
+                               'to select for a subset of blobs to download OR utilize the `storage blob download` '
+                               'command instead to download individual blobs.'.format(normalized_blob_name))
+            download_paths.add(normalized_blob_name)
+            yield normalized_blob_name, blob_name
 
     if dryrun:
+        source_blobs = [blob_name for _, blob_name in _blobs_to_download()]
         logger = get_logger(__name__)
         logger.warning('download action: from %s to %s', source, destination)
         logger.warning('    pattern %s', pattern)
@@ -147,8 +189,8 @@ def storage_blob_download_batch(client, source, destination, source_container_na
             logger.warning('  - %s', b)
         return []
 
-    return list(_download_blob(client, source_container_name, destination, blob_normed, blobs_to_download[blob_normed])
-                for blob_normed in blobs_to_download)
+    # downloads start while the container is still being listed
+    return list(parallel_map(_download_blob, _blobs_to_download(), concurrency))
 
 
 def storage_blob_upload_batch(cmd, client, source, destination, pattern=None,  # pylint: disable=too-many-locals
@@ -157,7 +199,8 @@ def storage_blob_upload_batch(cmd, client, source, destination, pattern=None,  #
                               content_settings=None, metadata=None, validate_content=False,
                               maxsize_condition=None, max_connections=2, lease_id=None, progress_callback=None,
                               if_modified_since=None, if_unmodified_since=None, if_match=None,
-                              if_none_match=None, timeout=None, dryrun=False):
+                              if_none_match=None, timeout=None, dryrun=False, concurrency=1, sync=False,
+                              delete_extraneous=False):
     def _create_return_result(blob_name, blob_content_settings, upload_result=None):
         blob_name = normalize_blob_file_path(destination_path, blob_name)
         return {
@@ -169,6 +212,16 @@ def storage_blob_upload_batch(cmd, client, source, destination, pattern=None,  #
     logger = get_logger(__name__)
     t_content_settings = cmd.get_models('blob.models#ContentSettings')
 
+    extraneous_blobs = []
+    if sync:
+        source_files, extraneous_blobs = _get_blob_sync_actions(client, destination_container_name, destination_path,
+                                                                source_files or [], pattern)
+        logger.warning('%d file(s) to upload, %d blob(s) without a local file', len(source_files),
+                       len(extraneous_blobs))
+    elif delete_extraneous:
+        from knack.util import CLIError
+        raise CLIError('usage error: --delete-extraneous can only be used with --sync')
+
     results = []
     if dryrun:
         logger.info('upload action: from %s to %s', source, destination)
@@ -179,34 +232,107 @@ def storage_blob_upload_batch(cmd, client, source, destination, pattern=None,  #
         results = []
         for src, dst in source_files or []:
             results.append(_create_return_result(dst, guess_content_type(src, content_settings, t_content_settings)))
+        if delete_extraneous:
+            for blob_name in extraneous_blobs:
+                logger.warning('  - delete %s', blob_name)
     else:
         @check_precondition_success
+        @retry_transient_failure
         def _upload_blob(*args, **kwargs):
             return upload_blob(*args, **kwargs)
 
-        for src, dst in source_files or []:
+        source_files = source_files or []
+        progress = None
+        if progress_callback and concurrency > 1:
+            # report the bytes of all files together rather than each file restarting the progress bar
+            sizes = [os.path.getsize(src) for src, _ in source_files]
+            progress = AggregatedProgress(progress_callback, sum(sizes))
+            source_files = [(src, dst, size) for (src, dst), size in zip(source_files, sizes)]
+        else:
+            source_files = [(src, dst, None) for src, dst in source_files]
+
+        def _upload_file(file_info):
+            src, dst, size = file_info
             logger.warning('uploading %s', src)
             guessed_content_settings = guess_content_type(src, content_settings, t_content_settings)
+            file_progress = progress.item(size) if progress else progress_callback
 
             include, result = _upload_blob(cmd, client, destination_container_name,
                                            normalize_blob_file_path(destination_path, dst), src,
                                            blob_type=blob_type, content_settings=guessed_content_settings,
                                            metadata=metadata, validate_content=validate_content,
                                            maxsize_condition=maxsize_condition, max_connections=max_connections,
-                                           lease_id=lease_id, progress_callback=progress_callback,
+                                           lease_id=lease_id, progress_callback=file_progress,
                                            if_modified_since=if_modified_since,
                                            if_unmodified_since=if_unmodified_since, if_match=if_match,
                                            if_none_match=if_none_match, timeout=timeout)
-            if include:
-                results.append(_create_return_result(dst, guessed_content_settings, result))
+            if progress:
+                file_progress.done()
+            return _create_return_result(dst, guessed_content_settings, result) if include else None
+
+        results = list(filter_none(parallel_map(_upload_file, source_files, concurrency)))
+
+        if delete_extraneous:
+            @retry_transient_failure
+            def _delete_blob(blob_name):
+                logger.warning('deleting %s', blob_name)
+                client.delete_blob(destination_container_name, blob_name, timeout=timeout)
+
+            list(parallel_map(_delete_blob, extraneous_blobs, concurrency))
 
     return results
 
 
+def _get_blob_sync_actions(client, container_name, destination_path, source_files, pattern):
+    """
+    Compare the local files with the blobs under the destination path. The local files are sorted by blob name and
+    merged with the listing, which the service returns in the same order, so the blobs are not held in memory.
+    Returns the source files that are new or changed and the names of the blobs without a local file.
+    """
+    from fnmatch import fnmatch
+    from operator import itemgetter
+
+    prefix = normalize_blob_file_path(destination_path, '') + '/' if destination_path else ''
+    pattern = pattern.lstrip('/') if pattern else None
+    local_files = sorted(((normalize_blob_file_path(destination_path, dst), src, dst) for src, dst in source_files),
+                         key=itemgetter(0))
+    remote_blobs = client.list_blobs(container_name, prefix=prefix or None)
+
+    files_to_upload, extraneous_blobs = [], []
+    for local_file, blob in merge_sorted(local_files, remote_blobs, itemgetter(0), lambda b: b.name):
+        if blob is None or (local_file and _is_local_file_changed(local_file[1], blob)):
+            files_to_upload.append(local_file[1:])
+        elif local_file is None and (not pattern or fnmatch(blob.name[len(prefix):], pattern)):
+            extraneous_blobs.append(blob.name)
+    return files_to_upload, extraneous_blobs
+
+
+def _is_local_file_changed(file_path, blob):
+    import calendar
+    properties = blob.properties
+    if os.path.getsize(file_path) != properties.content_length:
+        return True
+    if os.path.getmtime(file_path) <= calendar.timegm(properties.last_modified.utctimetuple()):
+        return False
+    # modified since the upload but of the same size, compare the content when the blob has an MD5 hash
+    content_md5 = properties.content_settings.content_md5
+    return not content_md5 or _get_file_md5(file_path) != content_md5
+
+
+def _get_file_md5(file_path):
+    import base64
+    import hashlib
+    md5 = hashlib.md5()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(4 * 1024 * 1024), b''):
+            md5.update(chunk)
+    return base64.b64encode(md5.digest()).decode('utf-8')
+
+
 def upload_blob(cmd, client, container_name, blob_name, file_path, blob_type=None, content_settings=None, metadata=None,
                 validate_content=False, maxsize_condition=None, max_connections=2, lease_id=None, tier=None,
                 if_modified_since=None, if_unmodified_since=None, if_match=None, if_none_match=None, timeout=None,
-                progress_callback=None):
+                progress_callback=None, resumable=False):
     """Upload a blob to a container."""
 
     t_content_settings = cmd.get_models('blob.models#ContentSettings')
@@ -275,12 +401,211 @@ def upload_blob(cmd, client, container_name, blob_name, file_path, blob_type=Non
 
         return client.create_blob_from_path(**create_blob_args)
 
+    def upload_resumable():
+        if blob_type == 'append':
+            from knack.util import CLIError
+            raise CLIError('usage error: --resumable is only supported for block and page blobs')
+
+        upload_args = {
+            'container_name': container_name,
+            'blob_name': blob_name,
+            'file_path': file_path,
+            'max_connections': max_connections,
+            'progress_callback': progress_callback,
+            'validate_content': validate_content and cmd.supported_api_version(min_api='2016-05-31'),
+            'lease_id': lease_id,
+            'timeout': timeout
+        }
+        precondition_args = {
+            'content_settings': content_settings,
+            'metadata': metadata,
+            'if_modified_since': if_modified_since,
+            'if_unmodified_since': if_unmodified_since,
+            'if_match': if_match,
+            'if_none_match': if_none_match
+        }
+        if blob_type == 'page':
+            if cmd.supported_api_version(min_api='2017-04-17') and tier:
+                precondition_args['premium_page_blob_tier'] = tier
+            return _upload_page_blob_resumable(cmd, client, create_args=precondition_args, **upload_args)
+        return _upload_block_blob_resumable(cmd, client, commit_args=precondition_args, **upload_args)
+
     type_func = {
         'append': upload_append_blob,
         'block': upload_block_blob,
         'page': upload_block_blob  # same implementation
     }
-    return type_func[blob_type]()
+    return upload_resumable() if resumable else type_func[blob_type]()
+
+
+class _UploadJournal(object):
+    """
+    Records the blocks or pages of an upload that were stored by the service in a file next to the source, so that
+    an interrupted upload resumes where it stopped. The journal is only reused when its header, which identifies the
+    destination and the version of the source file, is unchanged.
+    """
+
+    def __init__(self, file_path, header):
+        import threading
+        self.path = file_path + RESUMABLE_JOURNAL_SUFFIX
+        self.header = header
+        self.done = set()
+        self._file = None
+        self._lock = threading.Lock()
+
+    def open(self):
+        import json
+        resumed = False
+        try:
+            with open(self.path, 'r') as f:
+                lines = f.read().splitlines()
+            resumed = bool(lines) and json.loads(lines[0]) == self.header
+            if resumed:
+                self.done = set(line for line in lines[1:] if line)
+        except (IOError, OSError, ValueError):
+            pass
+
+        self._file = open(self.path, 'a' if resumed else 'w')
+        if not resumed:
+            self._file.write(json.dumps(self.header, sort_keys=True) + '\n')
+            self._file.flush()
+        return self
+
+    def record(self, entry):
+        with self._lock:
+            self._file.write(entry + '\n')
+            self._file.flush()
+
+    def close(self, completed=False):
+        self._file.close()
+        if completed:
+            os.remove(self.path)
+
+
+def _get_upload_journal(client, container_name, blob_name, file_path, blob_type, chunk_size):
+    stat = os.stat(file_path)
+    header = {
+        'account': client.account_name,
+        'container': container_name,
+        'blob': blob_name,
+        'type': blob_type,
+        'size': stat.st_size,
+        'mtime': stat.st_mtime,
+        'chunk': chunk_size
+    }
+    return _UploadJournal(file_path, header).open()
+
+
+def _map_file(file_path):
+    import mmap
+    with open(file_path, 'rb') as f:
+        if not os.fstat(f.fileno()).st_size:
+            return b''
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+def _upload_block_blob_resumable(cmd, client, container_name, blob_name, file_path, max_connections,
+                                 progress_callback, validate_content, lease_id, timeout, commit_args):
+    import hashlib
+    from azure.common import AzureMissingResourceHttpError
+
+    size = os.path.getsize(file_path)
+    # same block size rule as upload_block_blob, the block list is limited to 50,000 blocks
+    block_size = 100 * 1024 * 1024 if size > 50000 * 4 * 1024 * 1024 else client.MAX_BLOCK_SIZE
+    journal = _get_upload_journal(client, container_name, blob_name, file_path, 'block', block_size)
+
+    # block ids are derived from the journal header, so a changed file never reuses the blocks of an earlier version
+    version = hashlib.sha1(repr(sorted(journal.header.items())).encode('utf-8')).hexdigest()[:16]
+    block_ids = ['{}-{:06d}'.format(version, i) for i in range((size + block_size - 1) // block_size)]
+
+    if journal.done:
+        # the service discards uncommitted blocks after a week, only keep the ones it still has
+        try:
+            uncommitted = client.get_block_list(container_name, blob_name, block_list_type='uncommitted',
+                                                lease_id=lease_id, timeout=timeout).uncommitted_blocks
+        except AzureMissingResourceHttpError:
+            uncommitted = []
+        journal.done &= set(b.id for b in uncommitted)
+        get_logger(__name__).warning('resuming upload of %s, %d of %d blocks already uploaded', file_path,
+                                     len(journal.done), len(block_ids))
+
+    data = _map_file(file_path)
+    progress = AggregatedProgress(progress_callback, size)
+    progress.add(sum(min(block_size, size - i * block_size) for i, b in enumerate(block_ids) if b in journal.done))
+
+    @retry_transient_failure
+    def _put_block(index):
+        block = data[index * block_size:(index + 1) * block_size]
+        client.put_block(container_name, blob_name, block, block_ids[index], validate_content=validate_content,
+                         lease_id=lease_id, timeout=timeout)
+        journal.record(block_ids[index])
+        progress.add(len(block))
+
+    completed = False
+    try:
+        list(parallel_map(_put_block, (i for i, b in enumerate(block_ids) if b not in journal.done),
+                          max_connections))
+        t_blob_block = cmd.get_models('blob.models#BlobBlock')
+        result = client.put_block_list(container_name, blob_name, [t_blob_block(id=b) for b in block_ids],
+                                       validate_content=validate_content, lease_id=lease_id, timeout=timeout,
+                                       **commit_args)
+        completed = True
+    finally:
+        if data:
+            data.close()
+        journal.close(completed=completed)
+    return result
+
+
+def _upload_page_blob_resumable(cmd, client, container_name, blob_name, file_path, max_connections,
+                                progress_callback, validate_content, lease_id, timeout, create_args):
+    size = os.path.getsize(file_path)
+    if size % 512:
+        from knack.util import CLIError
+        raise CLIError('The size of a page blob must be a multiple of 512 bytes, {} is {} bytes.'.format(
+            file_path, size))
+
+    page_size = client.MAX_PAGE_SIZE
+    journal = _get_upload_journal(client, container_name, blob_name, file_path, 'page', page_size)
+    if journal.done and not client.exists(container_name, blob_name):
+        journal.done = set()
+    if journal.done:
+        get_logger(__name__).warning('resuming upload of %s, %d bytes already uploaded', file_path,
+                                     len(journal.done) * page_size)
+    else:
+        client.create_blob(container_name, blob_name, size, lease_id=lease_id, timeout=timeout, **create_args)
+
+    data = _map_file(file_path)
+    progress = AggregatedProgress(progress_callback, size)
+    pages = [str(i) for i in range((size + page_size - 1) // page_size)]
+    progress.add(sum(min(page_size, size - int(p) * page_size) for p in pages if p in journal.done))
+
+    @retry_transient_failure
+    def _update_page(page):
+        start = int(page) * page_size
+        chunk = data[start:start + page_size]
+        # a new page blob is all zeros, like the SDK only the pages with data are written
+        if chunk.count(b'\x00') != len(chunk):
+            client.update_page(container_name, blob_name, chunk, start, start + len(chunk) - 1,
+                               validate_content=validate_content, lease_id=lease_id, timeout=timeout)
+        journal.record(page)
+        progress.add(len(chunk))
+
+    completed = False
+    try:
+        list(parallel_map(_update_page, (p for p in pages if p not in journal.done), max_connections))
+        properties = client.get_blob_properties(container_name, blob_name, lease_id=lease_id,
+                                                timeout=timeout).properties
+        completed = True
+    finally:
+        if data:
+            data.close()
+        journal.close(completed=completed)
+
+    result = cmd.get_models('blob.models#ResourceProperties')()
+    result.etag = properties.etag
+    result.last_modified = properties.last_modified
+    return result
 
 
 def storage_blob_delete_batch(client, source, source_container_name, pattern=None, lease_id=None,
@@ -315,37 +640,3 @@ def storage_blob_delete_batch(client, source, source_container_name, pattern=Non
         return []
 
     return [result for include, result in (_delete_blob(blob) for blob in source_blobs) if include]
-
-
-def _copy_blob_to_blob_container(blob_service, source_blob_service, destination_container, destination_path,
-                                 source_container, source_sas, source_blob_name):
-    from azure.common import AzureException
-    source_blob_url = source_blob_service.make_blob_url(source_container, encode_for_url(source_blob_name),
-                                                        sas_token=source_sas)
-    destination_blob_name = normalize_blob_file_path(destination_path, source_blob_name)
-    try:
-        blob_service.copy_blob(destination_container, destination_blob_name, source_blob_url)
-        return blob_service.make_blob_url(destination_container, destination_blob_name)
-    except AzureException:
-        from knack.util import CLIError
-        error_template = 'Failed to copy blob {} to container {}.'
-        raise CLIError(error_template.format(source_blob_name, destination_container))
-
-
-def _copy_file_to_blob_container(blob_service, source_file_service, destination_container, destination_path,
-                                 source_share, source_sas, source_file_dir, source_file_name):
-    from azure.common import AzureException
-    file_url, source_file_dir, source_file_name = \
-        make_encoded_file_url_and_params(source_file_service, source_share, source_file_dir,
-                                         source_file_name, source_sas)
-
-    source_path = os.path.join(source_file_dir, source_file_name) if source_file_dir else source_file_name
-    destination_blob_name = normalize_blob_file_path(destination_path, source_path)
-
-    try:
-        blob_service.copy_blob(destination_container, destination_blob_name, file_url)
-        return blob_service.make_blob_url(destination_container, destination_blob_name)
-    except AzureException as ex:
-        from knack.util import CLIError
-        error_template = 'Failed to copy file {} to container {}. {}'
-        raise CLIError(error_template.format(source_file_name, destination_container, ex))
@@ -13,7 +13,10 @@ from knack.log import get_logger
 from azure.cli.command_modules.storage.util import (filter_none, collect_blobs, collect_files,
                                                     create_blob_service_from_storage_client,
                                                     create_short_lived_container_sas, create_short_lived_share_sas,
-                                                    guess_content_type)
+                                                    guess_content_type, parallel_map, retry_transient_failure,
+                                                    AggregatedProgress, normalize_blob_file_path, is_same_copy_source,
+                                                    wait_for_copies, get_blob_copy_source, get_file_copy_source,
+                                                    raise_if_copies_failed)
 from azure.cli.command_modules.storage.url_quote_util import encode_for_url, make_encoded_file_url_and_params
 
 
@@ -33,7 +36,7 @@ def list_share_files(cmd, client, share_name, directory_name=None, timeout=None,
 
 def storage_file_upload_batch(cmd, client, destination, source, destination_path=None, pattern=None, dryrun=False,
                               validate_content=False, content_settings=None, max_connections=1, metadata=None,
-                              progress_callback=None):
+                              progress_callback=None, concurrency=1):
     """ Upload local files to Azure Storage File Share in batch """
 
     from azure.cli.command_modules.storage.util import glob_files_locally, normalize_blob_file_path
@@ -51,16 +54,29 @@ def storage_file_upload_batch(cmd, client, destination, source, destination_path
                  'Type': guess_content_type(src, content_settings, settings_class).content_type} for src, dst in
                 source_files]
 
-    # TODO: Performance improvement
-    # 1. Upload files in parallel
-    def _upload_action(src, dst):
-        dst = normalize_blob_file_path(destination_path, dst)
+    source_files = [(src, normalize_blob_file_path(destination_path, dst)) for src, dst in source_files]
+
+    # create every directory up front, parents before children, so the uploads need no directory calls
+    _make_directories_in_files_share(client, destination, (os.path.dirname(dst) for _, dst in source_files),
+                                     concurrency)
+
+    progress = None
+    if progress_callback and concurrency > 1:
+        sizes = [os.path.getsize(src) for src, _ in source_files]
+        progress = AggregatedProgress(progress_callback, sum(sizes))
+        source_files = [(src, dst, size) for (src, dst), size in zip(source_files, sizes)]
+    else:
+        source_files = [(src, dst, None) for src, dst in source_files]
+
+    @retry_transient_failure
+    def _upload_action(file_info):
+        src, dst, size = file_info
         dir_name = os.path.dirname(dst)
         file_name = os.path.basename(dst)
+        file_progress = progress.item(size) if progress else progress_callback
 
-        _make_directory_in_files_share(client, destination, dir_name)
         create_file_args = {'share_name': destination, 'directory_name': dir_name, 'file_name': file_name,
-                            'local_file_path': src, 'progress_callback': progress_callback,
+                            'local_file_path': src, 'progress_callback': file_progress,
                             'content_settings': guess_content_type(src, content_settings, settings_class),
                             'metadata': metadata, 'max_connections': max_connections}
 
@@ -69,21 +85,23 @@ def storage_file_upload_batch(cmd, client, destination, source, destination_path
 
         logger.warning('uploading %s', src)
         client.create_file_from_path(**create_file_args)
+        if progress:
+            file_progress.done()
 
         return client.make_file_url(destination, dir_name, file_name)
 
-    return list(_upload_action(src, dst) for src, dst in source_files)
+    return list(parallel_map(_upload_action, source_files, concurrency))
 
 
 def storage_file_download_batch(cmd, client, source, destination, pattern=None, dryrun=False, validate_content=False,
-                                max_connections=1, progress_callback=None):
+                                max_connections=1, progress_callback=None, concurrency=1):
     """
     Download files from file share to local directory in batch
     """
 
     from azure.cli.command_modules.storage.util import glob_files_remotely, mkdir_p
 
-    source_files = glob_files_remotely(cmd, client, source, pattern)
+    source_files = glob_files_remotely(cmd, client, source, pattern, concurrency=concurrency)
 
     if dryrun:
         source_files_list = list(source_files)
@@ -101,13 +119,18 @@ def storage_file_download_batch(cmd, client, source, destination, pattern=None,
 
         return []
 
+    created_dirs = set()
+
+    @retry_transient_failure
     def _download_action(pair):
         destination_dir = os.path.join(destination, pair[0])
-        mkdir_p(destination_dir)
+        if destination_dir not in created_dirs:
+            mkdir_p(destination_dir)
+            created_dirs.add(destination_dir)
 
         get_file_args = {'share_name': source, 'directory_name': pair[0], 'file_name': pair[1],
                          'file_path': os.path.join(destination, *pair), 'max_connections': max_connections,
-                         'progress_callback': progress_callback}
+                         'progress_callback': progress_callback if concurrency <= 1 else None}
 
         if cmd.supported_api_version(min_api='2016-05-31'):
             get_file_args['validate_content'] = validate_content
@@ -115,18 +138,17 @@ def storage_file_download_batch(cmd, client, source, destination, pattern=None,
         client.get_file_to_path(**get_file_args)
         return client.make_file_url(source, *pair)
 
-    return list(_download_action(f) for f in source_files)
+    return list(parallel_map(_download_action, source_files, concurrency))
 
 
 def storage_file_copy_batch(cmd, client, source_client, destination_share=None, destination_path=None,
                             source_container=None, source_share=None, source_sas=None, pattern=None, dryrun=False,
-                            metadata=None, timeout=None):
+                            metadata=None, timeout=None, concurrency=1, wait=False, resume=False):
     """
     Copy a group of files asynchronously
     """
-    logger = None
+    logger = get_logger(__name__)
     if dryrun:
-        logger = get_logger(__name__)
         logger.warning('copy files or blobs to file share')
         logger.warning('    account %s', client.account_name)
         logger.warning('      share %s', destination_share)
@@ -142,26 +164,14 @@ def storage_file_copy_batch(cmd, client, source_client, destination_share=None,
         # if the source client is None, recreate one from the destination client.
         source_client = source_client or create_blob_service_from_storage_client(cmd, client)
 
-        # the cache of existing directories in the destination file share. the cache helps to avoid
-        # repeatedly create existing directory so as to optimize the performance.
-        existing_dirs = set([])
-
         if not source_sas:
             source_sas = create_short_lived_container_sas(cmd, source_client.account_name, source_client.account_key,
                                                           source_container)
 
-        # pylint: disable=inconsistent-return-statements
-        def action_blob_copy(blob_name):
-            if dryrun:
-                logger.warning('  - copy blob %s', blob_name)
-            else:
-                return _create_file_and_directory_from_blob(client, source_client, destination_share, source_container,
-                                                            source_sas, blob_name, destination_dir=destination_path,
-                                                            metadata=metadata, timeout=timeout,
-                                                            existing_dirs=existing_dirs)
-
-        return list(
-            filter_none(action_blob_copy(blob) for blob in collect_blobs(source_client, source_container, pattern)))
+        sources = (get_blob_copy_source(source_client, source_container, source_sas, blob) for blob in
+                   collect_blobs(source_client, source_container, pattern))
+        error_template = 'Failed to copy blob {} to file share {}. Please check if you have permission to read ' \
+                         'source or set a correct sas token.'
 
     elif source_share:
         # copy files from share to share
@@ -170,37 +180,75 @@ def storage_file_copy_batch(cmd, client, source_client, destination_share=None,
         # destination, therefore client is reused.
         source_client = source_client or client
 
-        # the cache of existing directories in the destination file share. the cache helps to avoid
-        # repeatedly create existing directory so as to optimize the performance.
-        existing_dirs = set([])
-
         if not source_sas:
             source_sas = create_short_lived_share_sas(cmd, source_client.account_name, source_client.account_key,
                                                       source_share)
 
-        # pylint: disable=inconsistent-return-statements
-        def action_file_copy(file_info):
-            dir_name, file_name = file_info
-            if dryrun:
-                logger.warning('  - copy file %s', os.path.join(dir_name, file_name))
-            else:
-                return _create_file_and_directory_from_file(client, source_client, destination_share, source_share,
-                                                            source_sas, dir_name, file_name,
-                                                            destination_dir=destination_path, metadata=metadata,
-                                                            timeout=timeout, existing_dirs=existing_dirs)
-
-        return list(filter_none(
-            action_file_copy(file) for file in collect_files(cmd, source_client, source_share, pattern)))
+        sources = (get_file_copy_source(source_client, source_share, source_sas, *file) for file in
+                   collect_files(cmd, source_client, source_share, pattern))
+        error_template = 'Failed to copy file {} from share %s to file share {}. Please check if you have right ' \
+                         'permission to read source or set a correct sas token.' % source_share
     else:
         # won't happen, the validator should ensure either source_container or source_share is set
         raise ValueError('Fail to find source. Neither blob container or file share is specified.')
 
+    if dryrun:
+        for source_name, _ in sources:
+            logger.warning('  - copy %s %s', 'blob' if source_container else 'file', source_name)
+        return []
 
-def storage_file_delete_batch(cmd, client, source, pattern=None, dryrun=False, timeout=None):
+    # the cache of existing directories in the destination file share. the cache helps to avoid
+    # repeatedly create existing directory so as to optimize the performance.
+    existing_dirs = set()
+    copy_file = retry_transient_failure(client.copy_file)
+    get_copy_state = retry_transient_failure(_get_file_copy_state)
+
+    def _copy_action(source):
+        from azure.common import AzureException
+        source_name, source_url = source
+        full_path = normalize_blob_file_path(destination_path, source_name)
+        dir_name, file_name = os.path.dirname(full_path), os.path.basename(full_path)
+        if resume:
+            copy = get_copy_state(client, destination_share, full_path)
+            if copy and copy.status in ('success', 'pending') and is_same_copy_source(copy, source_url):
+                logger.info('Skipping %s, its copy is %s', full_path, copy.status)
+                return full_path, source_url, copy
+
+        _make_directory_in_files_share(client, destination_share, dir_name, existing_dirs)
+        try:
+            return full_path, source_url, copy_file(destination_share, dir_name, file_name, source_url, metadata,
+                                                    timeout)
+        except AzureException:
+            from knack.util import CLIError
+            raise CLIError(error_template.format(source_name, destination_share))
+
+    results = []
+    pending = {}
+    for full_path, source_url, copy in parallel_map(_copy_action, sources, concurrency):
+        results.append(client.make_file_url(destination_share, os.path.dirname(full_path) or None,
+                                            os.path.basename(full_path)))
+        if wait and copy.status == 'pending':
+            pending[full_path] = (copy, source_url)
+
+    if pending:
+        def _get_copy_states(paths):
+            return dict(zip(paths, parallel_map(lambda p: get_copy_state(client, destination_share, p), paths,
+                                                concurrency)))
+
+        failed = wait_for_copies(
+            dict((full_path, copy) for full_path, (copy, _) in pending.items()), _get_copy_states,
+            lambda full_path: copy_file(destination_share, os.path.dirname(full_path), os.path.basename(full_path),
+                                        pending[full_path][1], metadata, timeout))
+        raise_if_copies_failed(failed, len(results))
+    return results
+
+
+def storage_file_delete_batch(cmd, client, source, pattern=None, dryrun=False, timeout=None, concurrency=1):
     """
     Delete files from file share in batch
     """
 
+    @retry_transient_failure
     def delete_action(file_pair):
         delete_file_args = {'share_name': source, 'directory_name': file_pair[0], 'file_name': file_pair[1],
                             'timeout': timeout}
@@ -208,9 +256,10 @@ def storage_file_delete_batch(cmd, client, source, pattern=None, dryrun=False, t
         return client.delete_file(**delete_file_args)
 
     from azure.cli.command_modules.storage.util import glob_files_remotely
-    source_files = list(glob_files_remotely(cmd, client, source, pattern))
+    source_files = glob_files_remotely(cmd, client, source, pattern, concurrency=concurrency)
 
     if dryrun:
+        source_files = list(source_files)
         logger = get_logger(__name__)
         logger.warning('delete files from %s', source)
         logger.warning('    pattern %s', pattern)
@@ -221,59 +270,17 @@ def storage_file_delete_batch(cmd, client, source, pattern=None, dryrun=False, t
             logger.warning('  - %s/%s', f[0], f[1])
         return []
 
-    return [delete_action(f) for f in source_files]
+    return list(parallel_map(delete_action, source_files, concurrency))
 
 
-def _create_file_and_directory_from_blob(file_service, blob_service, share, container, sas, blob_name,
-                                         destination_dir=None, metadata=None, timeout=None, existing_dirs=None):
-    """
-    Copy a blob to file share and create the directory if needed.
-    """
-    from azure.common import AzureException
-    from azure.cli.command_modules.storage.util import normalize_blob_file_path
-
-    blob_url = blob_service.make_blob_url(container, encode_for_url(blob_name), sas_token=sas)
-    full_path = normalize_blob_file_path(destination_dir, blob_name)
-    file_name = os.path.basename(full_path)
-    dir_name = os.path.dirname(full_path)
-    _make_directory_in_files_share(file_service, share, dir_name, existing_dirs)
-
+def _get_file_copy_state(file_service, share, path):
+    """ The properties of the last copy to a file, or None when the file does not exist. """
+    from azure.common import AzureMissingResourceHttpError
     try:
-        file_service.copy_file(share, dir_name, file_name, blob_url, metadata, timeout)
-        return file_service.make_file_url(share, dir_name, file_name)
-    except AzureException:
-        error_template = 'Failed to copy blob {} to file share {}. Please check if you have permission to read ' \
-                         'source or set a correct sas token.'
-        from knack.util import CLIError
-        raise CLIError(error_template.format(blob_name, share))
-
-
-def _create_file_and_directory_from_file(file_service, source_file_service, share, source_share, sas, source_file_dir,
-                                         source_file_name, destination_dir=None, metadata=None, timeout=None,
-                                         existing_dirs=None):
-    """
-    Copy a file from one file share to another
-    """
-    from azure.common import AzureException
-    from azure.cli.command_modules.storage.util import normalize_blob_file_path
-
-    file_url, source_file_dir, source_file_name = make_encoded_file_url_and_params(source_file_service, source_share,
-                                                                                   source_file_dir, source_file_name,
-                                                                                   sas_token=sas)
-
-    full_path = normalize_blob_file_path(destination_dir, os.path.join(source_file_dir, source_file_name))
-    file_name = os.path.basename(full_path)
-    dir_name = os.path.dirname(full_path)
-    _make_directory_in_files_share(file_service, share, dir_name, existing_dirs)
-
-    try:
-        file_service.copy_file(share, dir_name, file_name, file_url, metadata, timeout)
-        return file_service.make_file_url(share, dir_name or None, file_name)
-    except AzureException:
-        error_template = 'Failed to copy file {} from share {} to file share {}. Please check if ' \
-                         'you have right permission to read source or set a correct sas token.'
-        from knack.util import CLIError
-        raise CLIError(error_template.format(file_name, source_share, share))
+        return file_service.get_file_properties(share, os.path.dirname(path) or None,
+                                                os.path.basename(path)).properties.copy
+    except AzureMissingResourceHttpError:
+        return None
 
 
 def _make_directory_in_files_share(file_service, file_share, directory_path, existing_dirs=None):
@@ -282,7 +289,7 @@ def _make_directory_in_files_share(file_service, file_share, directory_path, exi
 
     This method accept a existing_dirs set which serves as the cache of existing directory. If the
     parameter is given, the method will search the set first to avoid repeatedly create directory
-    which already exists.
+    which already exists. The set can be shared by threads, at worst a directory is created twice.
     """
     from azure.common import AzureHttpError
 
@@ -296,7 +303,7 @@ def _make_directory_in_files_share(file_service, file_share, directory_path, exi
         p = os.path.dirname(p)
 
     for dir_name in reversed(parents):
-        if existing_dirs and (dir_name in existing_dirs):
+        if existing_dirs is not None and (dir_name in existing_dirs):
             continue
 
         try:
@@ -305,5 +312,32 @@ def _make_directory_in_files_share(file_service, file_share, directory_path, exi
             from knack.util import CLIError
             raise CLIError('Failed to create directory {}'.format(dir_name))
 
-        if existing_dirs:
-            existing_dirs.add(directory_path)
+        if existing_dirs is not None:
+            existing_dirs.add(dir_name)
+
+
+def _make_directories_in_files_share(file_service, file_share, directory_paths, concurrency=1):
+    """
+    Create the given directories and all their parents. The directories of one depth are created concurrently, after
+    the ones of the depth above, and each directory is created only once.
+    """
+    from collections import defaultdict
+    from azure.common import AzureHttpError
+
+    levels = defaultdict(set)
+    for directory_path in directory_paths:
+        while directory_path and directory_path not in levels[directory_path.count('/')]:
+            levels[directory_path.count('/')].add(directory_path)
+            directory_path = os.path.dirname(directory_path)
+
+    create_directory = retry_transient_failure(file_service.create_directory)
+
+    def _create_directory(dir_name):
+        try:
+            create_directory(share_name=file_share, directory_name=dir_name, fail_on_exist=False)
+        except AzureHttpError:
+            from knack.util import CLIError
+            raise CLIError('Failed to create directory {}'.format(dir_name))
+
+    for depth in sorted(levels):
+        list(parallel_map(_create_directory, sorted(levels[depth]), concurrency))
@@ -14,3 +14,217 @@ def insert_table_entity(client, table_name, entity, if_exists='fail', timeout=No
     else:
         from knack.util import CLIError
         raise CLIError("Unrecognized value '{}' for --if-exists".format(if_exists))
+
+
+TABLE_BATCH_MAX_ENTITIES = 100
+# the batch payload is limited to 4 MiB, leave room for the multipart envelope of each operation
+TABLE_BATCH_MAX_BYTES = 3 * 1024 * 1024
+# entities waiting for their partition's batch to fill up, the oldest partition is sent once this is reached
+TABLE_IMPORT_MAX_BUFFERED = 10000
+
+
+def import_table_entities(cmd, client, table_name, file_path, if_exists='fail', concurrency=1, timeout=None):
+    """ Insert the entities of a JSON lines file in batch transactions of up to 100 entities of a partition. """
+    from knack.util import CLIError
+    from azure.common import AzureException
+    from azure.cli.command_modules.storage.sdkutil import get_table_data_type
+    from azure.cli.command_modules.storage.util import parallel_map, retry_transient_failure
+
+    t_table_batch, t_entity_property, t_edm_type = get_table_data_type(cmd.cli_ctx, 'table', 'TableBatch',
+                                                                       'EntityProperty', 'EdmType')
+    try:
+        add_operation = {'fail': 'insert_entity', 'merge': 'insert_or_merge_entity',
+                         'replace': 'insert_or_replace_entity'}[if_exists]
+    except KeyError:
+        raise CLIError("Unrecognized value '{}' for --if-exists".format(if_exists))
+
+    commit_batch = retry_transient_failure(client.commit_batch)
+
+    def _commit(batch_info):
+        partition_key, line, entities = batch_info
+        batch = t_table_batch()
+        for entity in entities:
+            getattr(batch, add_operation)(entity)
+        try:
+            commit_batch(table_name, batch, timeout=timeout)
+        except AzureException as ex:
+            raise CLIError('Failed to import the batch of {} entities of partition {} starting at line {}: {}'.format(
+                len(entities), partition_key, line, ex))
+        return len(entities)
+
+    with open(file_path, 'r') as f:
+        entities = _read_entities(f, t_entity_property, t_edm_type)
+        counts = list(parallel_map(_commit, _group_entity_batches(entities), concurrency))
+    return {'entities': sum(counts), 'batches': len(counts)}
+
+
+# pylint: disable=redefined-builtin
+def export_table_entities(cmd, client, table_name, file_path, filter=None, select=None, partition_boundaries=None,
+                          concurrency=1, timeout=None):
+    """ Write the entities of a table to a JSON lines file, following every page of the query. """
+    import threading
+    from azure.cli.command_modules.storage.sdkutil import get_table_data_type
+    from azure.cli.command_modules.storage.util import parallel_map
+
+    t_entity_property = get_table_data_type(cmd.cli_ctx, 'table', 'EntityProperty')
+    lock = threading.Lock()
+
+    with open(file_path, 'w') as f:
+        def _export_range(range_filter):
+            count = 0
+            for entity in client.query_entities(table_name, filter=range_filter, select=select, timeout=timeout):
+                line = _serialize_entity(entity, t_entity_property)
+                with lock:
+                    f.write(line + '\n')
+                count += 1
+            return count
+
+        ranges = _get_partition_range_filters(filter, partition_boundaries)
+        return {'entities': sum(parallel_map(_export_range, ranges, concurrency))}
+
+
+def _group_entity_batches(entities):
+    """
+    Group the (line, entity, size) of the parsed entities into (partition key, first line, entities) batches that a
+    single transaction can hold.
+    """
+    from collections import OrderedDict
+
+    pending = OrderedDict()
+    buffered = 0
+    for line, entity, entity_size in entities:
+        partition_key = entity['PartitionKey']
+        batch_line, batch, size = pending.pop(partition_key, (line, [], 0))
+        if batch and size + entity_size > TABLE_BATCH_MAX_BYTES:
+            buffered -= len(batch)
+            yield partition_key, batch_line, batch
+            batch_line, batch, size = line, [], 0
+
+        batch.append(entity)
+        buffered += 1
+        if len(batch) == TABLE_BATCH_MAX_ENTITIES:
+            buffered -= len(batch)
+            yield partition_key, batch_line, batch
+        else:
+            pending[partition_key] = (batch_line, batch, size + entity_size)
+
+        if buffered >= TABLE_IMPORT_MAX_BUFFERED:
+            oldest_key, (oldest_line, oldest_batch, _) = pending.popitem(last=False)
+            buffered -= len(oldest_batch)
+            yield oldest_key, oldest_line, oldest_batch
+
+    for partition_key, (batch_line, batch, _) in pending.items():
+        yield partition_key, batch_line, batch
+
+
+def _get_partition_range_filters(filter_expression, partition_boundaries):
+    """ Split a query into the ranges of partition keys between the sorted boundaries. """
+    if not partition_boundaries:
+        return [filter_expression]
+
+    def _quote(key):
+        return "'{}'".format(key.replace("'", "''"))
+
+    boundaries = [None] + sorted(partition_boundaries) + [None]
+    filters = []
+    for lower, upper in zip(boundaries, boundaries[1:]):
+        conditions = ['({})'.format(filter_expression)] if filter_expression else []
+        if lower is not None:
+            conditions.append('PartitionKey ge {}'.format(_quote(lower)))
+        if upper is not None:
+            conditions.append('PartitionKey lt {}'.format(_quote(upper)))
+        filters.append(' and '.join(conditions))
+    return filters
+
+
+# Entities are stored in the JSON format of the Table service: a property whose type does not follow from its JSON
+# value carries an `<name>@odata.type` annotation, e.g. "Count@odata.type": "Edm.Int64", "Count": "42".
+
+def _serialize_entity(entity, t_entity_property):
+    import json
+    import uuid
+    from base64 import b64encode
+    from datetime import datetime
+    import six
+
+    def _typed(edm_type, value):
+        if edm_type == 'Edm.Binary':
+            return b64encode(value).decode('ascii')
+        if edm_type == 'Edm.DateTime':
+            return value.strftime('%Y-%m-%dT%H:%M:%S.%fZ') if isinstance(value, datetime) else value
+        if edm_type in ('Edm.Int64', 'Edm.Double', 'Edm.Guid'):
+            return str(value)
+        return value
+
+    result = {}
+    for name, value in entity.items():
+        if name == 'etag':
+            continue
+        if isinstance(value, t_entity_property):
+            edm_type, value = value.type, value.value
+        elif isinstance(value, bool):
+            edm_type = None
+        elif isinstance(value, six.integer_types):
+            edm_type = 'Edm.Int64'  # the SDK returns Int32 properties as EntityProperty
+        elif isinstance(value, float):
+            edm_type = 'Edm.Double'
+        elif isinstance(value, datetime):
+            edm_type = 'Edm.DateTime'
+        elif isinstance(value, six.binary_type) and not isinstance(value, six.string_types):
+            edm_type = 'Edm.Binary'
+        elif isinstance(value, uuid.UUID):
+            edm_type = 'Edm.Guid'  # the SDK returns GUID properties as UUID
+        else:
+            edm_type = None
+
+        if edm_type and edm_type not in ('Edm.Int32', 'Edm.String', 'Edm.Boolean'):
+            result[name + '@odata.type'] = edm_type
+        result[name] = _typed(edm_type, value)
+    return json.dumps(result, sort_keys=True)
+
+
+def _read_entities(lines, t_entity_property, t_edm_type):
+    """ Parse the entities of a JSON lines file into (line number, entity, size) tuples. """
+    import json
+    from base64 import b64decode
+    import six
+    from knack.util import CLIError
+
+    converters = {
+        t_edm_type.INT64: int,
+        t_edm_type.DOUBLE: float,
+        t_edm_type.BINARY: lambda v: t_entity_property(t_edm_type.BINARY, b64decode(v)),
+        t_edm_type.DATETIME: lambda v: t_entity_property(t_edm_type.DATETIME, _parse_datetime(v)),
+        t_edm_type.GUID: lambda v: t_entity_property(t_edm_type.GUID, v)
+    }
+
+    for number, line in enumerate(lines, 1):
+        if not line.strip():
+            continue
+        try:
+            values = json.loads(line)
+            types = dict((name[:-len('@odata.type')], values.pop(name)) for name in list(values)
+                         if name.endswith('@odata.type'))
+            entity = {}
+            for name, value in values.items():
+                if name in ('Timestamp', 'etag', 'odata.etag'):
+                    continue  # maintained by the service
+                edm_type = types.get(name)
+                if edm_type in converters:
+                    value = converters[edm_type](value)
+                elif isinstance(value, six.integer_types) and not isinstance(value, bool):
+                    value = t_entity_property(t_edm_type.INT32, value)
+                entity[name] = value
+        except (ValueError, TypeError, AttributeError) as ex:
+            raise CLIError('Invalid entity at line {}: {}'.format(number, ex))
+
+        if 'PartitionKey' not in entity or 'RowKey' not in entity:
+            raise CLIError('Invalid entity at line {}: PartitionKey and RowKey are required'.format(number))
+        yield number, entity, len(line)
+
+
+def _parse_datetime(value):
+    from dateutil import parser
+    from dateutil.tz import tzutc
+    result = parser.parse(value)
+    return result if result.tzinfo else result.replace(tzinfo=tzutc())
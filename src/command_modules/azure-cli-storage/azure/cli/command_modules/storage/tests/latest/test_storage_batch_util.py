@@ -0,0 +1,475 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+import os
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+
+import mock
+from azure.common import AzureHttpError
+
+from azure.cli.command_modules.storage.util import (parallel_map, retry_transient_failure, AggregatedProgress,
+                                                    collect_blobs, glob_files_remotely)
+from azure.cli.command_modules.storage.operations.blob import (storage_blob_upload_batch,
+                                                               storage_blob_download_batch, storage_blob_copy_batch,
+                                                               upload_blob, RESUMABLE_JOURNAL_SUFFIX)
+from azure.cli.command_modules.storage.operations.file import storage_file_upload_batch, storage_file_copy_batch
+
+
+class MockCmd(object):
+
+    @staticmethod
+    def get_models(*attr_args, **__):
+        from importlib import import_module
+        models = [getattr(import_module('azure.multiapi.storage.v2017_07_29.' + path), name)
+                  for path, name in (a.split('#') for a in attr_args)]
+        return models[0] if len(models) == 1 else models
+
+    @staticmethod
+    def supported_api_version(**_):
+        return True
+
+
+class TestStorageBatchUtil(unittest.TestCase):
+
+    def test_parallel_map_keeps_order(self):
+        def _work(i):
+            time.sleep(0.001 * (10 - i))
+            return i * 2
+
+        self.assertEqual(list(parallel_map(_work, iter(range(10)), concurrency=4)), [i * 2 for i in range(10)])
+        self.assertEqual(list(parallel_map(_work, range(3))), [0, 2, 4])
+
+    def test_parallel_map_raises_first_error(self):
+        def _work(i):
+            if i == 3:
+                raise ValueError(i)
+            return i
+
+        with self.assertRaises(ValueError):
+            list(parallel_map(_work, range(20), concurrency=4))
+
+    @mock.patch('time.sleep')
+    def test_retry_transient_failure(self, _):
+        calls = []
+
+        def _flaky(status_code):
+            calls.append(status_code)
+            if len(calls) < 3:
+                raise AzureHttpError('error', status_code)
+            return 'done'
+
+        self.assertEqual(retry_transient_failure(_flaky)(503), 'done')
+        self.assertEqual(len(calls), 3)
+
+        del calls[:]
+        with self.assertRaises(AzureHttpError):
+            retry_transient_failure(_flaky)(412)
+        self.assertEqual(len(calls), 1)
+
+    def test_aggregated_progress(self):
+        reported = []
+        progress = AggregatedProgress(lambda current, total: reported.append((current, total)), 30)
+        first, second = progress.item(10), progress.item(20)
+        first(5, 10)
+        second(20, 20)
+        first.done()
+        second.done()
+        self.assertEqual(reported, [(5, 30), (25, 30), (30, 30)])
+
+
+class _MockBlobService(object):
+    """ Lists blob names with the prefix and delimiter semantics of the service. """
+
+    def __init__(self, names):
+        self.names = sorted(names)
+        self.listings = []
+
+    def list_blobs(self, container, prefix=None, delimiter=None):  # pylint: disable=unused-argument
+        self.listings.append((prefix, delimiter))
+        returned_prefixes = set()
+        for name in self.names:
+            if prefix and not name.startswith(prefix):
+                continue
+            rest = name[len(prefix or ''):]
+            if delimiter and delimiter in rest:
+                virtual_dir = name[:len(prefix or '') + rest.index(delimiter) + 1]
+                if virtual_dir not in returned_prefixes:
+                    returned_prefixes.add(virtual_dir)
+                    yield self._entry(virtual_dir, is_prefix=True)
+                continue
+            yield self._entry(name)
+
+    @staticmethod
+    def _entry(name, is_prefix=False):
+        entry = mock.Mock(spec=['name'] if is_prefix else ['name', 'properties'])
+        entry.name = name
+        return entry
+
+
+class TestStorageCollectBlobs(unittest.TestCase):
+
+    names = ['a.txt', 'logs/2017/a.gz', 'logs/2017/sub/b.gz', 'logs/2018/c.gz', 'logs/2018/d.txt',
+             'logs/2019/e.gz', 'other/logs/2018/f.gz']
+
+    def _collect(self, pattern):
+        service = _MockBlobService(self.names)
+        return list(collect_blobs(service, 'cont', pattern)), service.listings
+
+    def test_collect_blobs_pushes_down_prefix(self):
+        blobs, listings = self._collect('logs/2018/*.gz')
+        self.assertEqual(blobs, ['logs/2018/c.gz'])
+        self.assertEqual(listings, [('logs/2018/', None)])
+
+    def test_collect_blobs_prunes_levels(self):
+        blobs, listings = self._collect('logs/201[78]/?.gz')
+        self.assertEqual(blobs, ['logs/2017/a.gz', 'logs/2018/c.gz'])
+        self.assertEqual(listings, [('logs/201', '/'), ('logs/2017/', '/'), ('logs/2018/', '/')])
+
+    def test_collect_blobs_same_matches_as_fnmatch(self):
+        from fnmatch import fnmatch
+        for pattern in ['*', '*.gz', 'logs/*', 'logs/201?/*', 'logs/20[!1]*', '*/2018/*', 'logs/[', '']:
+            blobs, _ = self._collect(pattern)
+            self.assertEqual(blobs, [n for n in self.names if not pattern or fnmatch(n, pattern)], pattern)
+
+
+class TestStorageGlobFilesRemotely(unittest.TestCase):
+
+    tree = {
+        '': ['a.txt', 'dir1/', 'dir2/'],
+        'dir1': ['b.txt', 'c.log', 'sub/'],
+        'dir1/sub': ['d.txt'],
+        'dir2': []
+    }
+
+    def _client(self):
+        from azure.multiapi.storage.v2017_07_29.file.models import Directory, File
+        client = mock.MagicMock()
+
+        def _list(share, directory):
+            time.sleep(0.001)
+            return [Directory(name[:-1]) if name.endswith('/') else File(name) for name in self.tree[directory]]
+
+        client.list_directories_and_files.side_effect = _list
+        return client
+
+    def test_glob_files_remotely_parallel(self):
+        expected = [('', 'a.txt'), ('dir1', 'b.txt'), ('dir1', 'c.log'), (os.path.join('dir1', 'sub'), 'd.txt')]
+        for concurrency in [1, 4]:
+            client = self._client()
+            self.assertEqual(sorted(glob_files_remotely(MockCmd(), client, 'share', None, concurrency=concurrency)),
+                             expected)
+            self.assertEqual(client.list_directories_and_files.call_count, 4)
+        self.assertEqual(sorted(glob_files_remotely(MockCmd(), self._client(), 'share', '*.txt', concurrency=4)),
+                         [f for f in expected if f[1].endswith('.txt')])
+
+
+class TestStorageBlobUploadBatch(unittest.TestCase):
+
+    def setUp(self):
+        self.source = tempfile.mkdtemp()
+        self.files = []
+        for i in range(8):
+            path = os.path.join(self.source, 'file{}.txt'.format(i))
+            with open(path, 'w') as f:
+                f.write('x' * (i + 1))
+            self.files.append((path, 'file{}.txt'.format(i)))
+
+    def tearDown(self):
+        shutil.rmtree(self.source, ignore_errors=True)
+
+    def _upload(self, client, **kwargs):
+        from azure.multiapi.storage.v2017_07_29.blob.models import ContentSettings
+        return storage_blob_upload_batch(MockCmd(), client, self.source, 'cont', source_files=list(self.files),
+                                         destination_container_name='cont', blob_type='block',
+                                         content_settings=ContentSettings(), **kwargs)
+
+    def test_upload_batch_concurrent(self):
+        client = mock.MagicMock()
+        client.make_blob_url.side_effect = lambda container, blob: '{}/{}'.format(container, blob)
+        threads = set()
+
+        def _create_blob_from_path(**kwargs):
+            threads.add(threading.current_thread().name)
+            time.sleep(0.01)
+            if kwargs['blob_name'] == 'file2.txt':
+                raise AzureHttpError('precondition failed', 412)
+            kwargs['progress_callback'](os.path.getsize(kwargs['file_path']), os.path.getsize(kwargs['file_path']))
+            return mock.MagicMock(etag=kwargs['blob_name'])
+
+        client.create_blob_from_path.side_effect = _create_blob_from_path
+        reported = []
+        results = self._upload(client, concurrency=4, progress_callback=lambda c, t: reported.append((c, t)))
+
+        self.assertEqual([r['Blob'] for r in results], ['cont/' + dst for _, dst in self.files if dst != 'file2.txt'])
+        self.assertEqual([r['eTag'] for r in results], [r['Blob'][5:] for r in results])
+        self.assertGreater(len(threads), 1)
+        self.assertEqual(reported[-1], (36, 36))
+
+    def test_upload_batch_sync(self):
+        import base64
+        import hashlib
+        from datetime import datetime, timedelta
+        uploaded = datetime.utcfromtimestamp(os.path.getmtime(self.files[0][0])) + timedelta(minutes=1)
+
+        def _blob(name, size, last_modified=uploaded, content_md5=None):
+            blob = mock.MagicMock()
+            blob.name = name
+            blob.properties.content_length = size
+            blob.properties.last_modified = last_modified
+            blob.properties.content_settings.content_md5 = content_md5
+            return blob
+
+        older = uploaded - timedelta(hours=1)
+        client = mock.MagicMock()
+        client.list_blobs.return_value = [
+            _blob('backup/extra.txt', 1),
+            _blob('backup/file0.txt', 1),  # unchanged
+            _blob('backup/file1.txt', 1),  # size changed
+            _blob('backup/file3.txt', 4, older, base64.b64encode(hashlib.md5(b'xxxx').digest()).decode()),  # same md5
+            _blob('backup/file4.txt', 5, older),  # newer locally without md5
+            _blob('backup/more/extra.log', 1)
+        ]
+        client.create_blob_from_path.return_value = mock.MagicMock()
+        self._upload(client, destination_path='backup', sync=True, delete_extraneous=True, pattern='*.txt')
+
+        client.list_blobs.assert_called_once_with('cont', prefix='backup/')
+        self.assertEqual(sorted(c[1]['blob_name'] for c in client.create_blob_from_path.call_args_list),
+                         ['backup/file1.txt', 'backup/file2.txt', 'backup/file4.txt', 'backup/file5.txt',
+                          'backup/file6.txt', 'backup/file7.txt'])
+        client.delete_blob.assert_called_once_with('cont', 'backup/extra.txt', timeout=None)
+
+
+class TestStorageBlobDownloadBatch(unittest.TestCase):
+
+    def setUp(self):
+        self.destination = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.destination, ignore_errors=True)
+
+    @staticmethod
+    def _blob(name):
+        blob = mock.MagicMock()
+        blob.name = name
+        return blob
+
+    def _client(self, names):
+        client = mock.MagicMock()
+        client.list_blobs.return_value = [self._blob(n) for n in names]
+
+        def _get_blob_to_path(container, blob_name, file_path, **_):
+            with open(file_path, 'w') as f:
+                f.write(blob_name)
+            return self._blob(blob_name)
+
+        client.get_blob_to_path.side_effect = _get_blob_to_path
+        return client
+
+    def test_download_batch_concurrent(self):
+        names = ['dir{}/blob{}'.format(i % 3, i) for i in range(12)]
+        client = self._client(names)
+        result = storage_blob_download_batch(client, 'cont', self.destination, 'cont', concurrency=4)
+        self.assertEqual(result, names)
+        self.assertTrue(os.path.isfile(os.path.join(self.destination, 'dir2', 'blob11')))
+
+    def test_download_batch_creates_each_folder_once(self):
+        client = self._client(['dir{}/blob{}'.format(i % 3, i) for i in range(12)])
+        with mock.patch('azure.cli.command_modules.storage.operations.blob.mkdir_p') as mkdir_p:
+            mkdir_p.side_effect = os.makedirs
+            storage_blob_download_batch(client, 'cont', self.destination, 'cont')
+        self.assertEqual(mkdir_p.call_count, 3)
+
+    def test_download_batch_duplicate_destination(self):
+        from knack.util import CLIError
+        client = self._client(['a/b', '/a/b'])
+        with self.assertRaises(CLIError):
+            storage_blob_download_batch(client, 'cont', self.destination, 'cont')
+
+
+class TestStorageFileUploadBatch(unittest.TestCase):
+
+    def setUp(self):
+        self.source = tempfile.mkdtemp()
+        for path in ['a/b/c/f1', 'a/b/f2', 'a/d/f3', 'e/f4', 'f5']:
+            if not os.path.isdir(os.path.join(self.source, os.path.dirname(path))):
+                os.makedirs(os.path.join(self.source, os.path.dirname(path)))
+            with open(os.path.join(self.source, path), 'w') as f:
+                f.write(path)
+
+    def tearDown(self):
+        shutil.rmtree(self.source, ignore_errors=True)
+
+    def test_upload_batch_creates_directories_first(self):
+        from azure.multiapi.storage.v2017_07_29.file.models import ContentSettings
+        calls = []
+        client = mock.MagicMock()
+        client.create_directory.side_effect = lambda **kwargs: calls.append(('dir', kwargs['directory_name']))
+        client.create_file_from_path.side_effect = lambda **kwargs: calls.append(('file', kwargs['file_name']))
+        client.make_file_url.side_effect = lambda share, directory, name: '/'.join(p for p in (directory, name) if p)
+
+        reported = []
+        results = storage_file_upload_batch(MockCmd(), client, 'share', self.source, destination_path='root',
+                                            content_settings=ContentSettings(), concurrency=3,
+                                            progress_callback=lambda c, t: reported.append((c, t)))
+
+        self.assertEqual(sorted(results), ['root/a/b/c/f1', 'root/a/b/f2', 'root/a/d/f3', 'root/e/f4', 'root/f5'])
+        directories = [name for kind, name in calls if kind == 'dir']
+        self.assertEqual(sorted(directories), ['root', 'root/a', 'root/a/b', 'root/a/b/c', 'root/a/d', 'root/e'])
+        self.assertEqual([d.count('/') for d in directories], sorted(d.count('/') for d in directories))
+        self.assertEqual([kind for kind, _ in calls], ['dir'] * 6 + ['file'] * 5)
+        self.assertEqual(reported[-1], (26, 26))
+
+
+class TestStorageCopyBatch(unittest.TestCase):
+
+    @staticmethod
+    def _copy(status, source=None):
+        return mock.MagicMock(status=status, source=source, progress='10/10', status_description='')
+
+    def _blob(self, name, copy):
+        blob = mock.MagicMock()
+        blob.name = name
+        blob.properties.copy = copy
+        return blob
+
+    def _source_client(self, names):
+        source = mock.MagicMock()
+        source.list_blobs.return_value = [self._blob(n, None) for n in names]
+        source.make_blob_url.side_effect = lambda container, name, sas_token: 'https://src/{}/{}?{}'.format(
+            container, name, sas_token)
+        return source
+
+    @mock.patch('time.sleep')
+    def test_blob_copy_batch_wait_restarts_failed_copies(self, _):
+        names = ['blob{}'.format(i) for i in range(6)]
+        client = mock.MagicMock()
+        client.make_blob_url.side_effect = lambda container, name: '{}/{}'.format(container, name)
+        client.copy_blob.side_effect = lambda container, name, url: self._copy('pending', url)
+        # blob1 fails once, then everything succeeds
+        client.list_blobs.side_effect = [
+            [self._blob('backup/' + n, self._copy('failed' if n == 'blob1' else 'pending')) for n in names],
+            [self._blob('backup/' + n, self._copy('success')) for n in names]]
+
+        result = storage_blob_copy_batch(MockCmd(), client, self._source_client(names), destination_container='dst',
+                                         destination_path='backup', source_container='src', source_sas='sig',
+                                         concurrency=3, wait=True)
+
+        self.assertEqual(result, ['dst/backup/' + n for n in names])
+        self.assertEqual(client.copy_blob.call_count, 7)
+        client.copy_blob.assert_called_with('dst', 'backup/blob1', 'https://src/src/blob1?sig')
+        self.assertEqual(client.list_blobs.call_args[1]['prefix'], 'backup/')
+
+    @mock.patch('time.sleep')
+    def test_blob_copy_batch_wait_reports_failures(self, _):
+        from knack.util import CLIError
+        client = mock.MagicMock()
+        client.copy_blob.return_value = self._copy('pending')
+        client.list_blobs.return_value = [self._blob('blob0', self._copy('aborted'))]
+        with self.assertRaisesRegexp(CLIError, '1 of 1 copies failed'):
+            storage_blob_copy_batch(MockCmd(), client, self._source_client(['blob0']), destination_container='dst',
+                                    source_container='src', source_sas='sig', wait=True)
+        self.assertEqual(client.copy_blob.call_count, 3)
+
+    def test_blob_copy_batch_resume(self):
+        client = mock.MagicMock()
+        client.copy_blob.return_value = self._copy('success')
+        client.list_blobs.return_value = [
+            self._blob('blob0', self._copy('success', 'https://src/src/blob0?old')),
+            self._blob('blob1', self._copy('failed', 'https://src/src/blob1?old')),
+            self._blob('blob2', self._copy('success', 'https://other/src/blob2'))]
+
+        storage_blob_copy_batch(MockCmd(), client, self._source_client(['blob0', 'blob1', 'blob2', 'blob3']),
+                                destination_container='dst', source_container='src', source_sas='sig', resume=True)
+
+        self.assertEqual([c[0][1] for c in client.copy_blob.call_args_list], ['blob1', 'blob2', 'blob3'])
+
+    def test_file_copy_batch_resume_and_directories(self):
+        from azure.common import AzureMissingResourceHttpError
+        names = ['a/b/blob0', 'a/b/blob1', 'a/blob2']
+        client = mock.MagicMock()
+        client.copy_file.return_value = self._copy('success')
+
+        def _get_file_properties(share, directory, name):
+            if name == 'blob0':
+                return self._blob(name, self._copy('success', 'https://src/src/a/b/blob0'))
+            raise AzureMissingResourceHttpError('not found', 404)
+
+        client.get_file_properties.side_effect = _get_file_properties
+        storage_file_copy_batch(MockCmd(), client, self._source_client(names), destination_share='share',
+                                source_container='src', source_sas='sig', concurrency=2, resume=True)
+
+        self.assertEqual(sorted(c[0][2] for c in client.copy_file.call_args_list), ['blob1', 'blob2'])
+        self.assertEqual(set(c[1]['directory_name'] for c in client.create_directory.call_args_list), {'a', 'a/b'})
+
+
+class TestStorageResumableUpload(unittest.TestCase):
+
+    def setUp(self):
+        self.source = tempfile.mkdtemp()
+        self.file_path = os.path.join(self.source, 'disk.vhd')
+        self.journal_path = self.file_path + RESUMABLE_JOURNAL_SUFFIX
+
+    def tearDown(self):
+        shutil.rmtree(self.source, ignore_errors=True)
+
+    def _write(self, content):
+        with open(self.file_path, 'wb') as f:
+            f.write(content)
+
+    def _upload(self, client, blob_type):
+        from azure.multiapi.storage.v2017_07_29.blob.models import ContentSettings
+        return upload_blob(MockCmd(), client, 'cont', 'blob', self.file_path, blob_type=blob_type,
+                           content_settings=ContentSettings(content_type='application/octet-stream'),
+                           max_connections=1, resumable=True)
+
+    def test_resumable_block_upload(self):
+        self._write(b'0123456789')
+        client = mock.MagicMock()
+        client.account_name = 'acct'
+        client.MAX_BLOCK_SIZE = 4
+        staged = {}
+
+        def _put_block(container, blob, block, block_id, **_):
+            if len(staged) == 2 and not client.get_block_list.called:
+                raise ValueError('connection lost')
+            staged[block_id] = block
+
+        client.put_block.side_effect = _put_block
+        with self.assertRaises(ValueError):
+            self._upload(client, 'block')
+        self.assertEqual(sorted(staged.values()), [b'0123', b'4567'])
+        self.assertTrue(os.path.isfile(self.journal_path))
+
+        client.get_block_list.return_value.uncommitted_blocks = [mock.Mock(id=block_id) for block_id in staged]
+        self._upload(client, 'block')
+        self.assertEqual(client.put_block.call_count, 4)
+        self.assertEqual(staged[client.put_block.call_args[0][3]], b'89')
+        block_list = client.put_block_list.call_args[0][2]
+        self.assertEqual([staged[b.id] for b in block_list], [b'0123', b'4567', b'89'])
+        self.assertFalse(os.path.exists(self.journal_path))
+
+    def test_resumable_page_upload(self):
+        self._write(b'\x01' * 512 + b'\x00' * 512 + b'\x02' * 512)
+        client = mock.MagicMock()
+        client.account_name = 'acct'
+        client.MAX_PAGE_SIZE = 512
+        client.update_page.side_effect = [None, AzureHttpError('bad request', 400), None]
+
+        with self.assertRaises(AzureHttpError):
+            self._upload(client, 'page')
+        client.create_blob.assert_called_once()
+
+        self._upload(client, 'page')
+        client.create_blob.assert_called_once()
+        self.assertEqual([c[0][3] for c in client.update_page.call_args_list], [0, 1024, 1024])
+        self.assertFalse(os.path.exists(self.journal_path))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,114 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+import json
+import os
+import shutil
+import tempfile
+import unittest
+import uuid
+from datetime import datetime
+
+import mock
+from dateutil.tz import tzutc
+
+from azure.multiapi.cosmosdb.v2017_04_17.table import EdmType, EntityProperty, TableBatch
+from azure.cli.command_modules.storage.operations.table import (import_table_entities, export_table_entities,
+                                                                TABLE_BATCH_MAX_ENTITIES)
+
+
+def _get_table_data_type(_, __, *type_names):
+    types = {'TableBatch': TableBatch, 'EntityProperty': EntityProperty, 'EdmType': EdmType}
+    result = [types[name] for name in type_names]
+    return result[0] if len(result) == 1 else result
+
+
+@mock.patch('azure.cli.command_modules.storage.sdkutil.get_table_data_type', _get_table_data_type)
+class TestStorageTableTransfer(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.file_path = os.path.join(self.folder, 'entities.jsonl')
+
+    def tearDown(self):
+        shutil.rmtree(self.folder, ignore_errors=True)
+
+    def test_export_and_import_round_trip(self):
+        entity = {
+            'PartitionKey': 'p1', 'RowKey': 'r1', 'etag': 'W/"1"', 'Name': 'abc', 'Active': True, 'Score': 1.0,
+            'Count': 2 ** 40, 'Small': EntityProperty(EdmType.INT32, 7), 'Data': b'\x00\x01',
+            'Id': uuid.UUID('c9da6455-213d-42c9-9a79-3e9149a57833'),
+            'Since': datetime(2018, 4, 1, 10, 30, tzinfo=tzutc()), 'Timestamp': datetime(2018, 4, 2, tzinfo=tzutc())
+        }
+        client = mock.MagicMock()
+        client.query_entities.return_value = [entity]
+        result = export_table_entities(mock.MagicMock(), client, 'table', self.file_path)
+        self.assertEqual(result, {'entities': 1})
+
+        with open(self.file_path) as f:
+            line = json.loads(f.read())
+        self.assertNotIn('etag', line)
+        self.assertEqual(line['Count'], '1099511627776')
+        self.assertEqual(line['Count@odata.type'], 'Edm.Int64')
+        self.assertEqual(line['Data'], 'AAE=')
+        self.assertNotIn('Small@odata.type', line)
+        self.assertEqual(line['Id'], 'c9da6455-213d-42c9-9a79-3e9149a57833')
+        self.assertEqual(line['Id@odata.type'], 'Edm.Guid')
+
+        client = mock.MagicMock()
+        import_table_entities(mock.MagicMock(), client, 'table', self.file_path)
+        batch = client.commit_batch.call_args[0][1]
+        self.assertEqual(len(batch._requests), 1)
+        body = json.loads(batch._requests[0][1].body)
+        self.assertEqual(body['Count@odata.type'], 'Edm.Int64')
+        self.assertEqual(body['Small'], 7)
+        self.assertEqual(body['Data@odata.type'], 'Edm.Binary')
+        self.assertEqual(body['Id@odata.type'], 'Edm.Guid')
+        self.assertEqual(body['Since'], '2018-04-01T10:30:00Z')
+        self.assertNotIn('Timestamp', body)
+
+    def test_import_groups_partitions_into_batches(self):
+        with open(self.file_path, 'w') as f:
+            for i in range(250):
+                f.write(json.dumps({'PartitionKey': 'p{}'.format(i % 2), 'RowKey': str(i), 'Value': i}) + '\n')
+            f.write('\n')
+
+        client = mock.MagicMock()
+        result = import_table_entities(mock.MagicMock(), client, 'table', self.file_path, if_exists='merge',
+                                       concurrency=3)
+
+        self.assertEqual(result, {'entities': 250, 'batches': 4})
+        sizes = sorted(len(c[0][1]._requests) for c in client.commit_batch.call_args_list)
+        self.assertEqual(sizes, [25, 25, TABLE_BATCH_MAX_ENTITIES, TABLE_BATCH_MAX_ENTITIES])
+        for call in client.commit_batch.call_args_list:
+            batch = call[0][1]
+            self.assertEqual(set(int(row_key) % 2 for row_key, _ in batch._requests),
+                             {int(batch._partition_key[1:])})
+            self.assertEqual(batch._requests[0][1].method, 'MERGE')
+
+    def test_import_reports_invalid_line(self):
+        from knack.util import CLIError
+        with open(self.file_path, 'w') as f:
+            f.write(json.dumps({'PartitionKey': 'p', 'RowKey': 'r'}) + '\n')
+            f.write(json.dumps({'PartitionKey': 'p'}) + '\n')
+        with self.assertRaisesRegexp(CLIError, 'line 2'):
+            import_table_entities(mock.MagicMock(), mock.MagicMock(), 'table', self.file_path)
+
+    def test_export_partition_ranges(self):
+        client = mock.MagicMock()
+        client.query_entities.side_effect = lambda table, filter, select, timeout: [
+            {'PartitionKey': filter, 'RowKey': '1'}]
+        result = export_table_entities(mock.MagicMock(), client, 'table', self.file_path, filter="Age gt 3",
+                                       partition_boundaries=["o'k", 'd'], concurrency=2)
+
+        self.assertEqual(result, {'entities': 3})
+        filters = sorted(c[1]['filter'] for c in client.query_entities.call_args_list)
+        self.assertEqual(filters, ["(Age gt 3) and PartitionKey ge 'd' and PartitionKey lt 'o''k'",
+                                   "(Age gt 3) and PartitionKey ge 'o''k'",
+                                   "(Age gt 3) and PartitionKey lt 'd'"])
+
+
+if __name__ == '__main__':
+    unittest.main()
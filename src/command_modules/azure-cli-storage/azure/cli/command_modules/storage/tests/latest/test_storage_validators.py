@@ -5,6 +5,8 @@
 
 import unittest
 from argparse import Namespace
+
+import mock
 from six import StringIO
 
 from knack import CLI
@@ -284,5 +286,79 @@ class TestGetSourceClientValidator(unittest.TestCase):
         return ns
 
 
+class TestStorageAccountKeyQuery(unittest.TestCase):
+
+    def setUp(self):
+        import tempfile
+        self.cli_ctx = mock.MagicMock()
+        self.cli_ctx.config.config_dir = tempfile.mkdtemp()
+        self.cli_ctx.config.getint.return_value = 0
+        self.rcf = mock.MagicMock()
+        self.scf = mock.MagicMock()
+        self.scf.config.subscription_id = 'sub'
+        self.rcf.resources.list.return_value = [
+            mock.MagicMock(id='/subscriptions/sub/resourceGroups/rg1/providers/Microsoft.Storage/storageAccounts/sa')]
+        self.scf.storage_accounts.list_keys.return_value.keys = [mock.MagicMock(value='key1')]
+
+    def tearDown(self):
+        import shutil
+        shutil.rmtree(self.cli_ctx.config.config_dir, ignore_errors=True)
+
+    def _query(self):
+        from azure.cli.core.profiles import ResourceType
+        from azure.cli.command_modules.storage._validators import _query_account_key
+
+        def _get_client(_, resource_type):
+            return self.rcf if resource_type == ResourceType.MGMT_RESOURCE_RESOURCES else self.scf
+
+        with mock.patch('azure.cli.command_modules.storage._validators.get_mgmt_service_client', _get_client), \
+                mock.patch('azure.cli.command_modules.storage._validators.get_sdk', return_value=(None, True)):
+            return _query_account_key(self.cli_ctx, 'sa')
+
+    def test_query_account_key_caches_account_id(self):
+        self.assertEqual(self._query(), 'key1')
+        self.assertEqual(self._query(), 'key1')
+        self.rcf.resources.list.assert_called_once_with(
+            filter="name eq 'sa' and resourceType eq 'Microsoft.Storage/storageAccounts'")
+        self.scf.storage_accounts.list.assert_not_called()
+        self.assertEqual(self.scf.storage_accounts.list_keys.call_count, 2)
+        self.scf.storage_accounts.list_keys.assert_called_with('rg1', 'sa')
+
+    def test_query_account_key_cache_ttl(self):
+        import os
+        import stat
+        self.cli_ctx.config.getint.return_value = 60
+        self._query()
+        self.assertEqual(self._query(), 'key1')
+        self.scf.storage_accounts.list_keys.assert_called_once_with('rg1', 'sa')
+        if os.name == 'posix':
+            key_file = os.path.join(self.cli_ctx.config.config_dir, 'storageKeys.json')
+            self.assertEqual(stat.S_IMODE(os.stat(key_file).st_mode), 0o600)
+
+    def test_query_account_key_moved_account(self):
+        from msrestazure.azure_exceptions import CloudError
+        self._query()
+        not_found = CloudError.__new__(CloudError)
+        not_found.status_code = 404
+        self.scf.storage_accounts.list_keys.side_effect = [not_found, mock.DEFAULT]
+        self.rcf.resources.list.return_value = [
+            mock.MagicMock(id='/subscriptions/sub/resourceGroups/rg2/providers/Microsoft.Storage/storageAccounts/sa')]
+        self.assertEqual(self._query(), 'key1')
+        self.scf.storage_accounts.list_keys.assert_called_with('rg2', 'sa')
+
+    def test_query_account_key_damaged_account_id_cache(self):
+        import io
+        import json
+        import os
+        cache_file = os.path.join(self.cli_ctx.config.config_dir, 'storageAccounts.json')
+        with open(cache_file, 'w') as f:
+            f.write('{"sub/sa": "/subscriptions/sub/resourceGr')
+        self.assertEqual(self._query(), 'key1')
+        self.rcf.resources.list.assert_called_once()
+        with io.open(cache_file, 'r', encoding='utf-8-sig') as f:
+            self.assertEqual(json.load(f), {'sub/sa': self.rcf.resources.list.return_value[0].id})
+        self.assertEqual(os.listdir(self.cli_ctx.config.config_dir), ['storageAccounts.json'])
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -6,10 +6,15 @@
 
 import os
 
+BATCH_MAX_ATTEMPTS = 3
+BATCH_RETRY_BACKOFF = 2
+
 
 def collect_blobs(blob_service, container, pattern=None):
     """
     List the blobs in the given blob container, filter the blob by comparing their path to the given pattern.
+    Returns a generator. Only the blobs under the literal prefix of the pattern are listed, and directory-like levels
+    that cannot match the pattern are skipped.
     """
     if not blob_service:
         raise ValueError('missing parameter blob_service')
@@ -18,22 +23,118 @@ def collect_blobs(blob_service, container, pattern=None):
         raise ValueError('missing parameter container')
 
     if not _pattern_has_wildcards(pattern):
-        return [pattern] if blob_service.exists(container, pattern) else []
+        return iter([pattern] if blob_service.exists(container, pattern) else [])
+
+    if not pattern:
+        return _list_blobs(blob_service, container, None, None)
+
+    return _list_blobs(blob_service, container, _pattern_literal_prefix(pattern), _GlobPattern(pattern))
+
+
+def _list_blobs(blob_service, container, prefix, glob):
+    # a delimiter listing only pays off while whole levels can still be pruned, e.g. 'logs/201[78]/*.gz'
+    delimiter = '/' if glob and glob.can_prune_below(prefix) else None
+    for blob in blob_service.list_blobs(container, prefix=prefix or None, delimiter=delimiter):
+        if delimiter and not hasattr(blob, 'properties'):
+            # a BlobPrefix, the virtual directory is walked in place to keep the listing order
+            if glob.may_match_below(blob.name):
+                for blob_name in _list_blobs(blob_service, container, blob.name, glob):
+                    yield blob_name
+            continue
 
-    results = []
-    for blob in blob_service.list_blobs(container):
         try:
             blob_name = blob.name.encode('utf-8') if isinstance(blob.name, unicode) else blob.name
         except NameError:
             blob_name = blob.name
 
-        if not pattern or _match_path(blob_name, pattern):
-            results.append(blob_name)
+        if not glob or _match_path(blob_name, glob.pattern):
+            yield blob_name
+
 
-    return results
+def _pattern_literal_prefix(pattern):
+    for i, c in enumerate(pattern):
+        if c in '*?[':
+            return pattern[:i]
+    return pattern
 
 
-def collect_files(cmd, file_service, share, pattern=None):
+class _GlobPattern(object):
+    """
+    Incremental evaluation of an fnmatch pattern, used to decide whether any path starting with a given prefix can
+    still match the pattern.
+    """
+
+    def __init__(self, pattern):
+        self.pattern = pattern
+        self.tokens = self._tokenize(os.path.normcase(pattern))
+
+    @staticmethod
+    def _tokenize(pattern):
+        import re
+        from fnmatch import translate
+        tokens = []
+        i, n = 0, len(pattern)
+        while i < n:
+            c = pattern[i]
+            i += 1
+            if c in '*?':
+                tokens.append((c, None))
+            elif c == '[':
+                # same bracket rules as fnmatch.translate, an unclosed bracket is a literal
+                j = i
+                if j < n and pattern[j] == '!':
+                    j += 1
+                if j < n and pattern[j] == ']':
+                    j += 1
+                while j < n and pattern[j] != ']':
+                    j += 1
+                if j >= n:
+                    tokens.append(('c', c))
+                else:
+                    tokens.append(('[', re.compile(translate(pattern[i - 1:j + 1]))))
+                    i = j + 1
+            else:
+                tokens.append(('c', c))
+        return tokens
+
+    def _closure(self, states):
+        states = set(states)
+        pending = list(states)
+        while pending:
+            position = pending.pop()
+            if position < len(self.tokens) and self.tokens[position][0] == '*' and position + 1 not in states:
+                states.add(position + 1)
+                pending.append(position + 1)
+        return states
+
+    def _states_after(self, text):
+        states = self._closure([0])
+        for ch in os.path.normcase(text):
+            following = set()
+            for position in states:
+                if position == len(self.tokens):
+                    continue
+                kind, value = self.tokens[position]
+                if kind == '*':
+                    following.add(position)
+                elif kind == '?' or (kind == '[' and value.match(ch)) or (kind == 'c' and value == ch):
+                    following.add(position + 1)
+            if not following:
+                return following
+            states = self._closure(following)
+        return states
+
+    def may_match_below(self, prefix):
+        """ Whether a path starting with the prefix can match the pattern. """
+        return bool(self._states_after(prefix))
+
+    def can_prune_below(self, prefix):
+        """ Whether some paths starting with the prefix cannot match, i.e. no '*' already matches everything. """
+        states = self._states_after(prefix or '')
+        return bool(states) and all(p == len(self.tokens) or self.tokens[p][0] != '*' for p in states)
+
+
+def collect_files(cmd, file_service, share, pattern=None, concurrency=1):
     """
     Search files in the the given file share recursively. Filter the files by matching their path to the given pattern.
     Returns a iterable of tuple (dir, name).
@@ -47,7 +148,7 @@ def collect_files(cmd, file_service, share, pattern=None):
     if not _pattern_has_wildcards(pattern):
         return [pattern]
 
-    return glob_files_remotely(cmd, file_service, share, pattern)
+    return glob_files_remotely(cmd, file_service, share, pattern, concurrency=concurrency)
 
 
 def create_blob_service_from_storage_client(cmd, client):
@@ -81,8 +182,14 @@ def glob_files_locally(folder_path, pattern):
                 yield (full_path, full_path[len_folder_path:])
 
 
-def glob_files_remotely(cmd, client, share_name, pattern):
+def glob_files_remotely(cmd, client, share_name, pattern, concurrency=1):
     """glob the files in remote file share based on the given pattern"""
+    if concurrency > 1:
+        return _glob_files_remotely_parallel(cmd, client, share_name, pattern, concurrency)
+    return _glob_files_remotely(cmd, client, share_name, pattern)
+
+
+def _glob_files_remotely(cmd, client, share_name, pattern):
     from collections import deque
     t_dir, t_file = cmd.get_models('file.models#Directory', 'file.models#File')
 
@@ -97,6 +204,65 @@ def glob_files_remotely(cmd, client, share_name, pattern):
                 queue.appendleft(os.path.join(current_dir, f.name))
 
 
+def _glob_files_remotely_parallel(cmd, client, share_name, pattern, concurrency):
+    """
+    List the directories of the share on up to `concurrency` threads. The files of a directory are yielded as soon
+    as its listing completes, while the sub-directories it contains are queued for the listers.
+    """
+    from collections import deque
+    from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+    t_dir, t_file = cmd.get_models('file.models#Directory', 'file.models#File')
+
+    @retry_transient_failure
+    def _list_directory(directory):
+        files, sub_directories = [], []
+        for f in client.list_directories_and_files(share_name, directory):
+            if isinstance(f, t_file):
+                files.append(f.name)
+            elif isinstance(f, t_dir):
+                sub_directories.append(os.path.join(directory, f.name))
+        return directory, files, sub_directories
+
+    executor = ThreadPoolExecutor(max_workers=concurrency)
+    queue = deque([""])
+    listing = set()
+    try:
+        while queue or listing:
+            while queue and len(listing) < concurrency:
+                listing.add(executor.submit(_list_directory, queue.popleft()))
+            done, listing = wait(listing, return_when=FIRST_COMPLETED)
+            for future in done:
+                directory, files, sub_directories = future.result()
+                queue.extend(sub_directories)
+                for file_name in files:
+                    if not pattern or _match_path(os.path.join(directory, file_name), pattern):
+                        yield directory, file_name
+    finally:
+        for future in listing:
+            future.cancel()
+        executor.shutdown(wait=True)
+
+
+def merge_sorted(left, right, left_key, right_key):
+    """
+    Walk two iterables that are sorted by key side by side and yield (left item, right item) pairs, with None on the
+    side that has no item for the key. Neither side is held in memory.
+    """
+    left, right = iter(left), iter(right)
+    sentinel = object()
+    left_item, right_item = next(left, sentinel), next(right, sentinel)
+    while left_item is not sentinel or right_item is not sentinel:
+        if right_item is sentinel or (left_item is not sentinel and left_key(left_item) < right_key(right_item)):
+            yield left_item, None
+            left_item = next(left, sentinel)
+        elif left_item is sentinel or right_key(right_item) < left_key(left_item):
+            yield None, right_item
+            right_item = next(right, sentinel)
+        else:
+            yield left_item, right_item
+            left_item, right_item = next(left, sentinel), next(right, sentinel)
+
+
 def create_short_lived_blob_sas(cmd, account_name, account_key, container, blob):
     from datetime import datetime, timedelta
     if cmd.supported_api_version(min_api='2017-04-17'):
@@ -226,3 +392,188 @@ def check_precondition_success(func):
             logger.warning('Failed precondition')
             return False, None
     return wrapper
+
+
+def _is_transient_error(ex):
+    from azure.common import AzureException, AzureHttpError
+    if isinstance(ex, AzureHttpError):
+        return ex.status_code in [408, 429] or ex.status_code >= 500
+    # the SDK raises a plain AzureException once its own retries of a connection error are exhausted
+    return type(ex) is AzureException  # pylint: disable=unidiomatic-typecheck
+
+
+def retry_transient_failure(func, max_attempts=BATCH_MAX_ATTEMPTS):
+    """
+    Retry the whole operation when it fails with a throttling, server or connection error. Used for the items of a
+    batch, where a single transient failure should not abort the batch. Other errors, including failed
+    preconditions, are raised right away.
+    """
+    def wrapper(*args, **kwargs):
+        import time
+        from azure.common import AzureException
+        from knack.log import get_logger
+        attempt = 1
+        while True:
+            try:
+                return func(*args, **kwargs)
+            except AzureException as ex:
+                if attempt >= max_attempts or not _is_transient_error(ex):
+                    raise
+                get_logger(__name__).warning('Attempt %d of %d failed, retrying: %s', attempt, max_attempts, ex)
+                time.sleep(BATCH_RETRY_BACKOFF ** attempt)
+                attempt += 1
+    return wrapper
+
+
+def parallel_map(func, items, concurrency=1):
+    """
+    Apply func to each item on up to `concurrency` threads and yield the results in the order of the items. Only a
+    bounded number of items is consumed ahead of the results, so items can be a lazy iterable of any length. The
+    first error is raised after the items in flight are finished and the pending ones are cancelled.
+    """
+    if not concurrency or concurrency <= 1:
+        for item in items:
+            yield func(item)
+        return
+
+    from collections import deque
+    from concurrent.futures import ThreadPoolExecutor
+
+    executor = ThreadPoolExecutor(max_workers=concurrency)
+    pending = deque()
+    try:
+        for item in items:
+            pending.append(executor.submit(func, item))
+            if len(pending) >= concurrency * 2:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+    finally:
+        for future in pending:
+            future.cancel()
+        executor.shutdown(wait=True)
+
+
+class AggregatedProgress(object):
+    """
+    Combine the progress of several concurrent transfers into a single progress callback of (current, total) bytes.
+    """
+
+    def __init__(self, progress_callback, total):
+        import threading
+        self.progress_callback = progress_callback
+        self.total = total
+        self.current = 0
+        self._lock = threading.Lock()
+
+    def item(self, size):
+        """ Return the progress callback to pass to the transfer of an item of the given size. """
+        return _ItemProgress(self, size)
+
+    def add(self, delta):
+        if not delta or not self.progress_callback:
+            return
+        with self._lock:
+            self.current += delta
+            self.progress_callback(self.current, self.total)
+
+
+class _ItemProgress(object):
+
+    def __init__(self, aggregate, size):
+        self.aggregate = aggregate
+        self.size = size
+        self.reported = 0
+
+    def __call__(self, current, total):  # pylint: disable=unused-argument
+        self.aggregate.add(current - self.reported)
+        self.reported = current
+
+    def done(self):
+        """ Account for the whole item, also when it was skipped or the transfer did not report its progress. """
+        self(self.size, self.size)
+
+
+COPY_POLL_INTERVAL = 10
+
+
+def is_same_copy_source(copy, source_url):
+    """ Whether the last copy to a destination was from the given source, ignoring the SAS of either URL. """
+    return bool(copy and copy.source) and copy.source.split('?')[0] == source_url.split('?')[0]
+
+
+def _copied_bytes(copy):
+    try:
+        return int(copy.progress.split('/')[1])
+    except (AttributeError, IndexError, ValueError):
+        return 0
+
+
+def wait_for_copies(pending, get_copy_states, restart_copy, poll_interval=COPY_POLL_INTERVAL,
+                    max_attempts=BATCH_MAX_ATTEMPTS):
+    """
+    Poll the pending server-side copies of a batch until they all finish and report the throughput as they do.
+
+    `pending` maps each destination to the copy properties returned when its copy was started, `get_copy_states`
+    takes a list of destinations and returns a dict of their current copy properties, and `restart_copy` starts the
+    copy to a destination again and returns the new copy properties. Failed and aborted copies are restarted up to
+    `max_attempts` times in total. Returns the destinations whose copy did not succeed.
+    """
+    import time
+    from knack.log import get_logger
+    logger = get_logger(__name__)
+
+    pending = dict(pending)
+    attempts = {}
+    failed = []
+    succeeded = copied = 0
+    start = time.time()
+    while pending:
+        time.sleep(poll_interval)
+        states = get_copy_states(list(pending))
+        for destination in list(pending):
+            copy = states.get(destination)
+            if copy and copy.status == 'pending':
+                continue
+
+            del pending[destination]
+            if copy and copy.status == 'success':
+                succeeded += 1
+                copied += _copied_bytes(copy)
+            elif attempts.get(destination, 1) < max_attempts:
+                attempts[destination] = attempts.get(destination, 1) + 1
+                logger.warning('Copy to %s %s, restarting: %s', destination, copy.status if copy else 'vanished',
+                               copy.status_description if copy else '')
+                pending[destination] = restart_copy(destination)
+            else:
+                failed.append(destination)
+
+        elapsed = time.time() - start
+        logger.warning('%d copies succeeded, %d failed, %d pending. %.1f MiB/s, %.1f copies/s', succeeded,
+                       len(failed), len(pending), copied / elapsed / 1024 / 1024, succeeded / elapsed)
+    return failed
+
+
+def raise_if_copies_failed(failed, total):
+    if failed:
+        from knack.util import CLIError
+        raise CLIError('{} of {} copies failed. Run the command again with --resume to restart them: {}'.format(
+            len(failed), total, ', '.join(sorted(failed)[:10]) + (', ...' if len(failed) > 10 else '')))
+
+
+def get_blob_copy_source(source_blob_service, source_container, source_sas, source_blob_name):
+    """ The name of a blob to copy and its URL with the SAS appended. """
+    from .url_quote_util import encode_for_url
+    return source_blob_name, source_blob_service.make_blob_url(source_container, encode_for_url(source_blob_name),
+                                                               sas_token=source_sas)
+
+
+def get_file_copy_source(source_file_service, source_share, source_sas, source_file_dir, source_file_name):
+    """ The path of a file to copy and its URL with the SAS appended. """
+    from .url_quote_util import make_encoded_file_url_and_params
+    file_url, source_file_dir, source_file_name = \
+        make_encoded_file_url_and_params(source_file_service, source_share, source_file_dir,
+                                         source_file_name, source_sas)
+
+    source_path = os.path.join(source_file_dir, source_file_name) if source_file_dir else source_file_name
+    return source_path, file_url
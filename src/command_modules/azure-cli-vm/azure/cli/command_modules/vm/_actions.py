@@ -30,59 +30,32 @@ def _get_thread_count():
 
 
 def load_images_thru_services(cli_ctx, publisher, offer, sku, location):
-    from concurrent.futures import ThreadPoolExecutor, as_completed
-    all_images = []
-    client = _compute_client_factory(cli_ctx)
+    from ._image_catalog import refresh_image_catalog, search_image_catalog
     if location is None:
         location = get_one_of_subscription_locations(cli_ctx)
-
-    def _load_images_from_publisher(publisher):
-        offers = client.virtual_machine_images.list_offers(location, publisher)
-        if offer:
-            offers = [o for o in offers if _partial_matched(offer, o.name)]
-        for o in offers:
-            skus = client.virtual_machine_images.list_skus(location, publisher, o.name)
-            if sku:
-                skus = [s for s in skus if _partial_matched(sku, s.name)]
-            for s in skus:
-                images = client.virtual_machine_images.list(location, publisher, o.name, s.name)
-                for i in images:
-                    all_images.append({
-                        'publisher': publisher,
-                        'offer': o.name,
-                        'sku': s.name,
-                        'version': i.name})
-
-    publishers = client.virtual_machine_images.list_publishers(location)
-    if publisher:
-        publishers = [p for p in publishers if _partial_matched(publisher, p.name)]
-
-    publisher_num = len(publishers)
-    if publisher_num > 1:
-        with ThreadPoolExecutor(max_workers=_get_thread_count()) as executor:
-            tasks = [executor.submit(_load_images_from_publisher, p.name) for p in publishers]
-            for t in as_completed(tasks):
-                t.result()  # don't use the result but expose exceptions from the threads
-    elif publisher_num == 1:
-        _load_images_from_publisher(publishers[0].name)
-
-    return all_images
+    catalog = refresh_image_catalog(cli_ctx, location, publisher, offer, sku)
+    return list(search_image_catalog(catalog, publisher, offer, sku))
 
 
 def load_images_from_aliases_doc(cli_ctx, publisher=None, offer=None, sku=None):
     import requests
     from azure.cli.core.cloud import CloudEndpointNotSetException
     from azure.cli.core.util import should_disable_connection_verify
+    from ._image_catalog import load_cached_aliases_doc, save_cached_aliases_doc
     try:
         target_url = cli_ctx.cloud.endpoints.vm_image_alias_doc
     except CloudEndpointNotSetException:
         raise CLIError("'endpoint_vm_image_alias_doc' isn't configured. Please invoke 'az cloud update' to configure "
                        "it or use '--all' to retrieve images from server")
-    # under hack mode(say through proxies with unsigned cert), opt out the cert verification
-    response = requests.get(target_url, verify=(not should_disable_connection_verify()))
-    if response.status_code != 200:
-        raise CLIError("Failed to retrieve image alias doc '{}'. Error: '{}'".format(target_url, response))
-    dic = json.loads(response.content.decode())
+    content = load_cached_aliases_doc(cli_ctx, target_url)
+    if content is None:
+        # under hack mode(say through proxies with unsigned cert), opt out the cert verification
+        response = requests.get(target_url, verify=(not should_disable_connection_verify()))
+        if response.status_code != 200:
+            raise CLIError("Failed to retrieve image alias doc '{}'. Error: '{}'".format(target_url, response))
+        content = response.content.decode()
+        save_cached_aliases_doc(cli_ctx, target_url, content)
+    dic = json.loads(content)
     try:
         all_images = []
         result = (dic['outputs']['aliases']['value'])
@@ -155,7 +128,8 @@ def load_extension_images_thru_services(cli_ctx, publisher, name, version, locat
 
 
 def get_vm_sizes(cli_ctx, location):
-    return list(_compute_client_factory(cli_ctx).virtual_machine_sizes.list(location))
+    from ._vm_utils import list_sku_info
+    return list_sku_info(cli_ctx, location, resource_type='virtualMachines', available=True)
 
 
 def _partial_matched(pattern, string):
@@ -176,6 +150,10 @@ def _create_image_instance(publisher, offer, sku, version):
 
 
 def _get_latest_image_version(cli_ctx, location, publisher, offer, sku):
+    from ._image_catalog import find_latest_image_version
+    version = find_latest_image_version(cli_ctx, location, publisher, offer, sku)
+    if version:
+        return version
     top_one = _compute_client_factory(cli_ctx).virtual_machine_images.list(location,
                                                                            publisher,
                                                                            offer,
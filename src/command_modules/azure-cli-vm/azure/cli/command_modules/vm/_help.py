@@ -1109,10 +1109,14 @@ helps['vm list-vm-resize-options'] = """
 helps['vm list-skus'] = """
     type: command
     short-summary: Get details for compute-related resource SKUs.
-    long-summary: This command incorporates subscription level restriction, offering the most accurate information.
+    long-summary: >
+        This command incorporates subscription level restriction, offering the most accurate information.
+        The SKUs of a location are cached in the configuration directory for an hour.
     examples:
         - name: List all SKUs in the West US region.
           text: az vm list-skus -l westus
+        - name: List the D series VM sizes available in zone 2 of the East US 2 region.
+          text: az vm list-skus -l eastus2 --resource-type virtualMachines --size Standard_D --zone 2
 """
 
 helps['vm open-port'] = """
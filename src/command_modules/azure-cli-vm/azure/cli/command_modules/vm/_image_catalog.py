@@ -0,0 +1,138 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+import os
+import time
+
+from knack.log import get_logger
+
+from azure.cli.core._session import CacheSession
+
+logger = get_logger(__name__)
+
+VM_IMAGE_CATALOG_FILE = 'vmImages.{}.{}.json'
+VM_IMAGE_ALIASES_FILE = 'vmImageAliases.json'
+
+# Crawled offers and SKUs are trusted for this long when the offer list of their publisher didn't change, so that
+# versions published in an existing SKU are eventually picked up.
+VM_IMAGE_CATALOG_MAX_AGE = 24 * 60 * 60
+VM_IMAGE_ALIASES_MAX_AGE = 24 * 60 * 60
+
+
+def _catalog_path(cli_ctx, location):
+    return os.path.join(cli_ctx.config.config_dir,
+                        VM_IMAGE_CATALOG_FILE.format(cli_ctx.cloud.name, location).lower())
+
+
+def _is_fresh(entry, max_age=VM_IMAGE_CATALOG_MAX_AGE):
+    return bool(entry) and time.time() - entry['time'] < max_age
+
+
+def _find(entries, name):
+    return next((v for k, v in entries.items() if k.lower() == name.lower()), None)
+
+
+def load_image_catalog(cli_ctx, location):
+    """ The catalog of a location is kept in a file of the configuration directory:
+    {'publishers': {publisher: {'offers': [offer names],
+                                'images': {offer: {'time': ..., 'skus': {sku: {'time': ..., 'versions': [...]}}}}}}}
+    Only the offers and SKUs which matched a search are crawled, the others are listed with an empty entry.
+    A damaged file is loaded as an empty catalog, which is crawled again from the server. """
+    catalog = CacheSession()
+    catalog.load(_catalog_path(cli_ctx, location))
+    catalog.data.setdefault('publishers', {})
+    return catalog
+
+
+def refresh_image_catalog(cli_ctx, location, publisher=None, offer=None, sku=None):
+    """ Bring the part of the catalog which matches the partial names up to date. The offers of every matching
+    publisher are listed; the SKUs and versions of a publisher are only crawled again when its offer list changed,
+    or when they are older than VM_IMAGE_CATALOG_MAX_AGE. """
+    from concurrent.futures import ThreadPoolExecutor
+    from ._actions import _get_thread_count, _partial_matched
+    from ._client_factory import _compute_client_factory
+
+    client = _compute_client_factory(cli_ctx).virtual_machine_images
+    catalog = load_image_catalog(cli_ctx, location)
+    cached = catalog.data['publishers']
+
+    def _refresh_publisher(name):
+        offers = sorted(o.name for o in client.list_offers(location, name))
+        entry = cached.get(name)
+        if not entry or entry['offers'] != offers:
+            if entry:
+                logger.info("Offers of publisher '%s' changed, crawling its images again", name)
+            entry = {'offers': offers, 'images': {}}
+        for offer_name in [o for o in offers if _partial_matched(offer, o)]:
+            offer_entry = entry['images'].get(offer_name)
+            if not _is_fresh(offer_entry):
+                skus = [s.name for s in client.list_skus(location, name, offer_name)]
+                known = offer_entry['skus'] if offer_entry else {}
+                offer_entry = {'time': time.time(), 'skus': {s: known.get(s) for s in skus}}
+                entry['images'][offer_name] = offer_entry
+            for sku_name, sku_entry in offer_entry['skus'].items():
+                if _partial_matched(sku, sku_name) and not _is_fresh(sku_entry):
+                    versions = [i.name for i in client.list(location, name, offer_name, sku_name)]
+                    offer_entry['skus'][sku_name] = {'time': time.time(), 'versions': versions}
+        return name, entry
+
+    publishers = [p.name for p in client.list_publishers(location)]
+    # publishers which were removed from the location are dropped along with their images
+    refreshed = {p: cached[p] for p in publishers if p in cached}
+    matched = [p for p in publishers if _partial_matched(publisher, p)]
+    with ThreadPoolExecutor(max_workers=_get_thread_count()) as executor:
+        for name, entry in executor.map(_refresh_publisher, matched):
+            refreshed[name] = entry
+    catalog.data['publishers'] = refreshed
+    catalog.save_with_retry()
+    return catalog
+
+
+def search_image_catalog(catalog, publisher=None, offer=None, sku=None):
+    """ Yield the images of the catalog matching the partial names. The catalog is nested by publisher, offer and
+    SKU, so a name which doesn't match prunes everything below it. """
+    from ._actions import _partial_matched
+    for publisher_name, entry in catalog.data['publishers'].items():
+        if not _partial_matched(publisher, publisher_name):
+            continue
+        for offer_name, offer_entry in entry['images'].items():
+            if not _partial_matched(offer, offer_name):
+                continue
+            for sku_name, sku_entry in offer_entry['skus'].items():
+                if not sku_entry or not _partial_matched(sku, sku_name):
+                    continue
+                for version in sku_entry['versions']:
+                    yield {
+                        'publisher': publisher_name,
+                        'offer': offer_name,
+                        'sku': sku_name,
+                        'version': version
+                    }
+
+
+def find_latest_image_version(cli_ctx, location, publisher, offer, sku):
+    """ Return the latest version of an image from a fresh catalog entry, or None when it has to be looked up. """
+    from distutils.version import LooseVersion  # pylint: disable=no-name-in-module,import-error
+    if not location or not os.path.isfile(_catalog_path(cli_ctx, location)):
+        return None
+    entry = _find(load_image_catalog(cli_ctx, location).data['publishers'], publisher)
+    offer_entry = entry and _find(entry['images'], offer)
+    sku_entry = offer_entry and _find(offer_entry['skus'], sku)
+    if not _is_fresh(sku_entry) or not sku_entry['versions']:
+        return None
+    return max(sku_entry['versions'], key=LooseVersion)
+
+
+def load_cached_aliases_doc(cli_ctx, url):
+    cache = CacheSession()
+    cache.load(os.path.join(cli_ctx.config.config_dir, VM_IMAGE_ALIASES_FILE))
+    entry = cache.get(url)
+    return entry['content'] if _is_fresh(entry, VM_IMAGE_ALIASES_MAX_AGE) else None
+
+
+def save_cached_aliases_doc(cli_ctx, url, content):
+    cache = CacheSession()
+    cache.load(os.path.join(cli_ctx.config.config_dir, VM_IMAGE_ALIASES_FILE))
+    cache[url] = {'content': content, 'time': time.time()}
@@ -163,6 +163,11 @@ def load_arguments(self, _):
         c.argument('port', help="The port or port range (ex: 80-100) to open inbound traffic to. Use '*' to allow traffic to all ports.")
         c.argument('priority', help='Rule priority, between 100 (highest priority) and 4096 (lowest priority). Must be unique for each rule in the collection.', type=int)
 
+    with self.argument_context('vm list-skus') as c:
+        c.argument('resource_type', options_list=['--resource-type', '-r'], help='resource type, e.g. virtualMachines, disks or availabilitySets')
+        c.argument('size', options_list=['--size', '-s'], completer=None, help='size name, partial name is accepted')
+        c.argument('zone', nargs=None, help='show only the SKUs available in the availability zone, excluding the zones the subscription is restricted from')
+
     for scope in ['vm show', 'vm list']:
         with self.argument_context(scope) as c:
             c.argument('show_details', action='store_true', options_list=['--show-details', '-d'], help='show public ip address, FQDN, and power states. command will run slow')
@@ -0,0 +1,118 @@
+# --------------------------------------------------------------------------------------------
+# Copyright (c) Microsoft Corporation. All rights reserved.
+# Licensed under the MIT License. See License.txt in the project root for license information.
+# --------------------------------------------------------------------------------------------
+
+import os
+import time
+
+from knack.log import get_logger
+
+from azure.cli.core._session import CacheSession
+
+logger = get_logger(__name__)
+
+VM_SKU_CATALOG_FILE = 'vmSkus.{}.{}.json'
+
+# SKU availability and the restrictions of a subscription change rarely, but they do change
+VM_SKU_CATALOG_MAX_AGE = 60 * 60
+
+
+def _catalog_path(cli_ctx, location):
+    from azure.cli.core.commands.client_factory import get_subscription_id
+    return os.path.join(cli_ctx.config.config_dir,
+                        VM_SKU_CATALOG_FILE.format(get_subscription_id(cli_ctx), location).lower())
+
+
+def _enum_value(value):
+    return str(getattr(value, 'value', value)).lower()
+
+
+def _index_skus(skus, location):
+    """ Index the SKUs of a location by position: {'resourceType': {type: [...]}, 'name': {name: [...]},
+    'zone': {zone: [...]}, 'restricted': [...]}. A SKU is only indexed under the zones it isn't restricted in. """
+    index = {'resourceType': {}, 'name': {}, 'zone': {}, 'restricted': []}
+    for i, sku in enumerate(skus):
+        index['resourceType'].setdefault(sku.resource_type.lower(), []).append(i)
+        index['name'].setdefault(sku.name.lower(), []).append(i)
+        restricted_zones = set()
+        for restriction in sku.restrictions or []:
+            restriction_info = getattr(restriction, 'restriction_info', None)
+            if _enum_value(restriction.type) == 'zone':
+                restricted_zones.update((restriction_info.zones if restriction_info else None) or [])
+            elif _enum_value(restriction.type) == 'location' and \
+                    location in [v.lower() for v in restriction.values or []]:
+                index['restricted'].append(i)
+        for info in sku.location_info or []:
+            if info.location.lower() == location:
+                for zone in set(info.zones or []) - restricted_zones:
+                    index['zone'].setdefault(zone, []).append(i)
+    return index
+
+
+def save_sku_catalog(cli_ctx, skus):
+    """ Split a listing of all the resource SKUs of the subscription into the catalogs of their locations. """
+    by_location = {}
+    for sku in skus:
+        for location in sku.locations or []:
+            by_location.setdefault(location.lower(), []).append(sku)
+    now = time.time()
+    for location, location_skus in by_location.items():
+        catalog = CacheSession()
+        catalog.filename = _catalog_path(cli_ctx, location)
+        catalog.data = {
+            'time': now,
+            'skus': [s.serialize(keep_readonly=True) for s in location_skus],
+            'index': _index_skus(location_skus, location)
+        }
+        catalog.save_with_retry()
+
+
+def _is_expired(catalog):
+    # a catalog which can't be read, e.g. written by another version, is refreshed like an expired one
+    return not all(k in catalog.data for k in ('time', 'skus', 'index')) or \
+        time.time() - catalog.data['time'] >= VM_SKU_CATALOG_MAX_AGE
+
+
+def load_sku_catalog(cli_ctx, location):
+    """ Return the catalog of a location, listing the resource SKUs of the subscription again when it is missing,
+    unreadable or older than VM_SKU_CATALOG_MAX_AGE. """
+    from ._client_factory import _compute_client_factory
+    catalog = CacheSession()
+    catalog.load(_catalog_path(cli_ctx, location))
+    if _is_expired(catalog):
+        logger.info("Refreshing the resource SKUs of location '%s'", location)
+        save_sku_catalog(cli_ctx, list(_compute_client_factory(cli_ctx).resource_skus.list()))
+        catalog.load(_catalog_path(cli_ctx, location))
+    if not catalog.data:  # the location has no SKU at all
+        catalog.data = {'time': time.time(), 'skus': [], 'index': _index_skus([], location)}
+        catalog.save_with_retry()
+    return catalog
+
+
+def query_sku_catalog(cli_ctx, location, resource_type=None, size=None, zone=None, available=None):
+    """ Return the resource SKUs of a location matching every given criterion, looked up in the catalog indexes.
+    :param str size: partial, case insensitive, name of the SKU
+    :param zone: a zone, or True for the SKUs which can be used in any zone
+    :param bool available: True to skip the SKUs the subscription is restricted from using in the location
+    """
+    from azure.cli.core.profiles import ResourceType, get_sdk
+    location = location.lower()
+    catalog = load_sku_catalog(cli_ctx, location).data
+    index = catalog['index']
+
+    positions = set(range(len(catalog['skus'])))
+    if resource_type:
+        positions &= set(index['resourceType'].get(resource_type.lower(), []))
+    if size:
+        positions &= set(i for name, matches in index['name'].items() if size.lower() in name for i in matches)
+    if zone is True:
+        positions &= set(i for matches in index['zone'].values() for i in matches)
+    elif zone:
+        positions &= set(index['zone'].get(zone, []))
+    if available:
+        positions -= set(index['restricted'])
+
+    ResourceSku = get_sdk(cli_ctx, ResourceType.MGMT_COMPUTE, 'ResourceSku', mod='models',
+                          operation_group='resource_skus')
+    return [ResourceSku.deserialize(catalog['skus'][i]) for i in sorted(positions)]
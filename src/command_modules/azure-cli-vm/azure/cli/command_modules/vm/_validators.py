@@ -297,9 +297,8 @@ def _validate_location(cmd, namespace, zone_info, size_info):
     if not namespace.location:
         get_default_location_from_resource_group(cmd, namespace)
         if zone_info:
-            sku_infos = list_sku_info(cmd.cli_ctx, namespace.location)
-            temp = next((x for x in sku_infos if x.name.lower() == size_info.lower()), None)
-            if not temp or not [x for x in (temp.location_info or []) if x.zones]:
+            sku_infos = list_sku_info(cmd.cli_ctx, namespace.location, size=size_info, zone=True)
+            if not [x for x in sku_infos if x.name.lower() == size_info.lower()]:
                 raise CLIError("{}'s location can't be used to create the VM/VMSS because availablity zone is not yet "
                                "supported. Please use '--location' to specify a capable one. 'az vm list-skus' can be "
                                "used to find such locations".format(namespace.resource_group_name))
@@ -873,26 +872,64 @@ def _resolve_role_id(cli_ctx, role, scope):
     return role_id
 
 
+def _run_validation_stages(cmd, namespace, stages):
+    """ Run the validation stages, (name, validator, names of the stages it depends on) tuples listed after their
+    dependencies, each as soon as its dependencies are done, so that the lookups of independent stages happen at the
+    same time. The validators share a client pool. Errors are raised in the order of the stages, as if they had run
+    one after the other. [vm] validation_concurrency limits how many stages run at once, 1 runs them in order. """
+    import time
+    from concurrent.futures import ThreadPoolExecutor
+    from ._vm_utils import client_pool
+    concurrency = cmd.cli_ctx.config.getint('vm', 'validation_concurrency', fallback=len(stages))
+    futures = {}
+
+    def _run_stage(name, validator, dependencies):
+        for dependency in dependencies:
+            futures[dependency].result()
+        start = time.time()
+        validator(cmd, namespace)
+        logger.debug("validation stage '%s' took %.3f seconds", name, time.time() - start)
+
+    start = time.time()
+    # stages are started in the order they are listed, so a stage waiting for its dependencies never holds the
+    # worker they need
+    with client_pool(cmd.cli_ctx), ThreadPoolExecutor(max_workers=max(1, min(concurrency, len(stages)))) as executor:
+        for name, validator, dependencies in stages:
+            futures[name] = executor.submit(_run_stage, name, validator, dependencies)
+        for name, _, _ in stages:
+            futures[name].result()
+    logger.debug('validation stages took %.3f seconds', time.time() - start)
+
+
 def process_vm_create_namespace(cmd, namespace):
+    def _validate_location_stage(cmd, namespace):
+        _validate_location(cmd, namespace, namespace.zone, namespace.size)
+
+    def _validate_storage_account_stage(cmd, namespace):
+        if namespace.storage_profile in [StorageProfile.SACustomImage,
+                                         StorageProfile.SAPirImage]:
+            _validate_vm_create_storage_account(cmd, namespace)
+
     validate_tags(namespace)
-    _validate_location(cmd, namespace, namespace.zone, namespace.size)
-    validate_asg_names_or_ids(cmd, namespace)
-    _validate_vm_create_storage_profile(cmd, namespace)
-    if namespace.storage_profile in [StorageProfile.SACustomImage,
-                                     StorageProfile.SAPirImage]:
-        _validate_vm_create_storage_account(cmd, namespace)
-
-    _validate_vm_create_availability_set(cmd, namespace)
-    _validate_vm_vmss_create_vnet(cmd, namespace)
-    _validate_vm_create_nsg(cmd, namespace)
-    _validate_vm_vmss_create_public_ip(cmd, namespace)
-    _validate_vm_create_nics(cmd, namespace)
+    _run_validation_stages(cmd, namespace, [
+        ('location', _validate_location_stage, []),
+        ('application security groups', validate_asg_names_or_ids, []),
+        ('storage profile', _validate_vm_create_storage_profile, ['location']),
+        ('storage account', _validate_storage_account_stage, ['location', 'storage profile']),
+        ('availability set', _validate_vm_create_availability_set, []),
+        ('vnet', _validate_vm_vmss_create_vnet, ['location']),
+        ('nsg', _validate_vm_create_nsg, []),
+        ('public ip', _validate_vm_vmss_create_public_ip, []),
+        # NICs reset the public IP type, and are only checked for presence by the vnet stage before they get parsed
+        ('nics', _validate_vm_create_nics, ['vnet', 'public ip']),
+        ('identity', _validate_vm_vmss_msi, [])
+    ])
+    # may prompt for a password, so it runs once the lookups are done
     _validate_vm_vmss_create_auth(namespace)
     if namespace.secrets:
         _validate_secrets(namespace.secrets, namespace.os_type)
     if namespace.license_type and namespace.os_type.lower() != 'windows':
         raise CLIError('usage error: --license-type is only applicable on Windows VM')
-    _validate_vm_vmss_msi(cmd, namespace)
 
 # endregion
 
@@ -1038,8 +1075,8 @@ def _validate_vmss_create_load_balancer_or_app_gateway(cmd, namespace):
 
 def get_network_client(cli_ctx):
     from azure.cli.core.profiles import ResourceType
-    from azure.cli.core.commands.client_factory import get_mgmt_service_client
-    return get_mgmt_service_client(cli_ctx, ResourceType.MGMT_NETWORK, api_version=get_target_network_api(cli_ctx))
+    from ._vm_utils import get_pooled_client
+    return get_pooled_client(cli_ctx, ResourceType.MGMT_NETWORK, api_version=get_target_network_api(cli_ctx))
 
 
 def get_network_lb(cli_ctx, resource_group_name, lb_name):
@@ -1052,18 +1089,36 @@ def get_network_lb(cli_ctx, resource_group_name, lb_name):
 
 
 def process_vmss_create_namespace(cmd, namespace):
+    def _validate_location_stage(cmd, namespace):
+        _validate_location(cmd, namespace, namespace.zones, namespace.vm_sku)
+
+    def _validate_storage_profile_stage(cmd, namespace):
+        _validate_vm_create_storage_profile(cmd, namespace, for_scale_set=True)
+
+    def _validate_vnet_stage(cmd, namespace):
+        _validate_vm_vmss_create_vnet(cmd, namespace, for_scale_set=True)
+
+    def _validate_balancer_stage(cmd, namespace):
+        _validate_vmss_single_placement_group(namespace)
+        _validate_vmss_create_load_balancer_or_app_gateway(cmd, namespace)
+
+    def _validate_subnet_stage(cmd, namespace):  # pylint: disable=unused-argument
+        _validate_vmss_create_subnet(namespace)
+
     validate_tags(namespace)
-    _validate_location(cmd, namespace, namespace.zones, namespace.vm_sku)
-    _validate_vm_create_storage_profile(cmd, namespace, for_scale_set=True)
-    _validate_vm_vmss_create_vnet(cmd, namespace, for_scale_set=True)
-
-    _validate_vmss_single_placement_group(namespace)
-    _validate_vmss_create_load_balancer_or_app_gateway(cmd, namespace)
-    _validate_vmss_create_subnet(namespace)
-    _validate_vmss_create_public_ip(cmd, namespace)
-    _validate_vmss_create_nsg(cmd, namespace)
+    _run_validation_stages(cmd, namespace, [
+        ('location', _validate_location_stage, []),
+        ('storage profile', _validate_storage_profile_stage, ['location']),
+        ('vnet', _validate_vnet_stage, ['location']),
+        # the application gateway frontend depends on whether the vnet is new
+        ('balancer', _validate_balancer_stage, ['vnet']),
+        ('subnet', _validate_subnet_stage, ['vnet', 'balancer']),
+        ('public ip', _validate_vmss_create_public_ip, ['balancer']),
+        ('nsg', _validate_vmss_create_nsg, []),
+        ('identity', _validate_vm_vmss_msi, [])
+    ])
+    # may prompt for a password, so it runs once the lookups are done
     _validate_vm_vmss_create_auth(namespace)
-    _validate_vm_vmss_msi(cmd, namespace)
 
     if namespace.license_type and namespace.os_type.lower() != 'windows':
         raise CLIError('usage error: --license-type is only applicable on Windows VM scaleset')
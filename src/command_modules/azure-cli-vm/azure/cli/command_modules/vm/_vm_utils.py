@@ -5,6 +5,8 @@
 
 import json
 import os
+import threading
+from contextlib import contextmanager
 
 from knack.log import get_logger
 from knack.util import CLIError
@@ -14,6 +16,8 @@ logger = get_logger(__name__)
 
 MSI_LOCAL_ID = '[system]'
 
+_pool_lock = threading.Lock()
+
 
 def get_target_network_api(cli_ctx):
     """ Since most compute calls don't need advanced network functionality, we can target a supported, but not
@@ -35,11 +39,42 @@ def read_content_if_is_file(string_or_file):
     return content
 
 
-def _resolve_api_version(cli_ctx, provider_namespace, resource_type, parent_path):
+@contextmanager
+def client_pool(cli_ctx):
+    """ Share the management clients, with their connection pools, and the resource providers looked up by the
+    commands' validators, which may run concurrently. """
+    cli_ctx.data['vm_client_pool'] = {}
+    try:
+        yield
+    finally:
+        cli_ctx.data['vm_client_pool'] = None
+
+
+def get_pooled(cli_ctx, key, factory):
+    """ Return the object of the client pool under the key, creating it once. Outside of a pool, it is always
+    created. """
+    pool = cli_ctx.data.get('vm_client_pool')
+    if pool is None:
+        return factory()
+    with _pool_lock:
+        entry = pool.setdefault(key, {'lock': threading.Lock()})
+    with entry['lock']:
+        if 'value' not in entry:
+            entry['value'] = factory()
+    return entry['value']
+
+
+def get_pooled_client(cli_ctx, resource_type, **kwargs):
     from azure.cli.core.commands.client_factory import get_mgmt_service_client
+    return get_pooled(cli_ctx, (resource_type, tuple(sorted(kwargs.items()))),
+                      lambda: get_mgmt_service_client(cli_ctx, resource_type, **kwargs))
+
+
+def _resolve_api_version(cli_ctx, provider_namespace, resource_type, parent_path):
     from azure.cli.core.profiles import ResourceType
-    client = get_mgmt_service_client(cli_ctx, ResourceType.MGMT_RESOURCE_RESOURCES)
-    provider = client.providers.get(provider_namespace)
+    client = get_pooled_client(cli_ctx, ResourceType.MGMT_RESOURCE_RESOURCES)
+    provider = get_pooled(cli_ctx, ('provider', provider_namespace.lower()),
+                          lambda: client.providers.get(provider_namespace))
 
     # If available, we will use parent resource's api-version
     resource_type_str = (parent_path.split('/')[0] if parent_path else resource_type)
@@ -66,11 +101,10 @@ def log_pprint_template(template):
 def check_existence(cli_ctx, value, resource_group, provider_namespace, resource_type,
                     parent_name=None, parent_type=None):
     # check for name or ID and set the type flags
-    from azure.cli.core.commands.client_factory import get_mgmt_service_client
     from msrestazure.azure_exceptions import CloudError
     from msrestazure.tools import parse_resource_id
     from azure.cli.core.profiles import ResourceType
-    resource_client = get_mgmt_service_client(cli_ctx, ResourceType.MGMT_RESOURCE_RESOURCES).resources
+    resource_client = get_pooled_client(cli_ctx, ResourceType.MGMT_RESOURCE_RESOURCES).resources
 
     id_parts = parse_resource_id(value)
 
@@ -109,19 +143,79 @@ def get_key_vault_base_url(cli_ctx, vault_name):
     return 'https://{}{}'.format(vault_name, suffix)
 
 
-def list_sku_info(cli_ctx, location=None):
+def list_sku_info(cli_ctx, location=None, resource_type=None, size=None, zone=None, available=None):
+    """ The SKUs of a location are answered from the local SKU catalog, see query_sku_catalog for the filters. """
     from ._client_factory import _compute_client_factory
-
-    def _match_location(l, locations):
-        return next((x for x in locations if x.lower() == l.lower()), None)
-
-    client = _compute_client_factory(cli_ctx)
-    result = client.resource_skus.list()
+    from ._sku_catalog import query_sku_catalog, save_sku_catalog
     if location:
-        result = [r for r in result if _match_location(location, r.locations)]
+        return query_sku_catalog(cli_ctx, location, resource_type, size, zone, available)
+    if any([resource_type, size, zone, available]):
+        raise CLIError('usage error: --location is required to filter the SKUs')
+    result = list(_compute_client_factory(cli_ctx).resource_skus.list())
+    save_sku_catalog(cli_ctx, result)
     return result
 
 
+def prefetch(iterable, buffer_size=1000):
+    """ Start iterating on a background thread, so that the pages of a listing are fetched while the items already
+    received are processed, and at the same time as other listings. """
+    import threading
+    from six.moves import queue
+
+    items = queue.Queue(maxsize=buffer_size)
+    done = object()
+
+    def _fetch():
+        try:
+            for item in iterable:
+                items.put((item, None))
+            items.put((done, None))
+        except Exception as ex:  # pylint: disable=broad-except
+            items.put((done, ex))
+
+    thread = threading.Thread(target=_fetch)
+    thread.daemon = True
+    thread.start()
+
+    def _iterate():
+        while True:
+            item, error = items.get()
+            if error:
+                raise error
+            if item is done:
+                return
+            yield item
+
+    return _iterate()
+
+
+def hash_join(build_items, build_key, probe_items, probe_key):
+    """ Join two collections of resources on a resource ID, such as NICs with the VM they are attached to, or IP
+    configurations with their public IP address. The build items are indexed in memory, the probe items are streamed.
+    Yields (probe item, matching build item or None) pairs in the order of the probe items. """
+    index = {}
+    for item in build_items:
+        key = build_key(item)
+        if key:
+            index[key.lower()] = item
+    for item in probe_items:
+        key = probe_key(item)
+        yield item, index.get(key.lower()) if key else None
+
+
+def list_resources_by_id(operations, resource_ids):
+    """ List the resources of the given IDs with one listing for each of their resource groups, fetched at the same
+    time, instead of a GET for each resource or a listing of the whole subscription. """
+    from msrestazure.tools import parse_resource_id
+    resource_groups = {}
+    for resource_id in resource_ids:
+        resource_group = parse_resource_id(resource_id)['resource_group']
+        resource_groups.setdefault(resource_group.lower(), resource_group)
+    listings = [prefetch(operations.list(resource_group)) for resource_group in resource_groups.values()]
+    wanted = set(resource_id.lower() for resource_id in resource_ids)
+    return (item for listing in listings for item in listing if item.id.lower() in wanted)
+
+
 def normalize_disk_info(image_data_disks=None, data_disk_sizes_gb=None, attach_data_disks=None, storage_sku=None,
                         os_disk_caching=None, data_disk_cachings=None, write_accelerator_settings=None):
     # we should return a dictionary with info like below and will emoit when see conflictions
@@ -46,6 +46,10 @@ _LINUX_ACCESS_EXT = 'VMAccessForLinux'
 _WINDOWS_ACCESS_EXT = 'VMAccessAgent'
 _LINUX_DIAG_EXT = 'LinuxDiagnostic'
 _WINDOWS_DIAG_EXT = 'IaaSDiagnostics'
+
+# instance views fetched at the same time by `vm list -d`
+_VM_DETAILS_CONCURRENCY = 16
+
 extension_mappings = {
     _LINUX_ACCESS_EXT: {
         'version': '1.4',
@@ -699,19 +703,23 @@ def get_vm_details(cmd, resource_group_name, vm_name):
                 if public_ip_info.dns_settings:
                     fqdns.append(public_ip_info.dns_settings.fqdn)
 
-    setattr(result, 'power_state',
-            ','.join([s.display_status for s in result.instance_view.statuses if s.code.startswith('PowerState/')]))
-    setattr(result, 'public_ips', ','.join(public_ips))
-    setattr(result, 'fqdns', ','.join(fqdns))
-    setattr(result, 'private_ips', ','.join(private_ips))
-    setattr(result, 'mac_addresses', ','.join(mac_addresses))
-    del result.instance_view  # we don't need other instance_view info as people won't care
+    _set_vm_details(result, public_ips, fqdns, private_ips, mac_addresses)
     return result
 
 
-def list_skus(cmd, location=None):
+def _set_vm_details(vm, public_ips, fqdns, private_ips, mac_addresses):
+    setattr(vm, 'power_state',
+            ','.join([s.display_status for s in vm.instance_view.statuses if s.code.startswith('PowerState/')]))
+    setattr(vm, 'public_ips', ','.join(public_ips))
+    setattr(vm, 'fqdns', ','.join(fqdns))
+    setattr(vm, 'private_ips', ','.join(private_ips))
+    setattr(vm, 'mac_addresses', ','.join(mac_addresses))
+    del vm.instance_view  # we don't need other instance_view info as people won't care
+
+
+def list_skus(cmd, location=None, resource_type=None, size=None, zone=None):
     from ._vm_utils import list_sku_info
-    return list_sku_info(cmd.cli_ctx, location)
+    return list_sku_info(cmd.cli_ctx, location, resource_type, size, zone)
 
 
 def list_vm(cmd, resource_group_name=None, show_details=False):
@@ -719,57 +727,135 @@ def list_vm(cmd, resource_group_name=None, show_details=False):
     vm_list = ccf.virtual_machines.list(resource_group_name=resource_group_name) \
         if resource_group_name else ccf.virtual_machines.list_all()
     if show_details:
-        return [get_vm_details(cmd, _parse_rg_name(v.id)[0], v.name) for v in vm_list]
+        return _list_vm_details(cmd, list(vm_list), resource_group_name)
 
     return list(vm_list)
 
 
+def _list_vm_details(cmd, vms, resource_group_name=None):
+    """ The details of `vm show -d` for many VMs. The instance views are fetched concurrently, while the NICs and
+    public IPs are listed once and joined with the VMs in memory. """
+    from concurrent.futures import ThreadPoolExecutor
+    from ._vm_utils import get_target_network_api, hash_join, list_resources_by_id, prefetch
+    if not vms:
+        return []
+
+    client = _compute_client_factory(cmd.cli_ctx)
+    network_client = get_mgmt_service_client(
+        cmd.cli_ctx, ResourceType.MGMT_NETWORK, api_version=get_target_network_api(cmd.cli_ctx))
+    nic_refs = [(vm, nic_ref) for vm in vms for nic_ref in vm.network_profile.network_interfaces]
+
+    def _get_instance_view(vm):
+        return client.virtual_machines.get(_parse_rg_name(vm.id)[0], vm.name, expand='instanceView')
+
+    with ThreadPoolExecutor(max_workers=min(_VM_DETAILS_CONCURRENCY, len(vms))) as executor:
+        instance_views = executor.map(_get_instance_view, vms)
+
+        if resource_group_name:
+            nics = list(list_resources_by_id(network_client.network_interfaces, [ref.id for _, ref in nic_refs]))
+            public_ip_ids = [ip_configuration.public_ip_address.id for nic in nics
+                             for ip_configuration in nic.ip_configurations if ip_configuration.public_ip_address]
+            public_ip_addresses = list_resources_by_id(network_client.public_ip_addresses, public_ip_ids) \
+                if public_ip_ids else []
+        else:
+            public_ip_addresses = prefetch(network_client.public_ip_addresses.list_all())
+            nics = prefetch(network_client.network_interfaces.list_all())
+
+        details = dict((vm.id.lower(), ([], [], [], [])) for vm in vms)
+        ip_configurations = []
+        for (vm, _), nic in hash_join(nics, lambda nic: nic.id, nic_refs, lambda x: x[1].id):
+            if not nic:
+                continue
+            if nic.mac_address:
+                details[vm.id.lower()][3].append(nic.mac_address)
+            ip_configurations.extend((vm, ip_configuration) for ip_configuration in nic.ip_configurations)
+        for (vm, ip_configuration), public_ip_info in hash_join(
+                public_ip_addresses, lambda public_ip_address: public_ip_address.id, ip_configurations,
+                lambda x: x[1].public_ip_address.id if x[1].public_ip_address else None):
+            public_ips, fqdns, private_ips, _ = details[vm.id.lower()]
+            if ip_configuration.private_ip_address:
+                private_ips.append(ip_configuration.private_ip_address)
+            if public_ip_info and public_ip_info.ip_address:
+                public_ips.append(public_ip_info.ip_address)
+            if public_ip_info and public_ip_info.dns_settings:
+                fqdns.append(public_ip_info.dns_settings.fqdn)
+
+        result = []
+        for vm, instance_view in zip(vms, instance_views):
+            _set_vm_details(instance_view, *details[vm.id.lower()])
+            result.append(instance_view)
+    return result
+
+
 def list_vm_ip_addresses(cmd, resource_group_name=None, vm_name=None):
+    from itertools import groupby
+    from msrestazure.azure_exceptions import CloudError
+    from ._vm_utils import hash_join, list_resources_by_id, prefetch
     # We start by getting NICs as they are the smack in the middle of all data that we
     # want to collect for a VM (as long as we don't need any info on the VM than what
     # is available in the Id, we don't need to make any calls to the compute RP)
-    #
-    # Since there is no guarantee that a NIC is in the same resource group as a given
-    # Virtual Machine, we can't constrain the lookup to only a single group...
     network_client = get_mgmt_service_client(cmd.cli_ctx, ResourceType.MGMT_NETWORK)
-    nics = network_client.network_interfaces.list_all()
-    public_ip_addresses = network_client.public_ip_addresses.list_all()
+    if resource_group_name:
+        # Since there is no guarantee that a NIC is in the same resource group as a given
+        # Virtual Machine, the NICs are listed in the resource groups the VMs refer to
+        compute_client = _compute_client_factory(cmd.cli_ctx)
+        if vm_name:
+            try:
+                vms = [compute_client.virtual_machines.get(resource_group_name, vm_name)]
+            except CloudError as ex:
+                if ex.status_code != 404:
+                    raise
+                vms = []
+        else:
+            vms = compute_client.virtual_machines.list(resource_group_name)
+        nic_ids = [nic.id for vm in vms for nic in vm.network_profile.network_interfaces]
+        nics = list(list_resources_by_id(network_client.network_interfaces, nic_ids)) if nic_ids else []
+        public_ip_ids = [ip_configuration.public_ip_address.id for nic in nics
+                         for ip_configuration in nic.ip_configurations if ip_configuration.public_ip_address]
+        public_ip_addresses = list_resources_by_id(network_client.public_ip_addresses, public_ip_ids) \
+            if public_ip_ids else []
+    else:
+        # the NICs are streamed while the public IP addresses are indexed
+        public_ip_addresses = prefetch(network_client.public_ip_addresses.list_all())
+        nics = prefetch(network_client.network_interfaces.list_all())
+
+    # If provided, make sure that the vm name matches the NIC we are looking at before adding
+    # it to the result...
+    def _is_vm_nic(nic):
+        return nic.virtual_machine and (vm_name is None or
+                                        vm_name.lower() == _parse_rg_name(nic.virtual_machine.id)[1].lower())
 
-    ip_address_lookup = {pip.id: pip for pip in list(public_ip_addresses)}
+    ip_configurations = ((nic, ip_configuration) for nic in nics if _is_vm_nic(nic)
+                         for ip_configuration in nic.ip_configurations)
+    joined = hash_join(public_ip_addresses, lambda public_ip_address: public_ip_address.id, ip_configurations,
+                       lambda x: x[1].public_ip_address.id if x[1].public_ip_address else None)
 
     result = []
-    for nic in [n for n in list(nics) if n.virtual_machine]:
+    for _, pairs in groupby(joined, lambda pair: pair[0][0].id):
+        pairs = list(pairs)
+        nic = pairs[0][0][0]
         nic_resource_group, nic_vm_name = _parse_rg_name(nic.virtual_machine.id)
-
-        # If provided, make sure that resource group name and vm name match the NIC we are
-        # looking at before adding it to the result...
-        same_resource_group_name = (resource_group_name is None or
-                                    resource_group_name.lower() == nic_resource_group.lower())
-        same_vm_name = (vm_name is None or
-                        vm_name.lower() == nic_vm_name.lower())
-        if same_resource_group_name and same_vm_name:
-            network_info = {
-                'privateIpAddresses': [],
-                'publicIpAddresses': []
+        network_info = {
+            'privateIpAddresses': [],
+            'publicIpAddresses': []
+        }
+        for (_, ip_configuration), public_ip_address in pairs:
+            network_info['privateIpAddresses'].append(ip_configuration.private_ip_address)
+            if public_ip_address:
+                network_info['publicIpAddresses'].append({
+                    'id': public_ip_address.id,
+                    'name': public_ip_address.name,
+                    'ipAddress': public_ip_address.ip_address,
+                    'ipAllocationMethod': public_ip_address.public_ip_allocation_method
+                })
+
+        result.append({
+            'virtualMachine': {
+                'resourceGroup': nic_resource_group,
+                'name': nic_vm_name,
+                'network': network_info
             }
-            for ip_configuration in nic.ip_configurations:
-                network_info['privateIpAddresses'].append(ip_configuration.private_ip_address)
-                if ip_configuration.public_ip_address:
-                    public_ip_address = ip_address_lookup[ip_configuration.public_ip_address.id]
-                    network_info['publicIpAddresses'].append({
-                        'id': public_ip_address.id,
-                        'name': public_ip_address.name,
-                        'ipAddress': public_ip_address.ip_address,
-                        'ipAllocationMethod': public_ip_address.public_ip_allocation_method
-                    })
-
-            result.append({
-                'virtualMachine': {
-                    'resourceGroup': nic_resource_group,
-                    'name': nic_vm_name,
-                    'network': network_info
-                }
-            })
+        })
 
     return result
 
@@ -913,8 +999,8 @@ def convert_av_set_to_managed_disk(cmd, resource_group_name, availability_set_na
         av_set.sku.name = 'Aligned'
 
         # let us double check whether the existing FD number is supported
-        skus = list_skus(cmd, av_set.location)
-        av_sku = next((s for s in skus if s.resource_type == 'availabilitySets' and s.name == 'Aligned'), None)
+        skus = list_skus(cmd, av_set.location, resource_type='availabilitySets')
+        av_sku = next((s for s in skus if s.name == 'Aligned'), None)
         if av_sku and av_sku.capabilities:
             max_fd = int(next((c.value for c in av_sku.capabilities if c.name == 'MaximumPlatformFaultDomainCount'),
                               '0'))
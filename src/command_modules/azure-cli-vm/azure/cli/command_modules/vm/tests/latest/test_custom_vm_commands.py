@@ -3,6 +3,8 @@
 # Licensed under the MIT License. See License.txt in the project root for license information.
 # --------------------------------------------------------------------------------------------
 
+import json
+import time
 import unittest
 import mock
 
@@ -450,6 +452,191 @@ class TestVMBootLog(unittest.TestCase):
             get_sdk_mock.assert_called_with(cli_ctx_mock, ResourceType.DATA_STORAGE, 'blob.blockblobservice#BlockBlobService')
 
 
+class TestVMListJoin(unittest.TestCase):
+
+    @staticmethod
+    def _resource(resource_type, resource_group, name, **kwargs):
+        resource = mock.MagicMock(**kwargs)
+        resource.name = name
+        resource.id = '/subscriptions/sub/resourceGroups/{}/providers/{}/{}'.format(resource_group, resource_type, name)
+        return resource
+
+    def _nic(self, resource_group, name, vm, public_ips):
+        ip_configurations = [mock.MagicMock(private_ip_address='10.0.0.{}'.format(i),
+                                            public_ip_address=mock.MagicMock(id=public_ip.upper()) if public_ip else None)
+                             for i, public_ip in enumerate(public_ips)]
+        return self._resource('Microsoft.Network/networkInterfaces', resource_group, name,
+                              virtual_machine=mock.MagicMock(id=vm.id) if vm else None,
+                              ip_configurations=ip_configurations)
+
+    def test_hash_join_and_prefetch(self):
+        from azure.cli.command_modules.vm._vm_utils import hash_join, prefetch
+
+        def _listing():
+            yield 'a'
+            raise ValueError('page failed')
+
+        joined = list(hash_join(prefetch([('A', 1), ('b', 2)]), lambda x: x[0], ['a', None, 'c', 'B'], lambda x: x))
+        self.assertEqual(joined, [('a', ('A', 1)), (None, None), ('c', None), ('B', ('b', 2))])
+        with self.assertRaisesRegexp(ValueError, 'page failed'):
+            list(prefetch(_listing()))
+
+    @mock.patch('azure.cli.command_modules.vm.custom._compute_client_factory', autospec=True)
+    @mock.patch('azure.cli.command_modules.vm.custom.get_mgmt_service_client', autospec=True)
+    def test_list_vm_ip_addresses(self, network_client_factory, compute_client_factory):
+        from azure.cli.command_modules.vm.custom import list_vm_ip_addresses
+        network_client = network_client_factory.return_value
+        public_ip = self._resource('Microsoft.Network/publicIPAddresses', 'rg2', 'ip1', ip_address='1.2.3.4',
+                                   public_ip_allocation_method='Static')
+        vm1 = self._resource('Microsoft.Compute/virtualMachines', 'rg1', 'vm1')
+        vm2 = self._resource('Microsoft.Compute/virtualMachines', 'rg3', 'vm2')
+        nic1 = self._nic('rg2', 'nic1', vm1, [public_ip.id, None])
+        nic2 = self._nic('rg3', 'nic2', vm2, [None])
+        vm1.network_profile.network_interfaces = [mock.MagicMock(id=nic1.id)]
+        network_client.public_ip_addresses.list_all.return_value = [public_ip]
+        network_client.network_interfaces.list_all.return_value = [
+            self._nic('rg2', 'unattached', None, [public_ip.id]), nic1, nic2]
+
+        result = list_vm_ip_addresses(mock.MagicMock())
+        self.assertEqual([x['virtualMachine']['name'] for x in result], ['vm1', 'vm2'])
+        self.assertEqual(result[0]['virtualMachine']['network'], {
+            'privateIpAddresses': ['10.0.0.0', '10.0.0.1'],
+            'publicIpAddresses': [{'id': public_ip.id, 'name': 'ip1', 'ipAddress': '1.2.3.4',
+                                   'ipAllocationMethod': 'Static'}]})
+
+        # with a resource group, only the resource groups of the NICs and public IPs of its VMs are listed
+        network_client.reset_mock()
+        compute_client_factory.return_value.virtual_machines.list.return_value = [vm1]
+        network_client.network_interfaces.list.return_value = [nic1, self._nic('rg2', 'nic3', vm1, [])]
+        network_client.public_ip_addresses.list.return_value = [public_ip]
+        result = list_vm_ip_addresses(mock.MagicMock(), resource_group_name='rg1')
+        self.assertEqual(len(result), 1)
+        self.assertEqual(result[0]['virtualMachine']['network']['publicIpAddresses'][0]['ipAddress'], '1.2.3.4')
+        network_client.network_interfaces.list.assert_called_once_with('rg2')
+        self.assertEqual([c[0][0].lower() for c in network_client.public_ip_addresses.list.call_args_list], ['rg2'])
+        network_client.network_interfaces.list_all.assert_not_called()
+
+    @mock.patch('azure.cli.command_modules.vm.custom._compute_client_factory', autospec=True)
+    @mock.patch('azure.cli.command_modules.vm.custom.get_mgmt_service_client', autospec=True)
+    def test_list_vm_details(self, network_client_factory, compute_client_factory):
+        from azure.cli.command_modules.vm.custom import list_vm
+        network_client = network_client_factory.return_value
+        compute_client = compute_client_factory.return_value
+        public_ip = self._resource('Microsoft.Network/publicIPAddresses', 'rg1', 'ip1', ip_address='1.2.3.4')
+        public_ip.dns_settings.fqdn = 'vm1.westus.cloudapp.azure.com'
+        vms = [self._resource('Microsoft.Compute/virtualMachines', 'rg1', 'vm{}'.format(i)) for i in range(3)]
+        nics = [self._nic('rg2', 'nic0', vms[0], [public_ip.id, None]), self._nic('rg2', 'nic1', vms[1], [None])]
+        for vm, nic_ids in zip(vms, [[nics[0].id], [nics[1].id], []]):
+            vm.network_profile.network_interfaces = [mock.MagicMock(id=nic_id) for nic_id in nic_ids]
+        for nic, mac_address in zip(nics, ['00-0D-3A-00-00-00', None]):
+            nic.mac_address = mac_address
+        compute_client.virtual_machines.list_all.return_value = vms
+        compute_client.virtual_machines.get.side_effect = lambda rg, name, expand: mock.MagicMock(
+            instance_view=mock.MagicMock(statuses=[
+                mock.MagicMock(code='ProvisioningState/succeeded'),
+                mock.MagicMock(code='PowerState/running', display_status='VM running')]))
+        network_client.network_interfaces.list_all.return_value = nics
+        network_client.public_ip_addresses.list_all.return_value = [public_ip]
+
+        result = list_vm(_get_test_cmd(), show_details=True)
+
+        self.assertEqual(compute_client.virtual_machines.get.call_count, 3)
+        network_client.network_interfaces.get.assert_not_called()
+        network_client.public_ip_addresses.get.assert_not_called()
+        self.assertEqual([(x.power_state, x.public_ips, x.fqdns, x.private_ips, x.mac_addresses) for x in result], [
+            ('VM running', '1.2.3.4', 'vm1.westus.cloudapp.azure.com', '10.0.0.0,10.0.0.1', '00-0D-3A-00-00-00'),
+            ('VM running', '', '', '10.0.0.0', ''),
+            ('VM running', '', '', '', '')])
+
+
+class TestVMSkuCatalog(unittest.TestCase):
+    def setUp(self):
+        import tempfile
+        import shutil
+        self.cli_ctx = TestCli()
+        self.cli_ctx.config.config_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.cli_ctx.config.config_dir)
+        ResourceSku = get_sdk(self.cli_ctx, ResourceType.MGMT_COMPUTE, 'ResourceSku', mod='models',
+                              operation_group='resource_skus')
+
+        def _sku(resource_type, name, locations, zones=None, restrictions=None):
+            return ResourceSku.deserialize({
+                'resourceType': resource_type, 'name': name, 'locations': locations,
+                'locationInfo': [{'location': l, 'zones': zones or []} for l in locations],
+                'restrictions': restrictions or []})
+
+        self.skus = [
+            _sku('virtualMachines', 'Standard_DS1_v2', ['eastus2'], ['1', '2', '3'],
+                 [{'type': 'Zone', 'values': ['eastus2'], 'restrictionInfo': {'zones': ['3']},
+                   'reasonCode': 'NotAvailableForSubscription'}]),
+            _sku('virtualMachines', 'Standard_DS2_v2', ['EastUS2']),
+            _sku('virtualMachines', 'Standard_A1', ['eastus2', 'westus'],
+                 restrictions=[{'type': 'Location', 'values': ['westus'], 'reasonCode': 'NotAvailableForSubscription'}]),
+            _sku('availabilitySets', 'Aligned', ['westus'])
+        ]
+        self.client = mock.MagicMock()
+        self.client.resource_skus.list.return_value = self.skus
+        for target, value in [('azure.cli.command_modules.vm._client_factory._compute_client_factory', self.client),
+                              ('azure.cli.core.commands.client_factory.get_subscription_id', 'sub1')]:
+            patcher = mock.patch(target, return_value=value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_sku_catalog_queries(self):
+        from azure.cli.command_modules.vm._vm_utils import list_sku_info
+
+        def _names(*args, **kwargs):
+            return [s.name for s in list_sku_info(self.cli_ctx, *args, **kwargs)]
+
+        self.assertEqual(_names('eastus2'), ['Standard_DS1_v2', 'Standard_DS2_v2', 'Standard_A1'])
+        self.assertEqual(_names('EastUS2', size='ds'), ['Standard_DS1_v2', 'Standard_DS2_v2'])
+        self.assertEqual(_names('eastus2', zone=True), ['Standard_DS1_v2'])
+        self.assertEqual(_names('eastus2', zone='2'), ['Standard_DS1_v2'])
+        self.assertEqual(_names('eastus2', zone='3'), [])
+        self.assertEqual(_names('westus'), ['Standard_A1', 'Aligned'])
+        self.assertEqual(_names('westus', resource_type='virtualMachines', available=True), [])
+        self.assertEqual(_names('westus', resource_type='availabilitySets'), ['Aligned'])
+        # the subscription wide listing is done once, for every location
+        self.assertEqual(self.client.resource_skus.list.call_count, 1)
+        result = list_sku_info(self.cli_ctx, 'eastus2', size='Standard_DS1_v2')[0]
+        self.assertEqual(result.restrictions[0].restriction_info.zones, ['3'])
+        self.assertEqual(result.location_info[0].zones, ['1', '2', '3'])
+
+        with self.assertRaises(CLIError):
+            list_sku_info(self.cli_ctx, size='ds')
+        self.assertEqual(len(list_sku_info(self.cli_ctx)), 4)
+        self.assertEqual(self.client.resource_skus.list.call_count, 2)
+
+    def test_sku_catalog_list_skus_command(self):
+        from six import StringIO
+        self.cli_ctx.out_file = StringIO()
+        exit_code = self.cli_ctx.invoke(['vm', 'list-skus', '-l', 'eastus2', '--zone', '2', '-o', 'json'])
+        self.assertEqual(exit_code, 0)
+        self.assertEqual([s['name'] for s in json.loads(self.cli_ctx.out_file.getvalue())], ['Standard_DS1_v2'])
+
+    def test_sku_catalog_expires(self):
+        from azure.cli.command_modules.vm._vm_utils import list_sku_info
+        from azure.cli.command_modules.vm._sku_catalog import VM_SKU_CATALOG_MAX_AGE
+        list_sku_info(self.cli_ctx, 'westus')
+        list_sku_info(self.cli_ctx, 'westus')
+        self.assertEqual(self.client.resource_skus.list.call_count, 1)
+        with mock.patch('time.time', return_value=time.time() + VM_SKU_CATALOG_MAX_AGE):
+            list_sku_info(self.cli_ctx, 'westus')
+        self.assertEqual(self.client.resource_skus.list.call_count, 2)
+
+    def test_sku_catalog_unreadable(self):
+        import os
+        from azure.cli.command_modules.vm._vm_utils import list_sku_info
+        config_dir = self.cli_ctx.config.config_dir
+        for content in ['{"time": 1e10, "skus": [{"resourceType": "virtual', '{"time": 1e10}']:
+            with open(os.path.join(config_dir, 'vmskus.sub1.westus.json'), 'w') as f:
+                f.write(content)
+            self.assertEqual([s.name for s in list_sku_info(self.cli_ctx, 'westus')], ['Standard_A1', 'Aligned'])
+        self.assertEqual(self.client.resource_skus.list.call_count, 2)
+        # saves replace the files, no temporary file is left behind
+        self.assertEqual(sorted(os.listdir(config_dir)), ['vmskus.sub1.eastus2.json', 'vmskus.sub1.westus.json'])
+
+
 class FakedVM(object):  # pylint: disable=too-few-public-methods
     def __init__(self, nics=None, disks=None, os_disk=None):
         self.network_profile = NetworkProfile(network_interfaces=nics)
@@ -17,8 +17,9 @@ from azure.cli.command_modules.vm._validators import (validate_ssh_key,
                                                       process_disk_or_snapshot_create_namespace,
                                                       _validate_vmss_create_subnet,
                                                       _get_next_subnet_addr_suffix,
-                                                      _validate_vm_vmss_msi)
-from azure.cli.command_modules.vm._vm_utils import normalize_disk_info
+                                                      _validate_vm_vmss_msi,
+                                                      _run_validation_stages)
+from azure.cli.command_modules.vm._vm_utils import normalize_disk_info, client_pool, get_pooled
 from azure.cli.testsdk import TestCli
 from azure.mgmt.compute.models import CachingTypes
 from knack.util import CLIError
@@ -369,6 +370,69 @@ class TestActions(unittest.TestCase):
             normalize_disk_info(write_accelerator_settings=['0=true'])
         self.assertTrue("data disk with lun of '0' doesn't exist" in str(err.exception))
 
+    def test_run_validation_stages(self):
+        import threading
+        cmd = mock.MagicMock()
+        cmd.cli_ctx.data = {}
+        cmd.cli_ctx.config.getint.side_effect = lambda section, option, fallback: fallback
+        namespace = mock.MagicMock()
+        started = threading.Event()
+        order = []
+
+        def _stage(name, wait=False, error=None):
+            def _validate(cmd, namespace):  # pylint: disable=unused-argument
+                if wait:  # only done when the independent stage runs at the same time
+                    self.assertTrue(started.wait(5))
+                else:
+                    started.set()
+                order.append(name)
+                if error:
+                    raise CLIError(error)
+            return _validate
+
+        _run_validation_stages(cmd, namespace, [
+            ('location', _stage('location', wait=True), []),
+            ('nsg', _stage('nsg'), []),
+            ('vnet', _stage('vnet'), ['location'])
+        ])
+        self.assertLess(order.index('location'), order.index('vnet'))
+        self.assertIsNone(cmd.cli_ctx.data['vm_client_pool'])
+
+        # errors surface in the order of the stages, and the dependent stages don't run
+        del order[:]
+        with self.assertRaises(CLIError) as err:
+            _run_validation_stages(cmd, namespace, [
+                ('location', _stage('location', error='bad location'), []),
+                ('nsg', _stage('nsg', error='bad nsg'), []),
+                ('vnet', _stage('vnet'), ['location'])
+            ])
+        self.assertEqual(str(err.exception), 'bad location')
+        self.assertNotIn('vnet', order)
+
+        # with a concurrency of 1 the stages run in the order they are listed
+        del order[:]
+        cmd.cli_ctx.config.getint.side_effect = lambda section, option, fallback: 1
+        _run_validation_stages(cmd, namespace, [
+            ('nsg', _stage('nsg'), []),
+            ('location', _stage('location'), []),
+            ('vnet', _stage('vnet'), ['location']),
+            ('public ip', _stage('public ip'), [])
+        ])
+        self.assertEqual(order, ['nsg', 'location', 'vnet', 'public ip'])
+
+    def test_client_pool(self):
+        cli_ctx = mock.MagicMock()
+        cli_ctx.data = {}
+        factory = mock.MagicMock(side_effect=lambda: object())
+
+        # without a pool, nothing is shared
+        self.assertIsNot(get_pooled(cli_ctx, 'key', factory), get_pooled(cli_ctx, 'key', factory))
+        with client_pool(cli_ctx):
+            first = get_pooled(cli_ctx, 'key', factory)
+            self.assertIs(get_pooled(cli_ctx, 'key', factory), first)
+            self.assertIsNot(get_pooled(cli_ctx, 'other', factory), first)
+        self.assertEqual(factory.call_count, 4)
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -4,6 +4,8 @@
 # --------------------------------------------------------------------------------------------
 
 import os.path
+import shutil
+import tempfile
 import unittest
 import mock
 
@@ -70,5 +72,115 @@ class TestVMImage(unittest.TestCase):
             load_images_from_aliases_doc(cli_ctx)
 
 
+def _named(*names):
+    result = []
+    for name in names:
+        item = mock.MagicMock()
+        item.name = name  # 'name' is a reserved argument of the MagicMock constructor
+        result.append(item)
+    return result
+
+
+class TestVMImageCatalog(unittest.TestCase):
+    def setUp(self):
+        self.config_dir = tempfile.mkdtemp()
+        self.cli_ctx = mock.MagicMock()
+        self.cli_ctx.config.config_dir = self.config_dir
+        self.cli_ctx.cloud.name = 'AzureCloud'
+        self.client = mock.MagicMock()
+        images = self.client.virtual_machine_images
+        images.list_publishers.return_value = _named('Canonical', 'OpenLogic')
+        self.offers = {'Canonical': ['UbuntuServer'], 'OpenLogic': ['CentOS']}
+        images.list_offers.side_effect = lambda location, publisher: _named(*self.offers[publisher])
+        images.list_skus.side_effect = lambda location, publisher, offer: _named('16.04-LTS', '7.4')
+        images.list.side_effect = lambda location, publisher, offer, sku, **kwargs: _named('1.0.9', '1.0.10')
+        for target in ['azure.cli.command_modules.vm._client_factory._compute_client_factory',
+                       'azure.cli.command_modules.vm._actions._compute_client_factory']:
+            patcher = mock.patch(target, return_value=self.client)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.addCleanup(shutil.rmtree, self.config_dir)
+
+    def test_image_catalog_refresh_and_search(self):
+        from azure.cli.command_modules.vm._actions import load_images_thru_services
+        images = self.client.virtual_machine_images
+
+        result = load_images_thru_services(self.cli_ctx, 'canon', None, '16', 'westus')
+        self.assertEqual(sorted(i['version'] for i in result), ['1.0.10', '1.0.9'])
+        self.assertTrue(all(i['publisher'] == 'Canonical' and i['sku'] == '16.04-LTS' for i in result))
+        # only the versions of the matching SKU are crawled
+        self.assertEqual(images.list.call_count, 1)
+        self.assertTrue(os.path.isfile(os.path.join(self.config_dir, 'vmimages.azurecloud.westus.json')))
+
+        # unchanged offers: answered from the catalog, the other SKU of the offer is crawled on demand
+        result = load_images_thru_services(self.cli_ctx, 'canon', None, None, 'westus')
+        self.assertEqual(len(result), 4)
+        self.assertEqual(images.list_skus.call_count, 1)
+        self.assertEqual(images.list.call_count, 2)
+
+        # a changed offer list makes the publisher crawled again
+        self.offers['Canonical'] = ['UbuntuServer', 'Ubuntu_Core']
+        result = load_images_thru_services(self.cli_ctx, 'canon', 'ubuntu', None, 'westus')
+        self.assertEqual(len(result), 8)
+        self.assertEqual(images.list_skus.call_count, 3)
+        self.assertEqual(images.list.call_count, 6)
+
+    def test_latest_image_version_from_catalog(self):
+        from azure.cli.command_modules.vm._actions import load_images_thru_services, _get_latest_image_version
+        images = self.client.virtual_machine_images
+        images.list.side_effect = None
+        images.list.return_value = _named('2.0.0')
+
+        # nothing crawled yet: looked up on the server
+        self.assertEqual(_get_latest_image_version(self.cli_ctx, 'westus', 'OpenLogic', 'CentOS', '7.4'), '2.0.0')
+        images.list.assert_called_once_with('westus', 'OpenLogic', 'CentOS', '7.4', top=1, orderby='name desc')
+
+        images.list.return_value = _named('1.0.9', '1.0.10')
+        load_images_thru_services(self.cli_ctx, 'openlogic', 'centos', '7.4', 'westus')
+        images.list.reset_mock()
+        self.assertEqual(_get_latest_image_version(self.cli_ctx, 'westus', 'openlogic', 'centos', '7.4'), '1.0.10')
+        images.list.assert_not_called()
+
+    @mock.patch('requests.get', autospec=True)
+    def test_aliases_doc_is_cached(self, mock_get):
+        from azure.cli.command_modules.vm._actions import load_images_from_aliases_doc
+        file_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'aliases.json')
+        with open(file_path, 'r') as test_file:
+            mock_get.return_value.content = test_file.read().encode()
+        mock_get.return_value.status_code = 200
+        self.cli_ctx.cloud.endpoints.vm_image_alias_doc = 'https://aka.ms/aliases.json'
+
+        first = load_images_from_aliases_doc(self.cli_ctx, 'canonical')
+        second = load_images_from_aliases_doc(self.cli_ctx, 'canonical')
+        self.assertTrue(first)
+        self.assertEqual(first, second)
+        self.assertEqual(mock_get.call_count, 1)
+
+    @mock.patch('requests.get', autospec=True)
+    def test_damaged_catalog_files_are_refreshed(self, mock_get):
+        from azure.cli.command_modules.vm._actions import (load_images_from_aliases_doc, load_images_thru_services,
+                                                           _get_latest_image_version)
+        for name in ['vmimages.azurecloud.westus.json', 'vmImageAliases.json']:
+            with open(os.path.join(self.config_dir, name), 'w') as f:
+                f.write('{"publishers": {"Canonical": {"offe')
+        images = self.client.virtual_machine_images
+        images.list.side_effect = None
+        images.list.return_value = _named('2.0.0')
+        self.assertEqual(_get_latest_image_version(self.cli_ctx, 'westus', 'OpenLogic', 'CentOS', '7.4'), '2.0.0')
+
+        result = load_images_thru_services(self.cli_ctx, 'openlogic', None, None, 'westus')
+        self.assertEqual(len(result), 2)
+
+        mock_get.return_value.content = b'{"outputs": {"aliases": {"value": {}}}}'
+        mock_get.return_value.status_code = 200
+        self.cli_ctx.cloud.endpoints.vm_image_alias_doc = 'https://aka.ms/aliases.json'
+        self.assertEqual(load_images_from_aliases_doc(self.cli_ctx), [])
+        self.assertEqual(load_images_from_aliases_doc(self.cli_ctx), [])
+        self.assertEqual(mock_get.call_count, 1)
+        # saves replace the files, no temporary file is left behind
+        self.assertEqual(sorted(os.listdir(self.config_dir)),
+                         ['vmImageAliases.json', 'vmimages.azurecloud.westus.json'])
+
+
 if __name__ == '__main__':
     unittest.main()